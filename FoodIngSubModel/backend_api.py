@@ -1,27 +1,78 @@
 # backend_api.py
+import json
+from contextlib import aclosing, asynccontextmanager
+
 from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from config import Config
 from services.ingredient_service import IngredientService
 from services.recipe_service import RecipeService
-from services.openai_service import OpenAIService
-
-app = FastAPI(title="Recipe Chatbot API")
+from services.async_openai_service import AsyncOpenAIService
+from services.clients import get_client_registry
+from services import metrics
 
 config = Config()
-ingredient_service = IngredientService(config)
-recipe_service = RecipeService(config)
-openai_service = OpenAIService(config)
+# One OpenAI service (and one pooled client) shared by every endpoint
+openai_service = AsyncOpenAIService(config)
+ingredient_service = IngredientService(config, openai_service)
+recipe_service = RecipeService(config, openai_service, ingredient_service.dataset_service)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precompute dataset indexes and the substitute neighbor table before serving
+    ingredient_service.dataset_service.warm_up()
+    # Hot-reload the dataset when its file changes
+    await ingredient_service.dataset_service.start()
+    # Snapshot the recipes table into the in-process index and keep it fresh
+    await recipe_service.start()
+    yield
+    await recipe_service.stop()
+    await ingredient_service.dataset_service.stop()
+    await get_client_registry(config).aclose()
+
+app = FastAPI(title="Recipe Chatbot API", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+
+def count_sources(operation: str, *results):
+    """Count which tier answered each SuggestionResult."""
+    for result in results:
+        metrics.RESULT_SOURCES.inc(operation, result.source)
+
+def sse_response(events, error_message: str, done=lambda data: data):
+    """Serve (event, data) pairs as server-sent events; "done" data goes through ``done``."""
+    async def body():
+        async with aclosing(events):
+            async for event, data in events:
+                if event == "done":
+                    if not data:
+                        event, data = "error", {"error": error_message}
+                    else:
+                        data = done(data)
+                elif event == "error":
+                    data = {"error": error_message}
+                elif event == "ingredients":
+                    data = {"ingredient": data}
+                else:
+                    data = {"delta": data}
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 class SubstitutionRequest(BaseModel):
     ingredient: str
     recipe: str
 
+class SubstitutionBatchRequest(BaseModel):
+    items: list[SubstitutionRequest]
+
 class SuggestionRequest(BaseModel):
     ingredients: list[str]
 
 class LookupRequest(BaseModel):
     recipe: str
+    session_id: str = ""
 
 class ContextRequest(BaseModel):
     taste: str
@@ -29,8 +80,17 @@ class ContextRequest(BaseModel):
     color: str
     cooking_method: str
 
+class ContextBatchRequest(BaseModel):
+    requests: list[ContextRequest]
+
+class ResolveRequest(BaseModel):
+    query: str
+    # Suggestions to return, at most RESOLVE_SUGGEST_LIMIT (the autocomplete index keeps no more)
+    limit: int = Field(10, ge=1, le=config.resolve_suggest_limit)
+
 class SimilarRequest(BaseModel):
-    recipe: str
+    recipe: str = ""
+    session_id: str = ""
 
 class SpecificSuggestionRequest(BaseModel):
     required_ingredients: list[str]
@@ -38,85 +98,172 @@ class SpecificSuggestionRequest(BaseModel):
 
 class RecipeWithSubsRequest(BaseModel):
     recipe: str
-    substitutes: list[str]
+    substitutes: list[str] = []
+    session_id: str = ""
 
 class RewriteRequest(BaseModel):
     recipe: str
     original_ingredients: str = ""
     old_ingredient: str
     new_ingredient: str
+    session_id: str = ""
 
 class NaturalContextRequest(BaseModel):
     description: str
 
+class ContextQueryRequest(BaseModel):
+    query: str
+    max_results: int = 10
+
+@app.get("/cache/stats")
+async def cache_stats():
+    stats = openai_service.cache_stats()
+    if recipe_service.suggestion_cache is not None:
+        stats["suggest"] = recipe_service.suggestion_cache.stats()
+    if recipe_service.sessions is not None:
+        stats["sessions"] = recipe_service.sessions.stats()
+    return stats
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the dataset is warm (and the recipe index has loaded,
+    with READY_REQUIRES_RECIPE_INDEX)."""
+    status = {
+        "dataset": ingredient_service.dataset_service.status(),
+        "recipe_index": recipe_service.ready,
+        "llm": openai_service.is_available,
+    }
+    is_ready = status["dataset"]["ready"] and (status["recipe_index"] or not config.ready_requires_recipe_index)
+    return JSONResponse({"ready": is_ready, **status}, status_code=200 if is_ready else 503)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/llm/usage")
+async def llm_usage():
+    return openai_service.usage_stats()
+
 @app.post("/substitute")
-def substitute(req: SubstitutionRequest):
-    result = ingredient_service.get_substitutes(req.ingredient, req.recipe)
+async def substitute(req: SubstitutionRequest):
+    result = await ingredient_service.get_substitutes(req.ingredient, req.recipe)
+    count_sources("substitute", result)
     return {"substitutes": result.items, "source": result.source}
 
+@app.post("/substitute/batch")
+async def substitute_batch(req: SubstitutionBatchRequest):
+    if len(req.items) > config.max_substitute_batch:
+        return {"error": f"Batch too large (max {config.max_substitute_batch} items)"}
+    results = await ingredient_service.get_substitutes_batch([(i.ingredient, i.recipe) for i in req.items])
+    count_sources("substitute", *results)
+    return {"results": [{"substitutes": r.items, "source": r.source} for r in results]}
+
 @app.post("/suggest")
-def suggest(req: SuggestionRequest):
-    recipes = recipe_service.get_suggestions(req.ingredients)
+async def suggest(req: SuggestionRequest):
+    recipes = await recipe_service.get_suggestions(req.ingredients)
     return {"recipes": [{"name": r.name, "ingredients": r.ingredients, "id": r.id, "image": r.image} for r in recipes]}
 
 @app.post("/lookup")
-def lookup(req: LookupRequest):
-    result = openai_service.get_recipe_details(req.recipe)
+async def lookup(req: LookupRequest):
+    result = await recipe_service.get_recipe_details(req.recipe, req.session_id)
     return {"ingredient": result["ingredients"], "cooking_method": result["cooking_method"],}
 
+@app.post("/lookup/stream")
+async def lookup_stream(req: LookupRequest):
+    return sse_response(
+        recipe_service.stream_recipe_details(req.recipe, req.session_id),
+        "Could not look up recipe",
+        lambda result: {"ingredient": result["ingredients"], "cooking_method": result["cooking_method"]},
+    )
+
 @app.post("/context")
-def context(req: ContextRequest):
-    result = ingredient_service.get_context_suggestions(
+async def context(req: ContextRequest):
+    result = await ingredient_service.get_context_suggestions(
         taste= req.taste,
         texture= req.texture,
         color= req.color,
         cooking_method= req.cooking_method,
     )
+    count_sources("context", result)
 
     return {"ingredient": result.items, "source": result.source}
 
+@app.post("/context/batch")
+async def context_batch(req: ContextBatchRequest):
+    if len(req.requests) > config.max_context_batch:
+        return {"error": f"Batch too large (max {config.max_context_batch} requests)"}
+    results = await ingredient_service.get_context_suggestions_batch([r.model_dump() for r in req.requests])
+    count_sources("context", *results)
+    return {"results": [{"ingredient": r.items, "source": r.source} for r in results]}
+
 @app.post("/context_natural")
-def context_natural(req: NaturalContextRequest):
-    result = ingredient_service.get_context_suggestions(natural_description=req.description)
+async def context_natural(req: NaturalContextRequest):
+    result = await ingredient_service.get_context_suggestions(natural_description=req.description)
+    count_sources("context_natural", result)
+    return {"ingredient": result.items, "source": result.source}
+
+@app.get("/context_natural/stats")
+async def context_natural_stats():
+    return ingredient_service.dataset_service.context_parser_stats()
+
+@app.post("/context/query")
+async def context_query(req: ContextQueryRequest):
+    try:
+        result = ingredient_service.query_ingredients(req.query, req.max_results)
+    except ValueError as e:
+        return {"error": f"Invalid query: {e}"}
+    count_sources("context_query", result)
     return {"ingredient": result.items, "source": result.source}
 
+@app.post("/resolve")
+async def resolve(req: ResolveRequest):
+    result = ingredient_service.resolve_ingredient(req.query, req.limit)
+    return {"query": req.query, **result}
+
 @app.post("/similar")
-def similar(req: SimilarRequest):
-    recipes = recipe_service.get_similar_recipes(req.recipe)
+async def similar(req: SimilarRequest):
+    recipes = await recipe_service.get_similar_recipes(req.recipe, session_id=req.session_id)
     return {"recipes": [{"name": r.name, "ingredients": r.ingredients} for r in recipes]}
 
 @app.post("/suggest_specific")
-def suggest_specific(req: SpecificSuggestionRequest):
-    recipes = recipe_service.get_recipes_with_specific_ingredients(req.required_ingredients, req.context)
+async def suggest_specific(req: SpecificSuggestionRequest):
+    recipes = await recipe_service.get_recipes_with_specific_ingredients(req.required_ingredients, req.context)
     return {"recipes": [{"name": r.name, "ingredients": r.ingredients} for r in recipes]}
 
+@app.get("/suggest_specific/stats")
+async def suggest_specific_stats():
+    return recipe_service.specific_yields.stats()
+
 @app.post("/recipe_custom")
-def recipe_custom(req: RecipeWithSubsRequest):
-    result = recipe_service.get_recipe_with_ingredients(req.recipe, req.substitutes)
+async def recipe_custom(req: RecipeWithSubsRequest):
+    result = await recipe_service.get_recipe_with_ingredients(req.recipe, req.substitutes, req.session_id)
     if not result:
         return {"error": "Could not generate recipe"}
     return {"name": result.name, "ingredients": result.ingredients}
 
 @app.post("/rewrite")
-def rewrite(req: RewriteRequest):
-    # 1. Fetch the original ingredients internally
-    recipe_details = openai_service.get_recipe_details(req.recipe)
-    
-    # Check if lookup failed
-    if not recipe_details or "ingredients" not in recipe_details:
-        return {"error": f"Could not find ingredients for {req.recipe}"}
-
-    # Convert list to string if your service expects a string
-    original_ingredients_str = ", ".join(recipe_details["ingredients"])
-
-    # 2. Call the substitution service using the fetched ingredients
-    result = openai_service.get_updated_recipe_with_substitution(
-        req.recipe, 
-        original_ingredients_str, 
-        req.old_ingredient, 
-        req.new_ingredient
+async def rewrite(req: RewriteRequest):
+    result = await recipe_service.rewrite_recipe(
+        req.recipe,
+        req.old_ingredient,
+        req.new_ingredient,
+        req.original_ingredients,
+        req.session_id,
     )
     
     if not result:
         return {"error": "Could not rewrite recipe"}
-    return result
\ No newline at end of file
+    return result
+
+@app.post("/rewrite/stream")
+async def rewrite_stream(req: RewriteRequest):
+    return sse_response(
+        recipe_service.stream_rewrite_recipe(
+            req.recipe,
+            req.old_ingredient,
+            req.new_ingredient,
+            req.original_ingredients,
+            req.session_id,
+        ),
+        "Could not rewrite recipe",
+    )
@@ -0,0 +1,6 @@
+"""
+Benchmark suite for Recipe Suggestion System
+
+Runs backend_api against local OpenAI and Supabase/PostgREST stand-ins and replays
+the n8n workflow call mix; see bench/run.py.
+"""
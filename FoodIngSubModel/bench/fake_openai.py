@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server for Recipe Suggestion System benchmarks
+
+OpenAI-compatible /v1/chat/completions (plain and streamed) with configurable latency
+and canned responses in the formats each prompt asks for. Point the backend at it
+with OPENAI_BASE_URL=http://host:port/v1.
+
+    python -m bench.fake_openai --port 8901 --latency 0.4 --jitter 0.1 --tokens-per-second 100
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _numbered(items: List[str]) -> str:
+    return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+
+
+def _up_to(prompt: str, default: int) -> int:
+    match = re.search(r"up to (\d+)", prompt)
+    return int(match.group(1)) if match else default
+
+
+_NAMES = ["Tofu", "Tempeh", "Seitan", "Chickpeas", "Mushroom", "Jackfruit", "Eggplant", "Paneer"]
+
+
+def canned_reply(system: str, user: str) -> Tuple[str, str]:
+    """(prompt kind, response text) in the format the system prompt asks for.
+
+    Counts and required ingredients are read from either message.
+    """
+    prompt = f"{system}\n{user}"
+    if '"results"' in system:
+        items = re.findall(r"^(\d+)\. Ingredient: (.*?) \|", user, re.M)
+        count = _up_to(prompt, 5)
+        results = [{"id": int(i), "substitutes": [f"{name} alternative {k}" for k in range(1, count + 1)]}
+                   for i, name in items]
+        return "substitute_batch", json.dumps({"results": results})
+    if "JSON" in system:
+        return "context_json", json.dumps({"taste": "spicy", "texture": "crunchy", "color": None,
+                                           "cooking_method": "fried"})
+    if "Updated Ingredients" in system:
+        return "rewrite", ("Updated Ingredients: 200 g tofu, 2 tbsp fish sauce, 1 tbsp sugar, 2 cloves garlic, "
+                           "1 cup rice noodles | Updated Cooking Method: 1. Soak the noodles. 2. Fry garlic "
+                           "until fragrant. 3. Add tofu and cook for 3 minutes. 4. Add noodles and sauce, "
+                           "toss for 2 minutes and serve.")
+    if "Cooking Method" in system:
+        return "lookup", ("Ingredients: 2 eggs, 1 cup cooked rice, 1 tbsp soy sauce, 2 cloves garlic, 1 green onion "
+                          "| Cooking Method: 1. Heat oil in a wok. 2. Fry garlic until golden. 3. Add eggs and "
+                          "scramble. 4. Add rice and soy sauce, stir fry for 3 minutes. 5. Garnish and serve.")
+    if "Recipe:" in system:
+        required = re.search(r"ALL of these ingredients: (.*?)\.", prompt)
+        extra = required.group(1) if required else "egg, rice"
+        lines = [f"Recipe: {name} Bowl | Ingredients: {extra}, garlic, soy sauce, {name.lower()}"
+                 for name in _NAMES[:_up_to(prompt, 5)]]
+        return "recipes", _numbered(lines)
+    return "list", _numbered(_NAMES[:_up_to(prompt, 5)])
+
+
+class FakeOpenAI:
+    """Request handler state: latency model and per-prompt-kind counters."""
+
+    def __init__(self, latency: float = 0.4, jitter: float = 0.1, tokens_per_second: float = 100.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls: Counter = Counter()
+
+    def _first_token_delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _generation_time(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        kind, text = canned_reply(system, user)
+        self.calls[kind] += 1
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            await asyncio.sleep(self._first_token_delay())
+            return JSONResponse({"error": {"message": "Injected failure", "type": "server_error"}}, status_code=500)
+
+        max_tokens = body.get("max_tokens") or 4096
+        finish_reason = "stop"
+        if _estimate_tokens(text) > max_tokens:
+            text, finish_reason = text[:max_tokens * 4], "length"
+        usage = {
+            "prompt_tokens": _estimate_tokens(system + user),
+            "completion_tokens": _estimate_tokens(text),
+            "total_tokens": _estimate_tokens(system + user) + _estimate_tokens(text),
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o-mini")
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(self._stream(completion_id, model, text, finish_reason, usage, include_usage),
+                                     media_type="text/event-stream")
+
+        await asyncio.sleep(self._first_token_delay() + self._generation_time(usage["completion_tokens"]))
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                         "finish_reason": finish_reason}],
+            "usage": usage,
+        })
+
+    async def _stream(self, completion_id: str, model: str, text: str, finish_reason: str,
+                      usage: Dict[str, Any], include_usage: bool):
+        def chunk(delta: Dict[str, Any], finish=None, **extra) -> str:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                       "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(self._first_token_delay())
+        yield chunk({"role": "assistant", "content": ""})
+        pieces = re.findall(r"\S+\s*", text) or [text]
+        delay = self._generation_time(usage["completion_tokens"]) / len(pieces)
+        for piece in pieces:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk({"content": piece})
+        yield chunk({}, finish_reason)
+        if include_usage:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                       "model": model, "choices": [], "usage": usage}
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def stats(self, request: Request):
+        return JSONResponse({"calls": dict(self.calls), "total": sum(self.calls.values())})
+
+
+def create_app(**options) -> Starlette:
+    fake = FakeOpenAI(**options)
+    return Starlette(routes=[
+        Route("/v1/chat/completions", fake.completions, methods=["POST"]),
+        Route("/stats", fake.stats, methods=["GET"]),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.4, help="Mean time to first token (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform +/- jitter on latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Generation speed (0: instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+                           error_rate=args.error_rate),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Fake Supabase/PostgREST Server for Recipe Suggestion System benchmarks
+
+Serves GET /rest/v1/<table> over in-memory rows with the PostgREST query syntax the
+backend uses (select, order, limit, offset, eq/neq/gt/gte/lt/lte/like/ilike
+filters and or/and logic trees). Point the backend at it with VITE_SUPABASE_URL=http://host:port.
+
+    python -m bench.fake_postgrest --port 8902 --recipes 20000 --latency 0.02
+"""
+
+import re
+import json
+import asyncio
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from bench.workload import generate_recipes
+
+
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"}
+
+
+def _coerce(value: str, sample: Any) -> Any:
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        return int(value)
+    if isinstance(sample, float):
+        return float(value)
+    return value
+
+
+def _like(pattern: str, flags: int = 0) -> Callable[[Any], bool]:
+    regex = re.compile("^" + ".*".join(re.escape(p) for p in pattern.replace("*", "%").split("%")) + "$",
+                       flags | re.DOTALL)
+    return lambda value: value is not None and bool(regex.match(str(value)))
+
+
+def _filter(column: str, expression: str, sample_row: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    op, _, raw = expression.partition(".")
+    if op in ("like", "ilike"):
+        match = _like(raw, re.IGNORECASE if op == "ilike" else 0)
+        return lambda row: match(row.get(column))
+    value = _coerce(raw, sample_row.get(column))
+    compare = {
+        "eq": lambda a: a == value, "neq": lambda a: a != value,
+        "gt": lambda a: a > value, "gte": lambda a: a >= value,
+        "lt": lambda a: a < value, "lte": lambda a: a <= value,
+    }.get(op)
+    if compare is None:
+        raise ValueError(f"Unsupported operator: {op}")
+    return lambda row: row.get(column) is not None and compare(row[column])
+
+
+def _split_terms(text: str) -> List[str]:
+    """Split a logic tree's operands on top-level commas (outside parentheses and quotes)."""
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and char in "()":
+            depth += 1 if char == "(" else -1
+        elif not quoted and char == "," and depth == 0:
+            terms.append(text[start:i])
+            start = i + 1
+    terms.append(text[start:])
+    return terms
+
+
+def _logic(operator: str, body: str, sample_row: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """``or=(a.gt.1,and(b.eq."x",c.gt.2))`` style filter."""
+    checks = []
+    for term in _split_terms(body[1:-1]):
+        if term.startswith(("or(", "and(")):
+            nested, _, rest = term.partition("(")
+            checks.append(_logic(nested, "(" + rest, sample_row))
+        else:
+            column, _, expression = term.partition(".")
+            op, _, raw = expression.partition(".")
+            if raw.startswith('"') and raw.endswith('"'):
+                raw = raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+            checks.append(_filter(column, f"{op}.{raw}", sample_row))
+    combine = any if operator == "or" else all
+    return lambda row: combine(check(row) for check in checks)
+
+
+class FakePostgrest:
+    """Tables of rows answered with PostgREST semantics and a fixed query latency."""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], latency: float = 0.0):
+        self.tables = tables
+        self.latency = latency
+        self.queries = 0
+
+    async def query(self, request: Request):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        rows = self.tables.get(request.path_params["table"])
+        if rows is None:
+            return JSONResponse({"message": "relation does not exist"}, status_code=404)
+
+        params = request.query_params
+        try:
+            for column, expression in params.multi_items():
+                if column in ("or", "and") and rows:
+                    keep = _logic(column, expression, rows[0])
+                    rows = [row for row in rows if keep(row)]
+                elif column not in _RESERVED and rows:
+                    keep = _filter(column, expression, rows[0])
+                    rows = [row for row in rows if keep(row)]
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, status_code=400)
+
+        for term in reversed([t for t in params.get("order", "").split(",") if t]):
+            column, *modifiers = term.split(".")
+            rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)),
+                          reverse="desc" in modifiers)
+
+        offset = int(params.get("offset", 0))
+        limit: Optional[int] = int(params["limit"]) if "limit" in params else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+
+        select = params.get("select", "*")
+        if select != "*":
+            columns = [c.strip() for c in select.split(",")]
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return JSONResponse(rows)
+
+
+def create_app(tables: Dict[str, List[Dict[str, Any]]], latency: float = 0.0) -> Starlette:
+    fake = FakePostgrest(tables, latency)
+    return Starlette(routes=[Route("/rest/v1/{table}", fake.query, methods=["GET"])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Supabase/PostgREST server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--recipes", type=int, default=20000, help="Synthetic recipe rows to serve")
+    parser.add_argument("--recipes-file", default="", help="JSON list of recipe rows instead of synthetic ones")
+    parser.add_argument("--latency", type=float, default=0.02, help="Added latency per query (s)")
+    args = parser.parse_args()
+
+    if args.recipes_file:
+        with open(args.recipes_file, "r", encoding="utf-8") as f:
+            recipes = json.load(f)
+    else:
+        recipes = generate_recipes(args.recipes)
+
+    import uvicorn
+    uvicorn.run(create_app({"recipes": recipes}, args.latency), host=args.host, port=args.port,
+                log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
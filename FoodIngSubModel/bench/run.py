@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner for Recipe Suggestion System
+
+Starts the fake OpenAI and PostgREST servers and backend_api:app on free local ports,
+replays the n8n request mix at a fixed concurrency, and reports RPS and latency
+percentiles per route. Results can be saved as a JSON baseline and diffed later.
+
+    cd FoodIngSubModel
+    python -m bench.run --concurrency 16 --duration 30 --save bench/results/main.json
+    python -m bench.run --concurrency 16 --duration 30 --compare bench/results/main.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.workload import DEFAULT_MIX, Workload, generate_recipes, parse_mix
+from services.llm_usage import percentile
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def _process(args: List[str], env: Dict[str, str], ready_url: str):
+    proc = subprocess.Popen([sys.executable, *args], cwd=PROJECT_DIR, env=env)
+    try:
+        _wait_ready(ready_url)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+@contextmanager
+def stack(args):
+    """Fake upstreams plus the backend; yields the backend and fake OpenAI base URLs."""
+    openai_port, postgrest_port, backend_port = _free_port(), _free_port(), _free_port()
+    base_env = {**os.environ, "PYTHONPATH": PROJECT_DIR}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recipes_path = os.path.join(tmp, "recipes.json")
+        with open(recipes_path, "w", encoding="utf-8") as f:
+            json.dump(generate_recipes(args.recipes), f)
+
+        backend_env = {
+            **base_env,
+            "OPENAI_API_KEY": "bench-key",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            # supabase-py only accepts JWT-shaped keys
+            "VITE_SUPABASE_URL": f"http://127.0.0.1:{postgrest_port}",
+            "VITE_SUPABASE_ANON_KEY": "bench.bench.bench",
+            "LLM_CACHE_PATH": "",
+            "RECIPE_DETAILS_PATH": "",
+            "RECIPE_SNAPSHOT_PATH": recipes_path if args.recipe_source == "snapshot" else "",
+        }
+        if args.no_cache:
+            backend_env.update({"LLM_CACHE_ENABLED": "false", "SUGGEST_CACHE_ENABLED": "false"})
+        for assignment in args.env:
+            key, _, value = assignment.partition("=")
+            backend_env[key] = value
+
+        openai_url = f"http://127.0.0.1:{openai_port}"
+        with _process(["-m", "bench.fake_openai", "--port", str(openai_port),
+                       "--latency", str(args.openai_latency), "--jitter", str(args.openai_jitter),
+                       "--tokens-per-second", str(args.tokens_per_second),
+                       "--error-rate", str(args.openai_error_rate)],
+                      base_env, f"{openai_url}/stats"), \
+             _process(["-m", "bench.fake_postgrest", "--port", str(postgrest_port),
+                       "--recipes-file", recipes_path, "--latency", str(args.postgrest_latency)],
+                      base_env, f"http://127.0.0.1:{postgrest_port}/rest/v1/recipes?limit=1"), \
+             _process(["-m", "uvicorn", "backend_api:app", "--port", str(backend_port),
+                       "--log-level", "warning", "--workers", str(args.workers)],
+                      backend_env, f"http://127.0.0.1:{backend_port}/ready"):
+            yield f"http://127.0.0.1:{backend_port}", openai_url
+
+
+async def _drive(base_url: str, workload: Workload, concurrency: int, duration: float,
+                 requests: int, warmup: float, timeout: float) -> Tuple[List[Tuple[str, float, bool]], float]:
+    """Closed-loop load: ``concurrency`` workers each send the next request as soon as
+    the previous one completes. Returns (route, latency, ok) samples and elapsed time."""
+    samples: List[Tuple[str, float, bool]] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        stop_at = measure_from + duration if duration else None
+        issued = 0
+
+        async def worker():
+            nonlocal issued
+            while True:
+                now = time.perf_counter()
+                if stop_at is not None and now >= stop_at:
+                    return
+                if requests and issued >= requests:
+                    return
+                issued += now >= measure_from
+                route, payload = workload.next()
+                sent = time.perf_counter()
+                try:
+                    response = await client.post(route, json=payload)
+                    ok = response.status_code < 400 and "error" not in response.json()
+                except (httpx.HTTPError, ValueError):
+                    ok = False
+                if sent >= measure_from:
+                    samples.append((route, time.perf_counter() - sent, ok))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - max(started, measure_from)
+    return samples, elapsed
+
+
+def summarize(samples: List[Tuple[str, float, bool]], elapsed: float) -> Dict[str, Any]:
+    by_route: Dict[str, List[Tuple[float, bool]]] = defaultdict(list)
+    for route, latency, ok in samples:
+        by_route[route].append((latency, ok))
+
+    def stats(entries: List[Tuple[float, bool]]) -> Dict[str, float]:
+        latencies = [latency for latency, _ in entries]
+        errors = sum(1 for _, ok in entries if not ok)
+        return {
+            "requests": len(entries),
+            "errors": errors,
+            "error_rate": round(errors / len(entries), 4) if entries else 0.0,
+            "rps": round(len(entries) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            **{f"p{q}_ms": round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)},
+        }
+
+    return {
+        "routes": {route: stats(entries) for route, entries in sorted(by_route.items())},
+        "total": stats([(latency, ok) for _, latency, ok in samples]),
+    }
+
+
+def print_report(result: Dict[str, Any]):
+    header = f"{'route':<20} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, s in rows:
+        print(f"{route:<20} {s['requests']:>7} {s['error_rate'] * 100:>6.1f} {s['rps']:>8.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-route deltas against ``baseline``; returns the regressions found.
+
+    Latency percentiles regress when they grow by more than ``threshold`` (a fraction),
+    throughput when it drops by more than that, errors when the error rate rises.
+    """
+    regressions = []
+    print(f"\n{'route':<20} {'metric':<11} {'baseline':>10} {'current':>10} {'change':>8}")
+    routes = dict(current["routes"], TOTAL=current["total"])
+    base_routes = dict(baseline["routes"], TOTAL=baseline["total"])
+    for route, now in routes.items():
+        before = base_routes.get(route)
+        if before is None:
+            print(f"{route:<20} (not in baseline)")
+            continue
+        for metric, higher_is_worse in (("rps", False), ("p50_ms", True), ("p95_ms", True),
+                                        ("p99_ms", True), ("error_rate", True)):
+            old, new = before.get(metric, 0.0), now.get(metric, 0.0)
+            change = (new - old) / old if old else 0.0
+            worse = (new > old) if higher_is_worse else (new < old)
+            regressed = worse and (abs(change) > threshold if metric != "error_rate" else new > old)
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{route:<20} {metric:<11} {old:>10.2f} {new:>10.2f} {change * 100:>7.1f}%{flag}")
+            if regressed:
+                regressions.append(f"{route} {metric}: {old} -> {new}")
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend_api against fake upstreams")
+    parser.add_argument("--backend-url", default="", help="Benchmark a running backend instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds (0: use --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many measured requests")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request client timeout (s)")
+    parser.add_argument("--mix", default="", help='Route weights, e.g. "substitute=5,lookup=2"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--openai-latency", type=float, default=0.4)
+    parser.add_argument("--openai-jitter", type=float, default=0.1)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--postgrest-latency", type=float, default=0.02)
+    parser.add_argument("--recipes", type=int, default=20000, help="Synthetic recipe rows")
+    parser.add_argument("--recipe-source", choices=("postgrest", "snapshot"), default="postgrest",
+                        help="Load the recipe index from the fake PostgREST or the same rows as a local snapshot")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the LLM and /suggest caches")
+    parser.add_argument("--env", action="append", default=[], help="Extra backend setting KEY=VALUE (repeatable)")
+    parser.add_argument("--save", default="", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", default="", help="Diff results against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold as a fraction")
+    args = parser.parse_args()
+
+    if args.duration <= 0 and args.requests <= 0:
+        parser.error("one of --duration or --requests must be positive")
+    workload = Workload(parse_mix(args.mix) if args.mix else DEFAULT_MIX, seed=args.seed)
+
+    def run(base_url: str, openai_url: Optional[str]):
+        samples, elapsed = asyncio.run(_drive(base_url, workload, args.concurrency, args.duration,
+                                              args.requests, args.warmup, args.timeout))
+        result = summarize(samples, elapsed)
+        upstream = {}
+        try:
+            upstream["llm_usage"] = httpx.get(f"{base_url}/llm/usage", timeout=5).json()
+            if openai_url:
+                upstream["fake_openai"] = httpx.get(f"{openai_url}/stats", timeout=5).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+        return result, elapsed, upstream
+
+    if args.backend_url:
+        result, elapsed, upstream = run(args.backend_url.rstrip("/"), None)
+    else:
+        with stack(args) as (base_url, openai_url):
+            result, elapsed, upstream = run(base_url, openai_url)
+
+    result["meta"] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "elapsed_s": round(elapsed, 2),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+        "mix": workload.weights(),
+    }
+    result["upstream"] = upstream
+    print_report(result)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
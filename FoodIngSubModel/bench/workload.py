@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark Workload for Recipe Suggestion System
+
+The request mix the n8n workflows send to the backend (one HTTP node per route),
+with payload generators shaped like the workflows' entity extraction output.
+"""
+
+import random
+from typing import Any, Callable, Dict, List, Tuple
+
+
+INGREDIENTS = [
+    "egg", "rice", "chicken", "pork", "beef", "shrimp", "tofu", "garlic", "onion", "shallot",
+    "tomato", "potato", "carrot", "cabbage", "basil", "lemongrass", "galangal", "chili",
+    "lime", "coconut milk", "fish sauce", "soy sauce", "oyster sauce", "sugar", "salt",
+    "butter", "milk", "flour", "cheese", "mushroom", "spinach", "cucumber", "peanut",
+    "noodle", "ginger", "cilantro", "bell pepper", "honey", "pineapple", "squid",
+]
+
+RECIPES = [
+    "Pad Thai", "Tom Yum Goong", "Green Curry", "Fried Rice", "Som Tam", "Massaman Curry",
+    "Pad Kra Pao", "Khao Man Gai", "Tom Kha Gai", "Omelette", "Spaghetti Carbonara",
+    "Chicken Soup", "Beef Stew", "Pancakes", "Mango Sticky Rice", "Larb", "Pad See Ew",
+]
+
+DESCRIPTIONS = [
+    "something spicy and crunchy", "sweet and soft", "อยากได้อะไรเผ็ดๆ กรอบๆ", "sour fried",
+    "creamy white", "นุ่ม หวาน", "grilled and smoky", "not too sweet, chewy", "red and sour",
+    "something my kids would like for breakfast", "ทอด สีทอง", "fresh green crunchy",
+]
+
+TASTES = ["sweet", "sour", "salty", "spicy", "bitter", "umami", ""]
+TEXTURES = ["crispy", "soft", "chewy", "creamy", "crunchy", ""]
+COLORS = ["red", "green", "white", "yellow", "brown", ""]
+METHODS = ["fried", "boiled", "grilled", "steamed", "raw", ""]
+
+
+def _sample(rng: random.Random, pool: List[str], low: int, high: int) -> List[str]:
+    return rng.sample(pool, rng.randint(low, high))
+
+
+def _substitute(rng):
+    return {"ingredient": rng.choice(INGREDIENTS), "recipe": rng.choice(RECIPES)}
+
+
+def _lookup(rng):
+    return {"recipe": rng.choice(RECIPES)}
+
+
+def _context(rng):
+    return {"taste": rng.choice(TASTES), "texture": rng.choice(TEXTURES),
+            "color": rng.choice(COLORS), "cooking_method": rng.choice(METHODS)}
+
+
+def _context_natural(rng):
+    return {"description": rng.choice(DESCRIPTIONS)}
+
+
+def _suggest(rng):
+    return {"ingredients": _sample(rng, INGREDIENTS, 2, 5)}
+
+
+def _suggest_specific(rng):
+    return {"required_ingredients": _sample(rng, INGREDIENTS, 1, 3), "context": rng.choice(["", "dinner", "quick lunch"])}
+
+
+def _rewrite(rng):
+    old, new = rng.sample(INGREDIENTS, 2)
+    return {"recipe": rng.choice(RECIPES), "old_ingredient": old, "new_ingredient": new}
+
+
+def _recipe_custom(rng):
+    return {"recipe": rng.choice(RECIPES), "substitutes": _sample(rng, INGREDIENTS, 1, 2)}
+
+
+def _similar(rng):
+    return {"recipe": rng.choice(RECIPES)}
+
+
+# route -> (relative weight, payload generator); weights approximate how often the
+# workflow's intent router reaches each HTTP node
+DEFAULT_MIX: Dict[str, Tuple[float, Callable[[random.Random], Dict[str, Any]]]] = {
+    "/substitute": (25, _substitute),
+    "/lookup": (15, _lookup),
+    "/context_natural": (15, _context_natural),
+    "/suggest": (10, _suggest),
+    "/rewrite": (10, _rewrite),
+    "/similar": (8, _similar),
+    "/context": (7, _context),
+    "/suggest_specific": (5, _suggest_specific),
+    "/recipe_custom": (5, _recipe_custom),
+}
+
+
+class Workload:
+    """Seeded stream of (route, payload) pairs drawn from a weighted route mix."""
+
+    def __init__(self, mix: Dict[str, Tuple[float, Callable]] = None, seed: int = 0):
+        self.mix = mix or DEFAULT_MIX
+        self._rng = random.Random(seed)
+        self._routes = list(self.mix)
+        self._weights = [self.mix[route][0] for route in self._routes]
+
+    def next(self) -> Tuple[str, Dict[str, Any]]:
+        route = self._rng.choices(self._routes, self._weights)[0]
+        return route, self.mix[route][1](self._rng)
+
+    def weights(self) -> Dict[str, float]:
+        return dict(zip(self._routes, self._weights))
+
+
+def parse_mix(spec: str) -> Dict[str, Tuple[float, Callable]]:
+    """Override weights with "route=weight,..." (routes left out are dropped)."""
+    mix = {}
+    for part in spec.split(","):
+        route, _, weight = part.strip().partition("=")
+        route = route if route.startswith("/") else "/" + route
+        if route not in DEFAULT_MIX:
+            raise ValueError(f"Unknown route in mix: {route}")
+        mix[route] = (float(weight or 1), DEFAULT_MIX[route][1])
+    return mix
+
+
+def generate_recipes(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic rows for the recipes table, built from the workload's ingredients."""
+    rng = random.Random(seed)
+    units = ["1 cup", "2 tbsp", "1 tsp", "200 g", "3", "1/2 cup", "1 pinch"]
+    rows = []
+    for i in range(1, count + 1):
+        base = rng.choice(RECIPES)
+        ingredients = [f"{rng.choice(units)} {name}" for name in _sample(rng, INGREDIENTS, 4, 10)]
+        rows.append({
+            "id": i,
+            "recipe_name": f"{base} #{i}",
+            "ingredients": ingredients,
+            "img_src": f"https://example.invalid/recipes/{i}.jpg",
+            "updated_at": f"2025-01-01T00:00:{i % 60:02d}",
+        })
+    return rows
@@ -6,7 +6,8 @@ Centralized configuration handling for the ingredient substitution and recipe su
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -29,6 +30,144 @@ class Config:
     top_p: float = 0.9
     repetition_penalty: float = 1.1
     
+    # Dataset context scoring: per-attribute weights and batch size cap
+    context_weights: Dict[str, float] = field(default_factory=lambda: {
+        "taste": 1.0,
+        "texture": 1.0,
+        "color": 1.0,
+        "cooking_method": 1.0,
+    })
+    max_context_batch: int = int(os.getenv("MAX_CONTEXT_BATCH", "500"))
+    # GPT top-ups in flight per /context/batch request
+    context_batch_concurrency: int = int(os.getenv("CONTEXT_BATCH_CONCURRENCY", "8"))
+    
+    # Dataset substitute engine
+    substitute_neighbors: int = int(os.getenv("SUBSTITUTE_NEIGHBORS", "10"))
+    substitute_min_similarity: float = float(os.getenv("SUBSTITUTE_MIN_SIMILARITY", "0.3"))
+    substitute_dataset_first: bool = os.getenv("SUBSTITUTE_DATASET_FIRST", "false").lower() == "true"
+    # Substitute tiers: overall deadline, and delay before hedging with the context
+    # tier when the dataset has no answer (0 runs both LLM tiers concurrently)
+    substitute_deadline: float = float(os.getenv("SUBSTITUTE_DEADLINE", "10"))
+    substitute_hedge_delay: float = float(os.getenv("SUBSTITUTE_HEDGE_DELAY", "2"))
+    # /substitute/batch: pairs packed per completion, and the request size cap
+    substitute_batch_size: int = int(os.getenv("SUBSTITUTE_BATCH_SIZE", "10"))
+    max_substitute_batch: int = int(os.getenv("MAX_SUBSTITUTE_BATCH", "50"))
+    
+    # Local natural-language context parser: below this confidence, ask the LLM
+    context_parser_min_confidence: float = float(os.getenv("CONTEXT_PARSER_MIN_CONFIDENCE", "0.6"))
+    
+    # Name resolution: minimum fuzzy similarity to accept a typo'd name
+    resolve_min_score: float = float(os.getenv("RESOLVE_MIN_SCORE", "0.8"))
+    # ...and to answer for the matched ingredient instead of the typed one ("oat milk" is a
+    # 0.94 fuzzy match for "Goat Milk"); exact name and alias matches always qualify
+    resolve_canonical_min_score: float = float(os.getenv("RESOLVE_CANONICAL_MIN_SCORE", "0.97"))
+    # Most /resolve suggestions per request; each autocomplete trie node keeps this many names
+    resolve_suggest_limit: int = int(os.getenv("RESOLVE_SUGGEST_LIMIT", "25"))
+    
+    # LLM response cache (set LLM_CACHE_PATH="" to keep it in memory only)
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    llm_cache_memory_entries: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "2048"))
+    llm_cache_disk_entries: int = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+    llm_cache_default_ttl: int = int(os.getenv("LLM_CACHE_DEFAULT_TTL", "86400"))
+    # Per-method TTLs in seconds; 0 disables caching for that method
+    llm_cache_ttls: Dict[str, int] = field(default_factory=lambda: {
+        "get_recipe_details": 7 * 86400,
+        "parse_natural_language_context": 7 * 86400,
+        "get_substitute_ingredients": 86400,
+        "get_substitute_ingredients_with_reasons": 86400,
+        "get_substitute_ingredients_batch": 86400,
+        "get_context_based_ingredients": 86400,
+        "get_recipe_suggestions": 86400,
+        "get_similar_recipes": 86400,
+        "get_recipes_with_specific_ingredients": 86400,
+        "get_recipe_with_ingredients": 86400,
+        "get_updated_recipe_with_substitution": 86400,
+        "get_rewritten_recipe": 86400,
+    })
+    
+    # LLM usage accounting; adaptive mode lowers each method's max_tokens to the observed
+    # p99 completion length times the headroom (retrying truncations at the full budget)
+    llm_usage_window: int = int(os.getenv("LLM_USAGE_WINDOW", "500"))
+    adaptive_max_tokens: bool = os.getenv("ADAPTIVE_MAX_TOKENS", "false").lower() == "true"
+    adaptive_max_tokens_min_samples: int = int(os.getenv("ADAPTIVE_MAX_TOKENS_MIN_SAMPLES", "50"))
+    adaptive_max_tokens_headroom: float = float(os.getenv("ADAPTIVE_MAX_TOKENS_HEADROOM", "1.25"))
+    adaptive_max_tokens_floor: int = int(os.getenv("ADAPTIVE_MAX_TOKENS_FLOOR", "32"))
+    
+    # Shared upstream HTTP clients: keep-alive pool and per-upstream timeouts (seconds)
+    http_pool_size: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    http_keepalive_connections: int = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", "20"))
+    http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    # OpenAI-compatible endpoint override (bench/fake_openai.py, proxies); empty uses the default
+    openai_base_url: str = os.getenv("OPENAI_BASE_URL", "")
+    # Send each template's id as prompt_cache_key (disable for endpoints that reject it)
+    openai_prompt_cache_key: bool = os.getenv("OPENAI_PROMPT_CACHE_KEY", "true").lower() == "true"
+    openai_timeout: float = float(os.getenv("OPENAI_TIMEOUT", "30"))
+    openai_connect_timeout: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+    openai_max_retries: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    supabase_timeout: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    
+    # In-process recipe index over the Supabase recipes table (or a local JSON
+    # stand-in at RECIPE_SNAPSHOT_PATH); refreshed by id, or updated_at to see edits
+    recipe_index_enabled: bool = os.getenv("RECIPE_INDEX_ENABLED", "true").lower() == "true"
+    recipe_index_refresh_column: str = os.getenv("RECIPE_INDEX_REFRESH_COLUMN", "id")
+    recipe_index_refresh_interval: float = float(os.getenv("RECIPE_INDEX_REFRESH_INTERVAL", "300"))
+    recipe_index_full_reload_interval: float = float(os.getenv("RECIPE_INDEX_FULL_RELOAD_INTERVAL", "86400"))
+    recipe_index_batch_size: int = int(os.getenv("RECIPE_INDEX_BATCH_SIZE", "1000"))
+    # After a failed load, /suggest queries Supabase directly and the load is retried no
+    # sooner than this, doubling per consecutive failure up to the max
+    recipe_index_retry_interval: float = float(os.getenv("RECIPE_INDEX_RETRY_INTERVAL", "30"))
+    recipe_index_retry_max_interval: float = float(os.getenv("RECIPE_INDEX_RETRY_MAX_INTERVAL", "600"))
+    recipe_snapshot_path: str = os.getenv("RECIPE_SNAPSHOT_PATH", "")
+    # /ready reports the recipe index either way; gate on it only when set, since /suggest
+    # is served from Supabase and GPT while the index loads
+    ready_requires_recipe_index: bool = os.getenv("READY_REQUIRES_RECIPE_INDEX", "false").lower() == "true"
+    
+    # /suggest result cache keyed on the canonical ingredient set; a cached GPT result for
+    # a subset is reused when it covers at least this share of the query's ingredients
+    suggest_cache_enabled: bool = os.getenv("SUGGEST_CACHE_ENABLED", "true").lower() == "true"
+    suggest_cache_entries: int = int(os.getenv("SUGGEST_CACHE_ENTRIES", "1024"))
+    suggest_cache_ttl: float = float(os.getenv("SUGGEST_CACHE_TTL", "600"))
+    suggest_cache_subset_min_ratio: float = float(os.getenv("SUGGEST_CACHE_SUBSET_MIN_RATIO", "0.75"))
+    
+    # Conversation state behind the optional session_id of /lookup, /rewrite, /similar and
+    # /recipe_custom: sessions idle longer than the TTL are dropped, least recent first past
+    # the entry bound (0 disables); each keeps at most this many recent substitutions
+    session_ttl: float = float(os.getenv("SESSION_TTL", "1800"))
+    session_max_entries: int = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+    session_max_substitutions: int = int(os.getenv("SESSION_MAX_SUBSTITUTIONS", "10"))
+    
+    # /suggest_specific: ask for more candidates than needed, check the required ingredients
+    # against dataset names and aliases, and top up once when still short. The factor starts
+    # at the initial value and follows the observed valid share per request shape (times
+    # the headroom), smoothed by alpha and capped by the max factor and max candidates
+    specific_adaptive: bool = os.getenv("SPECIFIC_ADAPTIVE", "true").lower() == "true"
+    specific_initial_factor: float = float(os.getenv("SPECIFIC_INITIAL_FACTOR", "1.6"))
+    specific_max_factor: float = float(os.getenv("SPECIFIC_MAX_FACTOR", "3.0"))
+    specific_factor_headroom: float = float(os.getenv("SPECIFIC_FACTOR_HEADROOM", "1.2"))
+    specific_yield_alpha: float = float(os.getenv("SPECIFIC_YIELD_ALPHA", "0.2"))
+    specific_max_candidates: int = int(os.getenv("SPECIFIC_MAX_CANDIDATES", "15"))
+    
     # Paths (relative to project root)
     base_dir: str = os.path.dirname(os.path.abspath(__file__))
     dataset_path: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset", "ingredients.json")
+    # Binary snapshot of the dataset and substitute neighbor table (python -m services.dataset_snapshot);
+    # used when it matches dataset_path, and rewritten after a JSON load when autobuild is on
+    dataset_snapshot_path: str = os.getenv(
+        "DATASET_SNAPSHOT_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset", "ingredients.snapshot"),
+    )
+    dataset_snapshot_autobuild: bool = os.getenv("DATASET_SNAPSHOT_AUTOBUILD", "true").lower() == "true"
+    # Seconds between checks of dataset_path for changes to hot-reload (0 disables)
+    dataset_reload_interval: float = float(os.getenv("DATASET_RELOAD_INTERVAL", "5"))
+    # Materialized /lookup details for catalog recipes (python -m services.recipe_details_store);
+    # consulted before the LLM, empty disables
+    recipe_details_path: str = os.getenv(
+        "RECIPE_DETAILS_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "recipe_details.sqlite3"),
+    )
+    recipe_details_concurrency: int = int(os.getenv("RECIPE_DETAILS_CONCURRENCY", "8"))
+    llm_cache_path: str = os.getenv(
+        "LLM_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "llm_cache.sqlite3"),
+    )
@@ -5,8 +5,8 @@ Data Models for Recipe Suggestion System
 Contains all data classes and model definitions used throughout the system.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -18,6 +18,14 @@ class IngredientEntry:
     textures: List[str]
     colors: List[str]
     cook_methods: List[str]
+    nutrients: List[str] = field(default_factory=list)
+    minerals: List[str] = field(default_factory=list)
+    vitamins: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    benefits: List[str] = field(default_factory=list)
+    shapes: List[str] = field(default_factory=list)
+    sugars: List[str] = field(default_factory=list)
+    category: str = ""
 
 
 @dataclass
@@ -35,3 +43,20 @@ class SuggestionResult:
     items: List[str]
     source: str  # "dataset", "gpt", "dataset+gpt", "none"
     reasoning: Optional[List[str]] = None
+
+
+@dataclass
+class NameMatch:
+    """A name resolved against the dataset."""
+    value: Any  # resolved target, e.g. an IngredientEntry or a canonical attribute value
+    matched: str  # the name or alias that matched
+    score: float
+    match_type: str  # "exact", "prefix", "fuzzy", "partial" (leading words of a longer name)
+
+
+@dataclass
+class ParsedContext:
+    """Context attributes extracted locally from a natural language description."""
+    context: Dict[str, Optional[str]]  # taste, texture, color, cooking_method
+    confidence: float  # share of content words the parser explained
+    matched: List[str]  # phrases that produced an attribute
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Async OpenAI Service for Recipe Suggestion System
+
+AsyncOpenAI transport for the FastAPI request path: sends the calls OpenAIService
+builds, with response caching, request coalescing and streaming. Prompts and parsers
+are inherited.
+"""
+
+import time
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from models import SuggestionResult, RecipeSuggestion
+from services import metrics
+from services.clients import get_client_registry
+from services.openai_service import OpenAIService, LLMCall, EMPTY_CONTEXT
+from services.single_flight import AsyncSingleFlight
+from services.stream_parser import SectionStreamParser
+from utils import logger
+
+
+# Identical in-flight requests are coalesced across every AsyncOpenAIService in the process
+_in_flight = AsyncSingleFlight()
+
+
+class AsyncOpenAIService(OpenAIService):
+    """Handles OpenAI API interactions without blocking the event loop."""
+
+    def _initialize_client(self):
+        """Use the process-wide pooled AsyncOpenAI client."""
+        self._client = get_client_registry(self.config).async_openai()
+
+    async def _make_request(self, system_message: str, user_message: str,
+                            max_tokens: int = 200, method: str = "default",
+                            cache: bool = True) -> Optional[str]:
+        """Make a standardized OpenAI API request (async; cached and coalesced)."""
+        if not self.is_available or user_message is None:
+            return None
+
+        key = self._request_key(system_message, user_message, max_tokens)
+        use_cache = cache and self._cache is not None
+        if use_cache:
+            cached = await self._cache.aget(key, method)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> str:
+            budget = self._usage.budget(method, max_tokens)
+            response = await self._complete(system_message, user_message, budget, method)
+            if self._should_retry(response, budget, max_tokens):
+                response = await self._complete(system_message, user_message, max_tokens, method, retry=True)
+            content = response.choices[0].message.content.strip()
+            if use_cache and self._cacheable(response.choices[0].finish_reason):
+                await self._cache.aset(key, content, method)
+            return content
+
+        try:
+            if not cache:
+                return await fetch()
+            return await _in_flight.do(key, fetch)
+        except Exception as e:
+            logger.error(f"OpenAI API request failed: {e}")
+            return None
+
+    async def _complete(self, system_message: str, user_message: str, max_tokens: int,
+                        method: str, retry: bool = False):
+        """One chat completion, accounted in the usage tracker."""
+        started = time.perf_counter()
+        try:
+            with metrics.LLM_IN_FLIGHT.track(method):
+                response = await self._client.chat.completions.create(
+                    **self._completion_args(system_message, user_message, max_tokens, method)
+                )
+        except Exception:
+            self._usage.record_error(method, time.perf_counter() - started)
+            raise
+        self._record_usage(method, started, response, max_tokens, retry)
+        return response
+
+    async def _run(self, call: LLMCall):
+        """Send a prepared call and parse its response."""
+        response_text = await self._make_request(call.system, call.user, max_tokens=call.max_tokens,
+                                                 method=call.method, cache=call.cache)
+        return call.parse(response_text)
+
+    async def _cached(self, call: LLMCall) -> Any:
+        """Parsed result of a call if its response is already cached, else None (disk read off the loop)."""
+        if not call.cache or self._cache is None or call.user is None:
+            return None
+        response_text = await self._cache.apeek(self._request_key(call.system, call.user, call.max_tokens))
+        return call.parse(response_text) if response_text else None
+
+    async def get_cached_recipe_details(self, recipe_name: str) -> Optional[Dict[str, str]]:
+        """Recipe details from the catalog store or a recent lookup, without calling the API."""
+        return (await self._stored_recipe_details(recipe_name)
+                or await self._cached(self._recipe_details_call(recipe_name)))
+
+    async def _stored_recipe_details(self, recipe_name: str) -> Optional[Dict[str, str]]:
+        """Materialized details for a catalog recipe, read in a worker thread."""
+        if self._details is None:
+            return None
+        return await asyncio.to_thread(self._details.get, recipe_name)
+
+    async def _stream_text(self, call: LLMCall) -> AsyncIterator[str]:
+        """Yield completion text as it arrives (``stream=True``).
+
+        A cached response is replayed as one chunk; a completed stream is cached
+        under the same key as the non-streaming request, so both paths share entries.
+        """
+        key = self._request_key(call.system, call.user, call.max_tokens)
+        use_cache = call.cache and self._cache is not None
+        if use_cache:
+            cached = await self._cache.aget(key, call.method)
+            if cached is not None:
+                yield cached
+                return
+
+        started = time.perf_counter()
+        parts: List[str] = []
+        usage = finish_reason = None
+        with metrics.LLM_IN_FLIGHT.track(call.method):
+            try:
+                stream = await self._client.chat.completions.create(
+                    stream=True, stream_options={"include_usage": True},
+                    **self._completion_args(call.system, call.user, call.max_tokens, call.method)
+                )
+            except Exception:
+                self._usage.record_error(call.method, time.perf_counter() - started)
+                raise
+            try:
+                async for chunk in stream:
+                    # With include_usage the last chunk carries usage and no choices
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                self._usage.record_error(call.method, time.perf_counter() - started)
+                raise
+            finally:
+                # Also on client disconnect (GeneratorExit): release the pooled connection
+                await stream.close()
+        self._usage.record(call.method, time.perf_counter() - started, usage, finish_reason, call.max_tokens)
+        if use_cache and self._cacheable(finish_reason):
+            await self._cache.aset(key, "".join(parts).strip(), call.method)
+
+    async def _stream_sections(self, call: LLMCall) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a sectioned recipe completion as (event, data) pairs.
+
+        Emits ``ingredients`` once the separator arrives, ``cooking_method`` deltas
+        after it, and finally ``done`` with the same dict the non-streaming parser returns.
+        """
+        if not self.is_available or call.user is None:
+            yield "done", None
+            return
+
+        parser = SectionStreamParser()
+        parts: List[str] = []
+        try:
+            # aclosing: a disconnected client closes the upstream stream now, not at garbage collection
+            async with aclosing(self._stream_text(call)) as deltas:
+                async for delta in deltas:
+                    parts.append(delta)
+                    for event in parser.feed(delta):
+                        yield event
+        except Exception as e:
+            logger.error(f"OpenAI streaming request failed: {e}")
+            yield "error", str(e)
+            return
+
+        for event in parser.finish():
+            yield event
+        yield "done", call.parse("".join(parts).strip() or None)
+
+    async def stream_recipe_details(self, recipe_name: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_recipe_details."""
+        stored = await self._stored_recipe_details(recipe_name)
+        events = self.replay_sections(stored) if stored else self._stream_sections(self._recipe_details_call(recipe_name))
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+    @staticmethod
+    async def replay_sections(details: Dict[str, str]) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream already known details as the events _stream_sections would emit."""
+        yield "ingredients", details["ingredients"]
+        yield "cooking_method", details["cooking_method"]
+        yield "done", details
+
+    def stream_updated_recipe_with_substitution(self, recipe_name: str, original_ingredients: str,
+                                                original_ingredient: str,
+                                                substitute_ingredient: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_updated_recipe_with_substitution."""
+        return self._stream_sections(self._updated_recipe_call(recipe_name, original_ingredients,
+                                                               original_ingredient, substitute_ingredient))
+
+    def stream_rewritten_recipe(self, recipe_name: str, original_ingredient: str,
+                                substitute_ingredient: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_rewritten_recipe."""
+        return self._stream_sections(self._rewritten_recipe_call(recipe_name, original_ingredient,
+                                                                 substitute_ingredient))
+
+    def cache_stats(self) -> Dict:
+        """Cache counters plus request coalescing."""
+        stats = super().cache_stats()
+        stats["single_flight"] = _in_flight.stats()
+        return stats
+
+    async def get_substitute_ingredients(self, ingredient: str, recipe: str,
+                                         max_results: int, include_reasoning: bool = False) -> SuggestionResult:
+        """Get ingredient substitutes from OpenAI."""
+        return await self._run(self._substitute_ingredients_call(ingredient, recipe, max_results, include_reasoning))
+
+    async def get_substitute_ingredients_batch(self, pairs: List[Tuple[str, str]],
+                                               max_results: int) -> List[Optional[SuggestionResult]]:
+        """Substitutes for several (ingredient, recipe) pairs in one completion."""
+        return await self._run(self._substitute_batch_call(pairs, max_results))
+
+    async def get_recipe_suggestions(self, ingredients: List[str],
+                                     max_results: int) -> List[RecipeSuggestion]:
+        """Get recipe suggestions based on ingredients."""
+        return await self._run(self._recipe_suggestions_call(ingredients, max_results))
+
+    async def get_similar_recipes(self, original_recipe: str, max_results: int = 4) -> List[RecipeSuggestion]:
+        """Get recipes similar to the original recipe."""
+        return await self._run(self._similar_recipes_call(original_recipe, max_results))
+
+    async def get_recipes_with_specific_ingredients(self, required_ingredients: List[str],
+                                                    recipe_context: str = "", max_results: int = 5) -> List[RecipeSuggestion]:
+        """Get recipe suggestions that MUST include the specified ingredients."""
+        return await self._run(self._specific_ingredients_call(required_ingredients, recipe_context, max_results))
+
+    async def get_specific_ingredient_candidates(self, required_ingredients: List[str], recipe_context: str = "",
+                                                 max_results: int = 5,
+                                                 exclude: Sequence[str] = ()) -> List[RecipeSuggestion]:
+        """Recipes asked to include the specified ingredients, not checked for them."""
+        return await self._run(self._specific_ingredients_call(required_ingredients, recipe_context, max_results,
+                                                               validate=False, exclude=exclude))
+
+    async def get_recipe_with_ingredients(self, recipe_name: str,
+                                          substitute_ingredients: List[str]) -> Optional[RecipeSuggestion]:
+        """Get the original recipe with detailed ingredients, incorporating substitutes."""
+        return await self._run(self._recipe_with_ingredients_call(recipe_name, substitute_ingredients))
+
+    async def get_recipe_details(self, recipe_name: str) -> Optional[Dict[str, str]]:
+        """Get detailed recipe information including ingredients and cooking method.
+
+        Catalog recipes are served from the materialized details store.
+        """
+        stored = await self._stored_recipe_details(recipe_name)
+        if stored:
+            return stored
+        return await self._run(self._recipe_details_call(recipe_name))
+
+    async def get_catalog_recipe_details(self, recipe_name: str, ingredients: Any) -> Optional[Dict[str, str]]:
+        """Details for a catalog recipe, keeping to the catalog's ingredient list."""
+        return await self._run(self._catalog_recipe_details_call(recipe_name, ingredients))
+
+    async def get_updated_recipe_with_substitution(self, recipe_name: str, original_ingredients: str,
+                                                   original_ingredient: str, substitute_ingredient: str) -> Optional[Dict[str, str]]:
+        """Get updated recipe with substituted ingredient and modified cooking method."""
+        return await self._run(self._updated_recipe_call(recipe_name, original_ingredients,
+                                                         original_ingredient, substitute_ingredient))
+
+    async def get_rewritten_recipe(self, recipe_name: str, original_ingredient: str,
+                                   substitute_ingredient: str) -> Optional[Dict[str, str]]:
+        """Recall a recipe and substitute one ingredient in a single completion."""
+        return await self._run(self._rewritten_recipe_call(recipe_name, original_ingredient, substitute_ingredient))
+
+    async def get_context_based_ingredients(self, taste: Optional[str] = None,
+                                            texture: Optional[str] = None,
+                                            color: Optional[str] = None,
+                                            cooking_method: Optional[str] = None,
+                                            recipe_title: Optional[str] = None,
+                                            max_results: int = 10) -> SuggestionResult:
+        """Get ingredients based on context attributes."""
+        return await self._run(self._context_ingredients_call(taste, texture, color, cooking_method,
+                                                              recipe_title, max_results))
+
+    async def parse_natural_language_context(self, description: str) -> Dict[str, Optional[str]]:
+        """Parse natural language description into context categories."""
+        if not description or not description.strip():
+            return dict(EMPTY_CONTEXT)
+        return await self._run(self._natural_context_call(description))
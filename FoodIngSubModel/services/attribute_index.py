@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Attribute Index for Recipe Suggestion System
+
+Build-once inverted index from ingredient attribute values to bitsets of entry ids,
+with context scoring and a small boolean query language on top.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from models import IngredientEntry
+from utils import to_casefold_set
+
+
+# Context attribute -> IngredientEntry field
+ATTRIBUTE_FIELDS: Dict[str, str] = {
+    "taste": "flavors",
+    "texture": "textures",
+    "color": "colors",
+    "cooking_method": "cook_methods",
+}
+
+# Further properties searchable in boolean queries, only with a qualifier ("vitamin:Niacin")
+PROPERTY_KINDS: Dict[str, str] = {
+    "nutrient": "nutrients",
+    "mineral": "minerals",
+    "vitamin": "vitamins",
+    "type": "types",
+    "benefit": "benefits",
+    "shape": "shapes",
+    "sugar": "sugars",
+}
+
+# Qualifiers accepted in boolean queries, e.g. "texture:Crunchy"
+QUERY_QUALIFIERS: Dict[str, str] = {
+    "taste": "taste",
+    "flavor": "taste",
+    "texture": "texture",
+    "color": "color",
+    "colour": "color",
+    "cook": "cooking_method",
+    "method": "cooking_method",
+    "cooking_method": "cooking_method",
+    **{kind: kind for kind in PROPERTY_KINDS},
+}
+
+_OPERATORS = {"AND", "OR", "NOT"}
+_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def iter_bits(bits: int):
+    """Yield the positions of set bits in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class AttributeIndex:
+    """Inverted index: attribute kind -> casefolded value -> bitset of entry ids.
+
+    Entry ids are assigned in (name, file order) order, so walking the set bits of
+    any bitset from low to high yields names already sorted alphabetically.
+    """
+
+    def __init__(self, entries: List[IngredientEntry]):
+        order = sorted(range(len(entries)), key=lambda i: (entries[i].canonical_name.strip(), i))
+        self._names: List[str] = [entries[i].canonical_name.strip() for i in order]
+        fields = {**ATTRIBUTE_FIELDS, **PROPERTY_KINDS}
+        self._postings: Dict[str, Dict[str, int]] = {kind: {} for kind in fields}
+        self._all = (1 << len(order)) - 1
+
+        for entry_id, i in enumerate(order):
+            bit = 1 << entry_id
+            for kind, field in fields.items():
+                postings = self._postings[kind]
+                for value in set(to_casefold_set(getattr(entries[i], field))):
+                    postings[value] = postings.get(value, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def universe(self) -> int:
+        """Bitset containing every entry."""
+        return self._all
+
+    @property
+    def names(self) -> List[str]:
+        """Canonical names indexed by entry id."""
+        return self._names
+
+    def vocabulary(self, kind: str) -> List[str]:
+        """Casefolded values known for an attribute kind."""
+        return sorted(self._postings.get(kind, {}))
+
+    def bitset(self, kind: str, value: Optional[str]) -> int:
+        """Bitset of entries whose ``kind`` attribute contains ``value``."""
+        if not value:
+            return 0
+        return self._postings.get(kind, {}).get(value.strip().casefold(), 0)
+
+    def bitset_any(self, value: str) -> int:
+        """Bitset of entries having ``value`` under any context attribute kind."""
+        key = value.strip().casefold()
+        bits = 0
+        for kind in ATTRIBUTE_FIELDS:
+            bits |= self._postings[kind].get(key, 0)
+        return bits
+
+    def score_levels(self, query: Dict[str, Optional[str]]) -> List[Tuple[int, int]]:
+        """Split matching entries into (score, bitset) levels, highest score first.
+
+        The score of an entry is the number of query attributes it matches. Levels
+        are computed with a bitwise counter, so no per-entry loop is needed.
+        """
+        masks = [self.bitset(kind, query.get(kind)) for kind in ATTRIBUTE_FIELDS if query.get(kind)]
+        masks = [m for m in masks if m]
+        if not masks:
+            return []
+
+        # at_least[k] holds the entries that matched at least k attributes so far
+        at_least = [0] * (len(masks) + 2)
+        for mask in masks:
+            for k in range(len(masks), 1, -1):
+                at_least[k] |= at_least[k - 1] & mask
+            at_least[1] |= mask
+
+        levels = []
+        for k in range(len(masks), 0, -1):
+            level = at_least[k] & ~at_least[k + 1]
+            if level:
+                levels.append((k, level))
+        return levels
+
+    def top(self, query: Dict[str, Optional[str]], max_results: int) -> List[str]:
+        """Return names ordered by (-score, name), deduplicated by name."""
+        items: List[str] = []
+        seen = set()
+        for _, level in self.score_levels(query):
+            for entry_id in iter_bits(level):
+                name = self._names[entry_id]
+                if name and name not in seen:
+                    items.append(name)
+                    seen.add(name)
+                    if len(items) >= max_results:
+                        return items
+        return items
+
+    def weighted_top(self, query: Dict[str, Optional[str]], weights: Dict[str, float],
+                     max_results: int) -> List[str]:
+        """Like ``top`` but with per-attribute weights (pure-Python fallback)."""
+        masks = [(self.bitset(kind, query.get(kind)), float(weights.get(kind, 1.0)))
+                 for kind in ATTRIBUTE_FIELDS if query.get(kind)]
+        masks = [(m, w) for m, w in masks if m]
+        if len({w for _, w in masks}) <= 1 and all(w > 0 for _, w in masks):
+            return self.top(query, max_results)
+
+        union = 0
+        for mask, _ in masks:
+            union |= mask
+        scored = []
+        for entry_id in iter_bits(union):
+            bit = 1 << entry_id
+            score = round(sum(w for m, w in masks if m & bit), 6)
+            if score > 0:
+                scored.append((-score, entry_id))
+        scored.sort()
+
+        items: List[str] = []
+        seen = set()
+        for _, entry_id in scored:
+            name = self._names[entry_id]
+            if name and name not in seen:
+                items.append(name)
+                seen.add(name)
+                if len(items) >= max_results:
+                    break
+        return items
+
+    def count(self, bits: int) -> int:
+        """Number of entries in a bitset."""
+        return bits.bit_count()
+
+    def names_for(self, bits: int, max_results: Optional[int] = None) -> List[str]:
+        """Resolve a bitset to sorted, deduplicated names."""
+        items: List[str] = []
+        seen = set()
+        for entry_id in iter_bits(bits & self._all):
+            name = self._names[entry_id]
+            if name and name not in seen:
+                items.append(name)
+                seen.add(name)
+                if max_results is not None and len(items) >= max_results:
+                    break
+        return items
+
+    def query(self, expression: str) -> int:
+        """Evaluate a boolean attribute query such as ``Crunchy AND Fried AND NOT Sweet``.
+
+        Supports AND, OR, NOT (case-insensitive), parentheses, quoted multi-word
+        values and ``kind:value`` qualifiers (taste, texture, color, cook, and
+        nutrient, mineral, vitamin, type, benefit, shape, sugar). Unqualified values
+        match any context attribute kind. Raises ValueError on
+        malformed expressions.
+        """
+        return _QueryParser(self, expression).parse()
+
+    def resolve_term(self, term: str) -> int:
+        """Bitset for a single (optionally qualified) query term."""
+        qualifier, sep, value = term.partition(":")
+        if sep and qualifier.strip().casefold() in QUERY_QUALIFIERS:
+            return self.bitset(QUERY_QUALIFIERS[qualifier.strip().casefold()], value)
+        return self.bitset_any(term)
+
+
+class _QueryParser:
+    """Recursive descent parser for boolean attribute queries."""
+
+    def __init__(self, index: AttributeIndex, expression: str):
+        self.index = index
+        self.tokens = self._tokenize(expression or "")
+        self.pos = 0
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[str]:
+        tokens: List[str] = []
+        words: List[str] = []
+        for raw in _TOKEN_RE.findall(expression):
+            if raw.upper() in _OPERATORS or raw in ("(", ")"):
+                if words:
+                    tokens.append(" ".join(words))
+                    words = []
+                tokens.append(raw.upper() if raw.upper() in _OPERATORS else raw)
+            else:
+                words.append(raw.strip('"'))
+        if words:
+            tokens.append(" ".join(words))
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Optional[str]:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def parse(self) -> int:
+        if not self.tokens:
+            raise ValueError("Empty query")
+        bits = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token: {self._peek()}")
+        return bits
+
+    def _or(self) -> int:
+        bits = self._and()
+        while self._peek() == "OR":
+            self._next()
+            bits |= self._and()
+        return bits
+
+    def _and(self) -> int:
+        bits = self._not()
+        while self._peek() == "AND":
+            self._next()
+            bits &= self._not()
+        return bits
+
+    def _not(self) -> int:
+        if self._peek() == "NOT":
+            self._next()
+            return self.index.universe & ~self._not()
+        return self._primary()
+
+    def _primary(self) -> int:
+        token = self._next()
+        if token is None:
+            raise ValueError("Unexpected end of query")
+        if token == "(":
+            bits = self._or()
+            if self._next() != ")":
+                raise ValueError("Missing closing parenthesis")
+            return bits
+        if token in _OPERATORS or token == ")":
+            raise ValueError(f"Unexpected token: {token}")
+        return self.index.resolve_term(token)
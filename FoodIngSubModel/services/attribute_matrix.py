@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Attribute Matrix for Recipe Suggestion System
+
+NumPy multi-hot encoding of the ingredient dataset, one column per (attribute, value)
+pair, so context queries can be scored as a weighted matrix product.
+"""
+
+from typing import Dict, List, Optional
+
+from services.attribute_index import ATTRIBUTE_FIELDS, AttributeIndex, iter_bits
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+# Scores are rounded before ranking so float summation order never breaks ties
+_SCORE_DECIMALS = 6
+
+
+class AttributeMatrix:
+    """Multi-hot entry x attribute-value matrix built from an AttributeIndex.
+
+    Rows share the index's entry ids (sorted by name), so a stable sort on the
+    negated score reproduces the (-score, name) ordering.
+    """
+
+    def __init__(self, index: AttributeIndex, weights: Optional[Dict[str, float]] = None):
+        if np is None:
+            raise ImportError("numpy is required for AttributeMatrix")
+
+        self._names = index.names
+        self._weights = {kind: float((weights or {}).get(kind, 1.0)) for kind in ATTRIBUTE_FIELDS}
+        self._columns: Dict[str, Dict[str, int]] = {kind: {} for kind in ATTRIBUTE_FIELDS}
+
+        postings = []
+        for kind in ATTRIBUTE_FIELDS:
+            for value in index.vocabulary(kind):
+                self._columns[kind][value] = len(postings)
+                postings.append(index.bitset(kind, value))
+
+        self._matrix = np.zeros((len(index), len(postings)), dtype=np.float32)
+        for column, bits in enumerate(postings):
+            self._matrix[list(iter_bits(bits)), column] = 1.0
+
+    @property
+    def shape(self):
+        return self._matrix.shape
+
+    def _query_vector(self, query: Dict[str, Optional[str]], out) -> None:
+        """Write the weighted one-hot encoding of a context query into ``out``."""
+        for kind, columns in self._columns.items():
+            value = query.get(kind)
+            if not value:
+                continue
+            column = columns.get(value.strip().casefold())
+            if column is not None:
+                out[column] = self._weights[kind]
+
+    def top_batch(self, queries: List[Dict[str, Optional[str]]], max_results: int) -> List[List[str]]:
+        """Score every query with a single matrix multiply and return ranked names."""
+        if not queries:
+            return []
+
+        vectors = np.zeros((self._matrix.shape[1], len(queries)), dtype=np.float32)
+        for i, query in enumerate(queries):
+            self._query_vector(query, vectors[:, i])
+
+        scores = np.round(self._matrix @ vectors, _SCORE_DECIMALS)
+        return [self._rank(scores[:, i], max_results) for i in range(len(queries))]
+
+    def top(self, query: Dict[str, Optional[str]], max_results: int) -> List[str]:
+        """Score a single query (matrix-vector product)."""
+        return self.top_batch([query], max_results)[0]
+
+    def _rank(self, scores, max_results: int) -> List[str]:
+        candidates = np.flatnonzero(scores > 0)
+        if not candidates.size:
+            return []
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        items: List[str] = []
+        seen = set()
+        for row in order:
+            name = self._names[row]
+            if name and name not in seen:
+                items.append(name)
+                seen.add(name)
+                if len(items) >= max_results:
+                    break
+        return items
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Upstream Client Registry for Recipe Suggestion System
+
+One process-wide set of pooled upstream clients (AsyncOpenAI, Supabase), so every
+service shares keep-alive connections instead of each opening its own pool.
+"""
+
+import os
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils import logger
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ClientRegistry:
+    """Lazily built, shared upstream clients with pool limits and per-upstream timeouts."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._supabase_lock = asyncio.Lock()
+        self._api_key: Optional[str] = None
+        self._api_key_resolved = False
+        self._async_openai = None
+        self._supabase = None
+        self._supabase_url = os.getenv("VITE_SUPABASE_URL")
+        self._supabase_key = os.getenv("VITE_SUPABASE_ANON_KEY")
+        self.http2 = config.http2_enabled and _http2_available()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """OpenAI API key, resolved from the environment or .env files once per process."""
+        with self._lock:
+            if not self._api_key_resolved:
+                self._api_key = self._resolve_api_key()
+                self._api_key_resolved = True
+            return self._api_key
+
+    def _resolve_api_key(self) -> Optional[str]:
+        """Resolve API key from environment or .env files."""
+        # Check environment variables
+        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OpanAI_apikey")
+        if api_key and api_key.strip():
+            return api_key.strip()
+
+        # Check .env files
+        env_files = [f"{self.config.base_dir}/.env", ".env"]
+        for env_path in env_files:
+            try:
+                if os.path.exists(env_path):
+                    with open(env_path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            line = line.strip()
+                            if not line or line.startswith("#"):
+                                continue
+                            if "OpanAI_apikey" in line or "OPENAI_API_KEY" in line:
+                                _, _, value = line.partition("=")
+                                if value:
+                                    val = value.strip().strip("\"'")
+                                    if val:
+                                        return val
+            except Exception as e:
+                logger.debug(f"Error reading {env_path}: {e}")
+
+        return None
+
+    def _http_options(self) -> Dict[str, Any]:
+        """Pool limits and timeouts for the OpenAI HTTP client."""
+        import httpx
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.config.http_pool_size,
+                max_keepalive_connections=self.config.http_keepalive_connections,
+                keepalive_expiry=self.config.http_keepalive_expiry,
+            ),
+            "timeout": self._openai_timeout(),
+            "http2": self.http2,
+        }
+
+    def _openai_timeout(self):
+        # Passed to the OpenAI client too, which would otherwise override it per request
+        import httpx
+        return httpx.Timeout(self.config.openai_timeout, connect=self.config.openai_connect_timeout)
+
+    def async_openai(self):
+        """Shared AsyncOpenAI client, or None without a key or package."""
+        with self._lock:
+            if self._async_openai is not None:
+                return self._async_openai
+        api_key = self.api_key
+        if not api_key:
+            logger.warning("OpenAI API key not found")
+            return None
+
+        try:
+            import httpx
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=api_key, base_url=self.config.openai_base_url or None,
+                                 max_retries=self.config.openai_max_retries,
+                                 timeout=self._openai_timeout(),
+                                 http_client=httpx.AsyncClient(**self._http_options()))
+            logger.info(f"AsyncOpenAI client initialized successfully (http2={self.http2})")
+        except ImportError:
+            logger.error("OpenAI package not installed")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to initialize AsyncOpenAI client: {e}")
+            return None
+
+        with self._lock:
+            if self._async_openai is None:
+                self._async_openai = client
+            return self._async_openai
+
+    @property
+    def has_supabase(self) -> bool:
+        """Check if Supabase credentials are configured."""
+        return bool(self._supabase_url and self._supabase_key)
+
+    async def supabase(self):
+        """Shared async Supabase client, initialized on first use."""
+        if self._supabase is not None or not self.has_supabase:
+            return self._supabase
+
+        async with self._supabase_lock:
+            if self._supabase is not None:
+                return self._supabase
+            try:
+                from supabase import acreate_client, AsyncClientOptions
+                options = AsyncClientOptions(postgrest_client_timeout=self.config.supabase_timeout)
+                self._supabase = await acreate_client(self._supabase_url, self._supabase_key, options=options)
+                logger.info("Supabase client initialized successfully")
+            except ImportError:
+                logger.warning("Supabase package not installed. Run `pip install supabase`.")
+                self._supabase_url = None
+            except Exception as e:
+                logger.error(f"Failed to initialize Supabase client: {e}")
+        return self._supabase
+
+    async def aclose(self):
+        """Close every pooled connection (call once, at shutdown)."""
+        with self._lock:
+            async_client, self._async_openai = self._async_openai, None
+        if async_client is not None:
+            await async_client.close()
+
+
+_shared_registry: Optional[ClientRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_client_registry(config: Config) -> ClientRegistry:
+    """Process-wide registry; the first caller's Config sets pool sizes and timeouts."""
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = ClientRegistry(config)
+        return _shared_registry
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Context Parser for Recipe Suggestion System
+
+Local parser that pulls taste, texture, color and cooking method out of short Thai or
+English descriptions using the dataset's own attribute vocabulary, so most natural
+language context requests need no LLM round trip.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import ParsedContext
+from services.name_resolver import NameResolver, normalize_name
+
+
+CONTEXT_KINDS = ("taste", "texture", "color", "cooking_method")
+
+# English surface forms -> dataset value (kept only if the value is in the vocabulary)
+ENGLISH_SYNONYMS: Dict[str, str] = {
+    "hot": "spicy", "spice": "spicy", "chili": "spicy", "chilli": "spicy", "fiery": "spicy",
+    "savory": "umami", "savoury": "umami", "tart": "sour", "tangy": "sour",
+    "sugary": "sweet", "salted": "salty", "zesty": "citrus", "lemony": "citrus",
+    "crunch": "crunchy", "crispness": "crispy", "mushy": "soft", "gooey": "sticky",
+    "jelly": "gelatinous", "jiggly": "gelatinous", "succulent": "juicy",
+    "see through": "transparent", "clear": "transparent", "multicolored": "colorful",
+    "grey": "gray", "colourful": "colorful",
+    "deep fried": "fried", "bbq": "grilled", "barbecue": "grilled", "barbecued": "grilled",
+    "charcoal grilled": "grilled", "stew": "stewed", "saute": "sauteed", "sauté": "sauteed",
+    "stir fry": "stir-fried", "fresh": "raw", "uncooked": "raw",
+}
+
+# Thai terms -> dataset value; colors only with the "สี" prefix, since bare color
+# words also name foods ("ส้ม" orange, "น้ำตาล" sugar)
+THAI_TERMS: Dict[str, str] = {
+    "เปรี้ยว": "sour", "หวาน": "sweet", "เค็ม": "salty", "ขม": "bitter", "เผ็ด": "spicy",
+    "อูมามิ": "umami", "กลมกล่อม": "umami", "จืด": "mild", "ฝาด": "astringent", "ฉุน": "pungent",
+    "กรอบ": "crispy", "กรุบ": "crunchy", "กรุบกรอบ": "crunchy", "นุ่ม": "soft", "นิ่ม": "soft",
+    "เหนียว": "chewy", "หนึบ": "chewy", "เนียน": "smooth", "ครีมมี่": "creamy", "ฉ่ำ": "juicy",
+    "แข็ง": "firm", "ลื่น": "slippery", "เมือก": "slimy", "ฟู": "fluffy", "เป็นผง": "powdery",
+    "สีแดง": "red", "สีเขียว": "green", "สีเหลือง": "yellow", "สีส้ม": "orange", "สีขาว": "white",
+    "สีดำ": "black", "สีน้ำตาล": "brown", "สีม่วง": "purple", "สีชมพู": "pink", "สีทอง": "golden",
+    "สีครีม": "cream", "สีฟ้า": "blue", "สีน้ำเงิน": "blue", "สีเทา": "gray", "หลากสี": "colorful",
+    "ทอด": "fried", "ต้ม": "boiled", "ย่าง": "grilled", "ปิ้ง": "grilled", "อบ": "baked",
+    "นึ่ง": "steamed", "ผัด": "stir-fried", "ดิบ": "raw", "ตุ๋น": "stewed", "เคี่ยว": "simmered",
+    "ลวก": "blanched", "คั่ว": "roasted", "ดอง": "pickled", "ตำ": "pounded", "หมัก": "marinated",
+    "สับ": "minced", "หั่น": "sliced", "ตากแห้ง": "dried",
+}
+
+# Words that carry no attribute and do not count against confidence
+ENGLISH_STOPWORDS = frozenset("""
+    a an the and or but with without of to for in on at by from as is are be it its this that
+    i me my we our you your want would like need looking something some anything any thing things
+    food foods dish dishes meal ingredient ingredients recipe recipes kind sort type bit little
+    very really quite too so more most slightly extra super pretty rather somewhat
+    taste tastes tasting flavor flavour flavored texture textured color colour colored coloured
+    cooked cooking method style please can could should maybe also
+""".split())
+
+THAI_STOPWORDS = frozenset("""
+    อยาก ได้ อยากได้ ที่ มี รส รสชาติ เนื้อสัมผัส สัมผัส แบบ และ กับ หน่อย ค่ะ คะ ครับ
+    อาหาร เมนู วัตถุดิบ อะไร ก็ได้ ของ เป็น นิด นิดหน่อย มาก ๆ ชอบ กิน ทาน แนะนำ ขอ สี
+    หรือ ค่อนข้าง จัด นะ
+""".split())
+
+# normalize_name splits contractions, so "don't" arrives as "don", "t"
+_NEGATIONS = frozenset({"not", "no", "non", "never", "without", "less", "don", "doesn", "isn"})
+_INTENSIFIERS = frozenset({"t", "too", "overly", "at", "all"})
+_THAI_NEGATION = "ไม่"
+
+_TOKEN_RE = re.compile(r"[\u0E00-\u0E7F]+|[^\W\d_]+")
+_THAI_RE = re.compile(r"[\u0E00-\u0E7F]")
+_MAX_PHRASE_WORDS = 3
+
+
+def _inflections(value: str) -> List[str]:
+    """Verb forms of a past-participle cooking method ("fried" -> "fry", "frying")."""
+    head, _, last = value.rpartition(" ")
+    forms = []
+    if last.endswith("ied"):
+        stem = last[:-3] + "y"
+        forms = [stem, stem + "ing"]
+    elif last.endswith("ed"):
+        forms = [last[:-2], last[:-1], last[:-2] + "ing"]
+        if len(last) > 4 and last[-3] == last[-4]:
+            forms.append(last[:-3])  # chopped -> chop
+    return [f"{head} {form}" if head else form for form in forms]
+
+
+class ContextParser:
+    """Dictionary-based parser from descriptions to context attributes.
+
+    ``confidence`` is the share of content words (stopwords excluded) the parser
+    explained; callers escalate to the LLM when it falls below their threshold.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Iterable[str]]):
+        vocab = {kind: {normalize_name(v): v for v in values if normalize_name(v)}
+                 for kind, values in vocabulary.items() if kind in CONTEXT_KINDS}
+        colors = set(vocab.get("color", {}))
+
+        # phrase -> candidate (kind, value) pairs; color words are colors first
+        self._phrases: Dict[str, List[Tuple[str, str]]] = {}
+
+        def add(phrase: str, value_key: str):
+            phrase = normalize_name(phrase)
+            if not phrase:
+                return
+            kinds = [k for k in vocab if value_key in vocab[k]]
+            if value_key in colors:
+                kinds.sort(key=lambda k: k != "color")
+            candidates = self._phrases.setdefault(phrase, [])
+            for kind in kinds:
+                pair = (kind, vocab[kind][value_key])
+                if pair not in candidates:
+                    candidates.append(pair)
+
+        for kind, values in vocab.items():
+            for key in values:
+                add(key, key)
+                if kind == "cooking_method":
+                    for form in _inflections(key):
+                        add(form, key)
+        for phrase, value in ENGLISH_SYNONYMS.items():
+            add(phrase, normalize_name(value))
+        for phrase, value in THAI_TERMS.items():
+            add(phrase, normalize_name(value))
+        self._phrases = {p: c for p, c in self._phrases.items() if c}
+
+        self._thai_terms = sorted((p for p in self._phrases if _THAI_RE.search(p)), key=len, reverse=True)
+        self._thai_stopwords = sorted(THAI_STOPWORDS, key=len, reverse=True)
+        self._typos = NameResolver(((p, p) for p in self._phrases if " " not in p and not _THAI_RE.search(p)),
+                                   min_score=0.87)
+
+    def parse(self, description: str) -> ParsedContext:
+        """Extract context attributes with a confidence score."""
+        context: Dict[str, Optional[str]] = {kind: None for kind in CONTEXT_KINDS}
+        matched: List[str] = []
+        explained = total = 0
+
+        for span, negated in self._terms(description or ""):
+            total += 1
+            if span is None:
+                continue
+            explained += 1
+            if negated:
+                continue
+            for kind, value in self._phrases[span]:
+                if context[kind] is None:
+                    context[kind] = value
+                    matched.append(span)
+                    break
+
+        found = any(context.values())
+        confidence = round(explained / total, 4) if total and found else 0.0
+        return ParsedContext(context, confidence, matched)
+
+    def _terms(self, text: str):
+        """Yield (phrase, negated) for content units; phrase is None when unexplained."""
+        tokens = _TOKEN_RE.findall(normalize_name(text))
+        i = 0
+        negate_window = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if _THAI_RE.match(token):
+                yield from self._thai_terms_in(token)
+                negate_window = 0
+                i += 1
+                continue
+
+            for size in range(min(_MAX_PHRASE_WORDS, len(tokens) - i), 0, -1):
+                phrase = " ".join(tokens[i:i + size])
+                if phrase in self._phrases:
+                    yield phrase, negate_window > 0
+                    i += size
+                    negate_window = 0
+                    break
+            else:
+                if token in _NEGATIONS:
+                    negate_window = 3
+                elif token in ENGLISH_STOPWORDS or token in _INTENSIFIERS:
+                    negate_window = max(negate_window - 1, 0)
+                else:
+                    match = self._typos.resolve(token) if len(token) >= 4 else None
+                    if match:
+                        yield match.value, negate_window > 0
+                    else:
+                        yield None, False
+                    negate_window = 0
+                i += 1
+
+    def _thai_terms_in(self, run: str):
+        """Greedy longest-match scan of an unsegmented Thai run."""
+        pos = 0
+        unexplained = False
+        negated = False
+        while pos < len(run):
+            if run.startswith(_THAI_NEGATION, pos):
+                negated = True
+                pos += len(_THAI_NEGATION)
+                continue
+            term = next((t for t in self._thai_terms if run.startswith(t, pos)), None)
+            if term:
+                if unexplained:
+                    yield None, False
+                    unexplained = False
+                yield term, negated
+                negated = False
+                pos += len(term)
+                continue
+            stop = next((s for s in self._thai_stopwords if run.startswith(s, pos)), None)
+            if stop:
+                if unexplained:
+                    yield None, False
+                    unexplained = False
+                pos += len(stop)
+                continue
+            unexplained = True
+            negated = False
+            pos += 1
+        if unexplained:
+            yield None, False
@@ -7,36 +7,244 @@ Handles ingredient dataset operations and local ingredient data management.
 
 import os
 import json
-from functools import lru_cache
-from typing import List, Optional
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from config import Config
-from models import IngredientEntry, SuggestionResult
-from utils import to_casefold_set, logger
+from models import NameMatch, ParsedContext, SuggestionResult
+from services import metrics
+from services.attribute_index import ATTRIBUTE_FIELDS, AttributeIndex
+from services.attribute_matrix import AttributeMatrix, np
+from services.context_parser import ContextParser
+from services.dataset_snapshot import NeighborTable, Snapshot, read_snapshot, write_snapshot
+from services.ingredient_store import PROPERTY_FIELDS, IngredientStore
+from services.name_resolver import NameResolver
+from services.substitute_engine import SubstituteEngine
+from utils import logger
+
+
+class DatasetState:
+    """One version of the dataset and every index derived from it.
+    
+    Indexes are built lazily (or all at once by ``warm_up``) and never change
+    afterwards; a reload builds a new state and swaps it in whole, so a query that
+    took a state sees one consistent version.
+    """
+    
+    def __init__(self, config: Config, store: IngredientStore, digest: str, source: str,
+                 load_ms: float, neighbor_table: Optional[NeighborTable] = None):
+        self.config = config
+        self.store = store
+        self.digest = digest
+        self.version = digest[:12]
+        self.source = source
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+        self.warm_up_ms: Optional[float] = None
+        self._neighbor_table = neighbor_table
+        self._index: Optional[AttributeIndex] = None
+        self._matrix: Optional[AttributeMatrix] = None
+        self._substitute_engine: Optional[SubstituteEngine] = None
+        self._name_resolver: Optional[NameResolver] = None
+        self._attribute_resolvers: Optional[Dict[str, NameResolver]] = None
+        self._context_parser: Optional[ContextParser] = None
+    
+    @property
+    def from_snapshot(self) -> bool:
+        return self._neighbor_table is not None
+    
+    def index(self) -> AttributeIndex:
+        """Build the attribute index once and reuse it for every query."""
+        if self._index is None:
+            self._index = AttributeIndex(self.store)
+        return self._index
+    
+    def matrix(self) -> Optional[AttributeMatrix]:
+        """Build the multi-hot scoring matrix once (None if numpy is unavailable)."""
+        if self._matrix is None and np is not None:
+            self._matrix = AttributeMatrix(self.index(), self.config.context_weights)
+        return self._matrix
+    
+    def substitute_engine(self) -> SubstituteEngine:
+        """Build the substitute neighbor table once (or take it from the snapshot)."""
+        if self._substitute_engine is None:
+            self._substitute_engine = SubstituteEngine(
+                self.store,
+                neighbors=self.config.substitute_neighbors,
+                min_similarity=self.config.substitute_min_similarity,
+                neighbor_table=self._neighbor_table,
+            )
+        return self._substitute_engine
+    
+    def name_resolver(self) -> NameResolver:
+        """Build the ingredient name/alias resolver once.
+        
+        Entries with attribute data win over alias-only stubs (e.g. "ไข่ไก่" resolves
+        to Hen Egg), and canonical names win over aliases.
+        """
+        if self._name_resolver is None:
+            described = [e for e in self.store if e.flavors or e.textures or e.colors or e.cook_methods]
+            stubs = [e for e in self.store if not (e.flavors or e.textures or e.colors or e.cook_methods)]
+            pairs = []
+            for group in (described, stubs):
+                pairs += [(e.canonical_name, e) for e in group]
+                pairs += [(alias, e) for e in group for alias in e.other_names]
+            self._name_resolver = NameResolver(pairs, suggest_limit=self.config.resolve_suggest_limit,
+                                               min_score=self.config.resolve_min_score)
+        return self._name_resolver
+    
+    def attribute_resolvers(self) -> Dict[str, NameResolver]:
+        """Build one resolver per context attribute over the dataset vocabulary."""
+        if self._attribute_resolvers is None:
+            index = self.index()
+            self._attribute_resolvers = {
+                kind: NameResolver([(v, v) for v in index.vocabulary(kind)],
+                                   min_score=self.config.resolve_min_score)
+                for kind in ATTRIBUTE_FIELDS
+            }
+        return self._attribute_resolvers
+    
+    def context_parser(self) -> ContextParser:
+        """Build the local natural-language context parser over the dataset vocabulary."""
+        if self._context_parser is None:
+            index = self.index()
+            self._context_parser = ContextParser({kind: index.vocabulary(kind) for kind in ATTRIBUTE_FIELDS})
+        return self._context_parser
+    
+    def warm_up(self):
+        """Build every index now rather than on first use."""
+        started = time.perf_counter()
+        self.matrix()
+        self.substitute_engine()
+        self.name_resolver()
+        self.attribute_resolvers()
+        self.context_parser()
+        self.warm_up_ms = round((time.perf_counter() - started) * 1000, 1)
+    
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "entries": len(self.store),
+            "vocabulary": len(self.store.strings),
+            "column_bytes": self.store.nbytes(),
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+            "warm_up_ms": self.warm_up_ms,
+        }
 
 
 class DatasetService:
-    """Handles ingredient dataset operations."""
+    """Handles ingredient dataset operations.
+    
+    Serves from one DatasetState at a time. ``start`` polls ``dataset_path`` and, when
+    it changes, builds and warms a new state in a worker thread before swapping it in.
+    """
     
     def __init__(self, config: Config):
         self.config = config
-        self._entries = None
+        self._state: Optional[DatasetState] = None
+        self._state_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._ready = False
+        self._reloads = 0
+        self._last_error: Optional[str] = None
+        # Process-wide, so hot reloads do not reset the local parser hit rate
+        self._context_parses = {"parsed": 0, "local_hits": 0, "escalated": 0}
+        self._task: Optional[asyncio.Task] = None
     
-    @lru_cache(maxsize=1)
-    def _load_entries(self) -> List[IngredientEntry]:
-        """Load ingredient entries from the dataset."""
-        entries = []
+    def _current(self) -> DatasetState:
+        """The serving dataset version, loaded on first use."""
+        state = self._state
+        if state is None:
+            with self._state_lock:
+                if self._state is None:
+                    self._state, self._stamp = self._load_state()
+                    self._publish(self._state)
+                state = self._state
+        return state
+    
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
         try:
-            if not os.path.exists(self.config.dataset_path):
-                logger.warning(f"Dataset file not found: {self.config.dataset_path}")
-                return entries
-            
-            with open(self.config.dataset_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            stat = os.stat(self.config.dataset_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _load_state(self) -> Tuple[DatasetState, Optional[Tuple[int, int]]]:
+        """Read the dataset (through the snapshot when it matches) into a new state."""
+        started = time.perf_counter()
+        stamp = self._file_stamp()
+        raw = self._read_source()
+        version = hashlib.sha256(raw).hexdigest() if raw is not None else ""
+        snapshot = self._read_snapshot(version) if raw is not None else None
+        if snapshot is not None:
+            store, neighbors, source = snapshot.store, snapshot.neighbors, "snapshot"
+        else:
+            store, neighbors, source = self._parse_dataset(raw), None, "json"
+        load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return DatasetState(self.config, store, version, source, load_ms, neighbors), stamp
+    
+    def _read_source(self) -> Optional[bytes]:
+        if not os.path.exists(self.config.dataset_path):
+            logger.warning(f"Dataset file not found: {self.config.dataset_path}")
+            return None
+        with open(self.config.dataset_path, "rb") as f:
+            return f.read()
+    
+    def _engine_signature(self) -> str:
+        return SubstituteEngine.signature(self.config.substitute_neighbors, self.config.substitute_min_similarity)
+    
+    def _read_snapshot(self, digest: str) -> Optional[Snapshot]:
+        path = self.config.dataset_snapshot_path
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            snapshot = read_snapshot(path, digest, self._engine_signature())
+        except Exception as e:
+            logger.error(f"Error reading dataset snapshot: {e}")
+            return None
+        if snapshot is None:
+            logger.info(f"Dataset snapshot {path} is stale; loading {self.config.dataset_path}")
+        return snapshot
+    
+    def build_snapshot(self) -> Dict[str, Any]:
+        """Compile the dataset and its substitute neighbor table into the snapshot file."""
+        state, _ = self._load_state()
+        return self._write_snapshot(state)
+    
+    def _write_snapshot(self, state: DatasetState) -> Dict[str, Any]:
+        header = write_snapshot(self.config.dataset_snapshot_path, state.store,
+                                state.substitute_engine().neighbor_table,
+                                state.digest, self._engine_signature())
+        logger.info(f"Wrote dataset snapshot {self.config.dataset_snapshot_path}")
+        return header
+    
+    def _autobuild_snapshot(self, state: DatasetState):
+        if state.from_snapshot or not len(state.store):
+            return
+        if not (self.config.dataset_snapshot_path and self.config.dataset_snapshot_autobuild):
+            return
+        try:
+            self._write_snapshot(state)
+        except Exception as e:
+            logger.warning(f"Could not write dataset snapshot: {e}")
+    
+    def _parse_dataset(self, raw: Optional[bytes]) -> IngredientStore:
+        """Parse ingredient entries and all their properties from the JSON dataset."""
+        store = IngredientStore()
+        if raw is None:
+            return store
+        try:
+            data = json.loads(raw)
             
             if not isinstance(data, dict):
                 logger.error("Invalid dataset format")
-                return entries
+                return store
             
             for category, submap in data.items():
                 if not isinstance(submap, dict):
@@ -46,21 +254,183 @@ class DatasetService:
                     if not isinstance(props, dict):
                         continue
                     
-                    entries.append(IngredientEntry(
+                    store.append(
                         canonical_name=str(name).strip(),
-                        other_names=[str(n).strip() for n in props.get("hasOtherNames", [])],
-                        flavors=[str(v).strip() for v in props.get("hasFlavor", [])],
-                        textures=[str(v).strip() for v in props.get("hasTexture", [])],
-                        colors=[str(v).strip() for v in props.get("hasColor", [])],
-                        cook_methods=[str(v).strip() for v in props.get("canCook", [])]
-                    ))
+                        category=str(category),
+                        **{field: [str(v).strip() for v in props.get(key, [])]
+                           for key, field in PROPERTY_FIELDS.items()},
+                    )
             
-            logger.info(f"Loaded {len(entries)} ingredient entries from dataset")
-            return entries
+            logger.info(f"Loaded {len(store)} ingredient entries from dataset")
+            return store
             
         except Exception as e:
             logger.error(f"Error loading dataset: {e}")
-            return entries
+            return IngredientStore()
+    
+    def _publish(self, state: DatasetState):
+        metrics.DATASET_LOADED.clear()
+        metrics.DATASET_LOADED.set(state.loaded_at, state.version)
+    
+    def warm_up(self):
+        """Eagerly build the dataset indexes so the first request is not slow."""
+        state = self._current()
+        state.warm_up()
+        self._autobuild_snapshot(state)
+        self._ready = True
+        logger.info(f"Dataset {state.version} warmed up from {state.source} in {state.warm_up_ms} ms")
+    
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild from ``dataset_path`` if it changed, and swap the new version in once warm.
+        
+        A file that fails to parse (e.g. caught mid-write) leaves the serving version
+        in place; it is retried once the file changes again. Returns True if a new version was swapped in.
+        """
+        with self._reload_lock:
+            stamp = self._file_stamp()
+            if not force and stamp == self._stamp:
+                return False
+            current = self._state
+            try:
+                state, stamp = self._load_state()
+                if current is not None and not len(state.store):
+                    raise ValueError(f"no entries parsed from {self.config.dataset_path}")
+                if current is not None and state.version == current.version and not force:
+                    self._stamp = stamp  # touched, same content
+                    return False
+                state.warm_up()
+            except Exception as e:
+                self._stamp = stamp
+                self._last_error = str(e)
+                logger.error(f"Dataset reload failed, keeping version "
+                             f"{current.version if current else None}: {e}")
+                return False
+            
+            self._state, self._stamp = state, stamp
+            self._reloads += 1
+            self._last_error = None
+            self._publish(state)
+            logger.info(f"Dataset reloaded: version {state.version}, {len(state.store)} entries "
+                        f"from {state.source} (warm-up {state.warm_up_ms} ms)")
+        self._autobuild_snapshot(state)
+        return True
+    
+    async def _watch_loop(self):
+        interval = self.config.dataset_reload_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error(f"Dataset watch failed: {e}")
+    
+    async def start(self):
+        """Watch ``dataset_path`` for changes and hot-reload it."""
+        if self.config.dataset_reload_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch_loop())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    @property
+    def ready(self) -> bool:
+        """True once warm_up has built every index."""
+        return self._ready
+    
+    def status(self) -> Dict[str, Any]:
+        """Readiness, the serving dataset version and how it was loaded."""
+        status: Dict[str, Any] = {"ready": self._ready}
+        if self._state is not None:
+            status.update(self._state.info())
+        status.update({"reloads": self._reloads, "last_reload_error": self._last_error,
+                       "watching": self._task is not None})
+        return status
+    
+    def resolve_ingredient(self, name: str, allow_partial: bool = False) -> Optional[NameMatch]:
+        """Resolve a Thai/English name, alias or typo to a dataset IngredientEntry.
+        
+        Partial matches ("milk" -> "Milk Wood") are only returned with ``allow_partial``,
+        since substituting for a different ingredient is worse than not resolving.
+        """
+        if not name or not name.strip():
+            return None
+        return self._current().name_resolver().resolve(name, allow_partial=allow_partial)
+    
+    def ingredient_names(self, name: str) -> List[str]:
+        """``name`` plus the canonical name and aliases of the entry it names exactly.
+        
+        Fuzzy look-alikes add nothing: "goat milk" must not count as "oat milk".
+        """
+        match = self.resolve_ingredient(name)
+        if match is None or match.match_type != "exact":
+            return [name]
+        return [name, match.value.canonical_name, *match.value.other_names]
+    
+    def canonical_ingredient(self, name: str) -> Optional[NameMatch]:
+        """Resolve ``name`` only when the match is the same ingredient: an exact name or
+        alias, or a near-certain typo. Fuzzy look-alikes ("oat milk" -> Goat Milk) are None.
+        """
+        match = self.resolve_ingredient(name)
+        if match is None or (match.match_type != "exact" and match.score < self.config.resolve_canonical_min_score):
+            return None
+        return match
+    
+    def suggest_ingredient_names(self, text: str, limit: int = 10) -> List[NameMatch]:
+        """Autocomplete ingredient names for a search box."""
+        if not text or not text.strip():
+            return []
+        return self._current().name_resolver().suggest(text, limit)
+    
+    def parse_context(self, description: str) -> ParsedContext:
+        """Parse a natural language description locally, with a confidence score."""
+        self._context_parses["parsed"] += 1
+        return self._current().context_parser().parse(description)
+    
+    def record_context_parse(self, escalated: bool):
+        """Count a description as answered locally or escalated to the LLM."""
+        self._context_parses["escalated" if escalated else "local_hits"] += 1
+        metrics.CONTEXT_PARSES.inc("escalated" if escalated else "local")
+    
+    def context_parser_stats(self) -> Dict[str, float]:
+        """Local context parser hit rate since the process started."""
+        stats = self._context_parses
+        decided = stats["local_hits"] + stats["escalated"]
+        return {**stats, "hit_rate": round(stats["local_hits"] / decided, 4) if decided else 0.0}
+    
+    def _resolve_context(self, state: DatasetState, query: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """Map context values onto the dataset vocabulary, tolerating typos and spelling variants."""
+        resolvers = state.attribute_resolvers()
+        resolved = dict(query)
+        for kind, resolver in resolvers.items():
+            value = query.get(kind)
+            if value and value.strip():
+                match = resolver.resolve(value)
+                if match:
+                    resolved[kind] = match.value
+        return resolved
+    
+    def get_substitute_ingredients(self, ingredient: str, max_results: int = 5,
+                                   include_reasoning: bool = False) -> SuggestionResult:
+        """Get substitutes from the precomputed dataset neighbor table."""
+        state = self._current()
+        engine = state.substitute_engine()
+        match = self.canonical_ingredient(ingredient)
+        if match:
+            ingredient = match.value.canonical_name
+        with metrics.DATASET_LATENCY.time("substitutes"):
+            neighbors = engine.substitutes(ingredient, max_results)
+        items = [name for name, _ in neighbors]
+        if not items:
+            return SuggestionResult([], "none")
+        
+        reasons = [engine.explain(ingredient, name) for name in items] if include_reasoning else None
+        return SuggestionResult(items, "dataset", reasons)
     
     def get_context_based_ingredients(self, taste: Optional[str] = None,
                                     texture: Optional[str] = None,
@@ -68,40 +438,38 @@ class DatasetService:
                                     cooking_method: Optional[str] = None,
                                     max_results: int = 10) -> SuggestionResult:
         """Get ingredients from dataset based on context."""
-        entries = self._load_entries()
-        if not entries:
-            return SuggestionResult([], "none")
-        
-        # Normalize query parameters
-        taste_q = taste.strip().casefold() if taste else None
-        texture_q = texture.strip().casefold() if texture else None
-        color_q = color.strip().casefold() if color else None
-        method_q = cooking_method.strip().casefold() if cooking_method else None
+        return self.get_context_based_ingredients_batch([{
+            "taste": taste,
+            "texture": texture,
+            "color": color,
+            "cooking_method": cooking_method,
+        }], max_results)[0]
+    
+    def get_context_based_ingredients_batch(self, queries: List[Dict[str, Optional[str]]],
+                                            max_results: int = 10) -> List[SuggestionResult]:
+        """Score many context queries at once; results are ordered by (-score, name)."""
+        state = self._current()
+        index = state.index()
+        if not len(index):
+            return [SuggestionResult([], "none") for _ in queries]
         
-        scored = []
-        seen = set()
+        queries = [self._resolve_context(state, q) for q in queries]
+        matrix = state.matrix()
+        with metrics.DATASET_LATENCY.time("context"):
+            if matrix is not None:
+                ranked = matrix.top_batch(queries, max_results)
+            else:
+                ranked = [index.weighted_top(q, self.config.context_weights, max_results) for q in queries]
         
-        for entry in entries:
-            score = 0
-            if taste_q and taste_q in to_casefold_set(entry.flavors):
-                score += 1
-            if texture_q and texture_q in to_casefold_set(entry.textures):
-                score += 1
-            if color_q and color_q in to_casefold_set(entry.colors):
-                score += 1
-            if method_q and method_q in to_casefold_set(entry.cook_methods):
-                score += 1
-            
-            if score == 0:
-                continue
-            
-            name = entry.canonical_name.strip()
-            if name and name not in seen:
-                scored.append((score, name))
-                seen.add(name)
-        
-        # Sort by score (desc) then name (asc) for stability
-        scored.sort(key=lambda t: (-t[0], t[1]))
-        items = [name for _, name in scored[:max_results]]
+        return [SuggestionResult(items, "dataset" if items else "none") for items in ranked]
+    
+    def query_ingredients(self, expression: str, max_results: int = 10) -> SuggestionResult:
+        """Get ingredients matching a boolean attribute query.
         
+        Example: ``Crunchy AND Fried AND NOT Sweet`` or ``texture:Soft OR color:Red``.
+        Raises ValueError if the expression is malformed.
+        """
+        index = self._current().index()
+        with metrics.DATASET_LATENCY.time("query"):
+            items = index.names_for(index.query(expression), max_results)
         return SuggestionResult(items, "dataset" if items else "none")
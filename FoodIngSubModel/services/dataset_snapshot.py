@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Dataset Snapshot for Recipe Suggestion System
+
+Compiles ingredients.json and the substitute neighbor table into one binary file:
+the ingredient store's vocabulary plus its id columns as fixed-width little-endian
+arrays in 8-byte aligned sections, so loading is a read and a few array copies
+instead of a JSON parse and an O(n^2) similarity build. The snapshot records the source file's hash and the engine
+settings, and is ignored when either no longer matches.
+
+    python -m services.dataset_snapshot            # writes config.dataset_snapshot_path
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from services.ingredient_store import LIST_FIELDS, STRING_FIELDS, IngredientStore
+
+
+MAGIC = b"FISNAP\x00\x01"
+FORMAT_VERSION = 2
+
+NeighborTable = List[List[Tuple[int, float]]]
+
+
+class Snapshot(NamedTuple):
+    store: IngredientStore
+    neighbors: NeighborTable
+    header: Dict[str, Any]
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, used to tie a snapshot to the JSON it was built from."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path: str, store: IngredientStore, neighbors: NeighborTable,
+                   source_digest: str, engine_signature: str) -> Dict[str, Any]:
+    """Write ``store`` and the neighbor table (rows index the engine's own ordering);
+    returns the snapshot header."""
+    sections: Dict[str, Tuple[str, bytes]] = {}
+    for name in STRING_FIELDS:
+        sections[name] = ("I", _little_endian(store.scalar_ids(name)))
+    for name in LIST_FIELDS:
+        sections[f"{name}.offsets"] = ("I", _little_endian(store.list_offsets(name)))
+        sections[f"{name}.values"] = ("I", _little_endian(store.list_ids(name)))
+
+    offsets, rows, scores = array("I", [0]), array("I"), array("d")
+    for row in neighbors:
+        rows.extend(j for j, _ in row)
+        scores.extend(s for _, s in row)
+        offsets.append(len(rows))
+    sections["neighbors.offsets"] = ("I", _little_endian(offsets))
+    sections["neighbors.rows"] = ("I", _little_endian(rows))
+    sections["neighbors.scores"] = ("d", _little_endian(scores))
+
+    blob = bytearray()
+    string_offsets = array("I", [0])
+    for value in store.strings:
+        blob += value.encode("utf-8")
+        string_offsets.append(len(blob))
+    sections["strings.offsets"] = ("I", _little_endian(string_offsets))
+    sections["strings.blob"] = ("B", bytes(blob))
+
+    layout, body, position = {}, bytearray(), 0
+    for name, (typecode, data) in sections.items():
+        layout[name] = [position, len(data), typecode]
+        body += data + b"\0" * (-len(data) % 8)
+        position = len(body)
+
+    header_fields = {
+        "format": FORMAT_VERSION,
+        "source_sha256": source_digest,
+        "engine": engine_signature,
+        "entries": len(store),
+        "strings": len(store.strings),
+        "list_fields": LIST_FIELDS,
+        "string_fields": STRING_FIELDS,
+        "sections": layout,
+    }
+    header = json.dumps(header_fields).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    # Written aside and renamed, so concurrent readers see the old or the new file
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(body)
+    os.replace(partial, path)
+    return header_fields
+
+
+def read_snapshot(path: str, source_digest: Optional[str] = None,
+                  engine_signature: Optional[str] = None) -> Optional[Snapshot]:
+    """Load a snapshot, or None if it is missing, malformed or stale."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+
+    header_len = int.from_bytes(data[len(MAGIC):len(MAGIC) + 4], "little")
+    base = len(MAGIC) + 4 + header_len
+    header = json.loads(data[len(MAGIC) + 4:base])
+    if (header.get("format") != FORMAT_VERSION
+            or tuple(header["list_fields"]) != LIST_FIELDS
+            or tuple(header["string_fields"]) != STRING_FIELDS
+            or (source_digest is not None and header["source_sha256"] != source_digest)
+            or (engine_signature is not None and header["engine"] != engine_signature)):
+        return None
+
+    view = memoryview(data)
+
+    def section(name: str):
+        offset, length, typecode = header["sections"][name]
+        values = view[base + offset:base + offset + length].cast(typecode)
+        if sys.byteorder != "little" and typecode != "B":
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    string_offsets = section("strings.offsets")
+    blob = bytes(section("strings.blob"))
+    strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode("utf-8")
+               for i in range(len(string_offsets) - 1)]
+
+    store = IngredientStore.from_columns(
+        strings,
+        {name: section(name) for name in STRING_FIELDS},
+        {name: section(f"{name}.offsets") for name in LIST_FIELDS},
+        {name: section(f"{name}.values") for name in LIST_FIELDS},
+    )
+
+    offsets, rows, scores = section("neighbors.offsets"), section("neighbors.rows"), section("neighbors.scores")
+    neighbors = [list(zip(rows[offsets[r]:offsets[r + 1]].tolist(), scores[offsets[r]:offsets[r + 1]].tolist()))
+                 for r in range(len(offsets) - 1)]
+    return Snapshot(store, neighbors, header)
+
+
+def main():
+    from config import Config
+    from services.dataset_service import DatasetService
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="Compile the ingredient dataset into a binary snapshot")
+    parser.add_argument("--output", default=config.dataset_snapshot_path or "", help="Snapshot path")
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("no output path (set DATASET_SNAPSHOT_PATH or pass --output)")
+
+    config.dataset_snapshot_path = args.output
+    header = DatasetService(config).build_snapshot()
+    print(f"Wrote {args.output}: {header['entries']} entries, {header['strings']} strings")
+
+
+if __name__ == "__main__":
+    main()
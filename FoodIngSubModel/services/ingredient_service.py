@@ -5,48 +5,149 @@ Ingredient Service for Recipe Suggestion System
 Main service for ingredient-related operations, combining OpenAI and dataset services.
 """
 
-from typing import Optional
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from config import Config
-from models import SuggestionResult
-from services.openai_service import OpenAIService
+from models import NameMatch, SuggestionResult
+from services.async_openai_service import AsyncOpenAIService
 from services.dataset_service import DatasetService
+from utils import logger
+
+
+# Substitute tiers still running after their request returned
+_background: Set[asyncio.Task] = set()
 
 
 class IngredientService:
     """Main service for ingredient-related operations."""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, openai_service: Optional[AsyncOpenAIService] = None):
         self.config = config
-        self.openai_service = OpenAIService(config)
+        self.openai_service = openai_service or AsyncOpenAIService(config)
         self.dataset_service = DatasetService(config)
     
-    def get_substitutes(self, ingredient: str, recipe: str = "General Recipe",
+    async def get_substitutes(self, ingredient: str, recipe: str = "General Recipe",
                        max_results: Optional[int] = None,
                        include_reasoning: bool = False) -> SuggestionResult:
-        """Get ingredient substitutes with fallback strategy."""
+        """Get ingredient substitutes from the first tier that answers within the deadline.
+        
+        ``source`` reports the winning tier: "gpt", "dataset", "gpt_context" or "none".
+        """
         max_results = max_results or self.config.max_substitutes
         
-        # Try OpenAI first
-        if self.openai_service.is_available:
-            result = self.openai_service.get_substitute_ingredients(
-                ingredient, recipe, max_results, include_reasoning
-            )
-            if result.items:
-                return result
+        # Precomputed dataset neighbors answer instantly when configured as first tier; the
+        # dataset tier maps Thai names and aliases to the canonical name, the LLM gets the
+        # user's own text
+        dataset_result = self.dataset_service.get_substitute_ingredients(
+            ingredient, max_results, include_reasoning
+        )
+        if self.config.substitute_dataset_first and dataset_result.items:
+            return dataset_result
         
-        # Fallback to context-based suggestions
-        if self.openai_service.is_available:
-            result = self.openai_service.get_context_based_ingredients(
-                recipe_title=recipe, max_results=max_results
-            )
-            if result.items:
-                result.source = "gpt_context"
-                return result
+        if not self.openai_service.is_available:
+            return dataset_result if dataset_result.items else SuggestionResult([], "none")
         
+        # Tier preference is gpt > dataset > gpt_context. The dataset answer is already
+        # in hand, so the context tier is only worth hedging when it came back empty.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.substitute_deadline
+        hedge_at = loop.time() + self.config.substitute_hedge_delay
+        primary = asyncio.ensure_future(self.openai_service.get_substitute_ingredients(
+            ingredient, recipe, max_results, include_reasoning
+        ))
+        hedge = None
+        pending = {primary}
+        try:
+            while True:
+                if hedge is None and not dataset_result.items and (primary.done() or loop.time() >= hedge_at):
+                    hedge = asyncio.ensure_future(self._get_context_substitutes(recipe, max_results))
+                    pending.add(hedge)
+                
+                now = loop.time()
+                if not pending or now >= deadline:
+                    break
+                timeout = deadline - now
+                if hedge is None and not dataset_result.items:
+                    timeout = min(timeout, hedge_at - now)
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in (primary, hedge):
+                    if task in done and task.result().items:
+                        return task.result()
+                if primary.done() and dataset_result.items:
+                    return dataset_result
+        finally:
+            # Abandoned tiers finish in the background: they may be shared with other
+            # requests through single-flight, and their answers still fill the cache
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    _background.add(task)
+                    task.add_done_callback(_background.discard)
+        
+        if dataset_result.items:
+            return dataset_result
         return SuggestionResult([], "none")
     
-    def get_context_suggestions(self, taste: Optional[str] = None,
+    async def get_substitutes_batch(self, pairs: List[Tuple[str, str]],
+                                    max_results: Optional[int] = None) -> List[SuggestionResult]:
+        """Substitutes for many (ingredient, recipe) pairs, packed into few LLM calls.
+        
+        Pairs the LLM leaves unanswered fall back to the dataset neighbor table.
+        """
+        max_results = max_results or self.config.max_substitutes
+        
+        results: List[Optional[SuggestionResult]] = [None] * len(pairs)
+        if self.openai_service.is_available:
+            size = max(self.config.substitute_batch_size, 1)
+            chunks = [list(range(i, min(i + size, len(pairs)))) for i in range(0, len(pairs), size)]
+            answered = await asyncio.gather(*(
+                self._substitute_chunk([pairs[i] for i in chunk], max_results) for chunk in chunks
+            ))
+            for chunk, chunk_results in zip(chunks, answered):
+                for i, result in zip(chunk, chunk_results):
+                    results[i] = result
+        
+        for i, (ingredient, _) in enumerate(pairs):
+            if results[i] is None or not results[i].items:
+                dataset_result = self.dataset_service.get_substitute_ingredients(ingredient, max_results)
+                results[i] = dataset_result if dataset_result.items else SuggestionResult([], "none")
+        return results
+    
+    async def _substitute_chunk(self, pairs: List[Tuple[str, str]],
+                                max_results: int) -> List[Optional[SuggestionResult]]:
+        """One batched completion; unanswered pairs are retried in halves, then singly."""
+        if len(pairs) == 1:
+            ingredient, recipe = pairs[0]
+            return [await self.openai_service.get_substitute_ingredients(ingredient, recipe, max_results)]
+        
+        results = await self.openai_service.get_substitute_ingredients_batch(pairs, max_results)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        
+        logger.warning(f"Batch substitute response missed {len(missing)}/{len(pairs)} items, splitting")
+        half = (len(missing) + 1) // 2
+        retried = await asyncio.gather(*(
+            self._substitute_chunk([pairs[i] for i in part], max_results)
+            for part in (missing[:half], missing[half:]) if part
+        ))
+        for part, part_results in zip((missing[:half], missing[half:]), retried):
+            for i, result in zip(part, part_results):
+                results[i] = result
+        return results
+    
+    async def _get_context_substitutes(self, recipe: str, max_results: int) -> SuggestionResult:
+        """Last-resort tier: ingredients GPT associates with the recipe."""
+        result = await self.openai_service.get_context_based_ingredients(
+            recipe_title=recipe, max_results=max_results
+        )
+        if result.items:
+            result.source = "gpt_context"
+        return result
+    
+    async def get_context_suggestions(self, taste: Optional[str] = None,
                               texture: Optional[str] = None,
                               color: Optional[str] = None,
                               cooking_method: Optional[str] = None,
@@ -56,9 +157,10 @@ class IngredientService:
         """Get ingredients based on context with hybrid approach."""
         max_results = max_results or self.config.max_ingredients
         
-        # Parse natural language description if provided
-        if natural_description and self.openai_service.is_available:
-            parsed_context = self.openai_service.parse_natural_language_context(natural_description)
+        # Parse natural language description if provided: locally when the parser is
+        # confident, otherwise through the LLM
+        if natural_description:
+            parsed_context = await self._parse_description(natural_description)
             # Use parsed values if individual attributes not provided
             taste = taste or parsed_context.get("taste")
             texture = texture or parsed_context.get("texture")
@@ -70,6 +172,48 @@ class IngredientService:
             taste, texture, color, cooking_method, max_results
         )
         
+        return await self._supplement_with_gpt(dataset_result, taste, texture, color,
+                                         cooking_method, recipe_title, max_results)
+    
+    async def _parse_description(self, description: str) -> Dict[str, Optional[str]]:
+        """Context attributes from a description, escalating to the LLM on low confidence."""
+        local = self.dataset_service.parse_context(description)
+        escalate = (local.confidence < self.config.context_parser_min_confidence
+                    and self.openai_service.is_available)
+        self.dataset_service.record_context_parse(escalated=escalate)
+        if not escalate:
+            return local.context
+        
+        parsed = await self.openai_service.parse_natural_language_context(description)
+        return parsed if any(parsed.values()) else local.context
+    
+    async def get_context_suggestions_batch(self, queries: List[Dict[str, Optional[str]]],
+                                      max_results: Optional[int] = None) -> List[SuggestionResult]:
+        """Get context suggestions for many queries, scoring the dataset in one pass.
+        
+        At most ``config.context_batch_concurrency`` GPT top-ups are in flight.
+        """
+        max_results = max_results or self.config.max_ingredients
+        
+        dataset_results = self.dataset_service.get_context_based_ingredients_batch(queries, max_results)
+        semaphore = asyncio.Semaphore(max(1, self.config.context_batch_concurrency))
+        
+        async def supplement(q: Dict[str, Optional[str]], result: SuggestionResult) -> SuggestionResult:
+            if len(result.items) >= max_results:
+                return result
+            async with semaphore:
+                return await self._supplement_with_gpt(result, q.get("taste"), q.get("texture"), q.get("color"),
+                                                       q.get("cooking_method"), q.get("recipe_title"), max_results)
+        
+        return list(await asyncio.gather(*(
+            supplement(q, result) for q, result in zip(queries, dataset_results)
+        )))
+    
+    async def _supplement_with_gpt(self, dataset_result: SuggestionResult,
+                             taste: Optional[str], texture: Optional[str],
+                             color: Optional[str], cooking_method: Optional[str],
+                             recipe_title: Optional[str], max_results: int) -> SuggestionResult:
+        """Top up a short dataset result with GPT suggestions."""
         if len(dataset_result.items) >= max_results:
             return dataset_result
         
@@ -77,7 +221,7 @@ class IngredientService:
         if not self.openai_service.is_available:
             return dataset_result
         
-        gpt_result = self.openai_service.get_context_based_ingredients(
+        gpt_result = await self.openai_service.get_context_based_ingredients(
             taste, texture, color, cooking_method, recipe_title, max_results
         )
         
@@ -110,3 +254,26 @@ class IngredientService:
             source = "none"
         
         return SuggestionResult(merged_items[:max_results], source)
+    
+    def query_ingredients(self, expression: str, max_results: Optional[int] = None) -> SuggestionResult:
+        """Get dataset ingredients matching a boolean attribute query."""
+        max_results = max_results or self.config.max_ingredients
+        return self.dataset_service.query_ingredients(expression, max_results)
+    
+    def resolve_ingredient(self, text: str, limit: int = 10) -> Dict[str, Any]:
+        """Resolve a typed name and return the best match plus autocomplete suggestions."""
+        match = self.dataset_service.resolve_ingredient(text, allow_partial=True)
+        suggestions = self.dataset_service.suggest_ingredient_names(text, limit)
+        
+        def as_dict(m: NameMatch) -> Dict[str, Any]:
+            return {
+                "name": m.value.canonical_name,
+                "matched": m.matched,
+                "score": m.score,
+                "match_type": m.match_type,
+            }
+        
+        return {
+            "match": as_dict(match) if match else None,
+            "suggestions": [as_dict(m) for m in suggestions],
+        }
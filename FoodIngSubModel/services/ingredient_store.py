@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Ingredient Store for Recipe Suggestion System
+
+Columnar storage for the ingredient dataset. Every name and property value is
+interned once into a shared vocabulary, and each property is kept as arrays of
+vocabulary ids (offsets plus values for list properties), so a value costs four
+bytes per occurrence instead of a string and a list slot. ``IngredientRow`` views
+expose a row with the same attributes as ``IngredientEntry``.
+"""
+
+from array import array
+from dataclasses import fields
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from models import IngredientEntry
+
+
+# IngredientEntry fields stored as string lists vs single strings
+LIST_FIELDS = tuple(f.name for f in fields(IngredientEntry) if f.type in (List[str], "List[str]"))
+STRING_FIELDS = tuple(f.name for f in fields(IngredientEntry) if f.type in (str, "str"))
+
+# ingredients.json property -> IngredientEntry field
+PROPERTY_FIELDS: Dict[str, str] = {
+    "hasOtherNames": "other_names",
+    "hasFlavor": "flavors",
+    "hasTexture": "textures",
+    "hasColor": "colors",
+    "canCook": "cook_methods",
+    "hasNutrient": "nutrients",
+    "hasMineral": "minerals",
+    "hasVitamin": "vitamins",
+    "hasType": "types",
+    "hasBenefit": "benefits",
+    "hasShape": "shapes",
+    "hasSugar": "sugars",
+}
+
+
+def _id_array(ids: Sequence[int]) -> array:
+    column = array("I")
+    if isinstance(ids, (array, memoryview)):
+        column.frombytes(memoryview(ids).cast("B"))  # one buffer copy instead of boxing every id
+    else:
+        column.extend(ids)
+    return column
+
+
+class IngredientStore:
+    """Append-only, vocabulary-interned columns of ingredient entries.
+
+    Rows keep insertion (file) order. Row views are created on first access and
+    reused, so the same row is always the same object.
+    """
+
+    def __init__(self):
+        self._strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._scalars: Dict[str, array] = {name: array("I") for name in STRING_FIELDS}
+        self._offsets: Dict[str, array] = {name: array("I", [0]) for name in LIST_FIELDS}
+        self._values: Dict[str, array] = {name: array("I") for name in LIST_FIELDS}
+        self._rows: List[Optional["IngredientRow"]] = []
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[IngredientEntry]) -> "IngredientStore":
+        store = cls()
+        for entry in entries:
+            store.append(**{name: getattr(entry, name) for name in STRING_FIELDS + LIST_FIELDS})
+        return store
+
+    @classmethod
+    def from_columns(cls, strings: List[str], scalars: Dict[str, Sequence[int]],
+                     offsets: Dict[str, Sequence[int]], values: Dict[str, Sequence[int]]) -> "IngredientStore":
+        """Adopt already-interned columns (e.g. from a dataset snapshot) without decoding rows."""
+        store = cls()
+        store._strings = list(strings)
+        store._ids = {value: i for i, value in enumerate(store._strings)}
+        store._scalars = {name: _id_array(scalars[name]) for name in STRING_FIELDS}
+        store._offsets = {name: _id_array(offsets[name]) for name in LIST_FIELDS}
+        store._values = {name: _id_array(values[name]) for name in LIST_FIELDS}
+        store._rows = [None] * len(store._scalars[STRING_FIELDS[0]]) if STRING_FIELDS else []
+        return store
+
+    def intern(self, value: str) -> int:
+        """Vocabulary id of ``value``, adding it if new."""
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return value_id
+
+    def append(self, **values: Union[str, Iterable[str]]) -> "IngredientRow":
+        """Add a row; missing fields are empty."""
+        intern = self.intern
+        for name in STRING_FIELDS:
+            self._scalars[name].append(intern(values.get(name) or ""))
+        for name in LIST_FIELDS:
+            column = self._values[name]
+            column.extend([intern(v) for v in values.get(name) or ()])
+            self._offsets[name].append(len(column))
+        self._rows.append(None)
+        return self[len(self._rows) - 1]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, row: int) -> "IngredientRow":
+        view = self._rows[row]
+        if view is None:
+            view = self._rows[row] = IngredientRow(self, row % len(self._rows))
+        return view
+
+    def __iter__(self) -> Iterator["IngredientRow"]:
+        return (self[row] for row in range(len(self._rows)))
+
+    @property
+    def strings(self) -> List[str]:
+        """The vocabulary, indexed by id."""
+        return self._strings
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Vocabulary id of ``value``, or None if it never occurs."""
+        return self._ids.get(value)
+
+    def scalar_ids(self, name: str) -> array:
+        return self._scalars[name]
+
+    def list_ids(self, name: str) -> array:
+        return self._values[name]
+
+    def list_offsets(self, name: str) -> array:
+        return self._offsets[name]
+
+    def value(self, name: str, row: int) -> str:
+        return self._strings[self._scalars[name][row]]
+
+    def value_ids(self, name: str, row: int) -> array:
+        offsets = self._offsets[name]
+        return self._values[name][offsets[row]:offsets[row + 1]]
+
+    def values(self, name: str, row: int) -> List[str]:
+        offsets, strings, column = self._offsets[name], self._strings, self._values[name]
+        return [strings[column[i]] for i in range(offsets[row], offsets[row + 1])]
+
+    def vocabulary(self, name: str) -> List[str]:
+        """Distinct values of a field, sorted."""
+        column = self._scalars[name] if name in self._scalars else self._values[name]
+        return sorted({self._strings[i] for i in column})
+
+    def nbytes(self) -> int:
+        """Approximate size of the id columns (the vocabulary strings are extra)."""
+        columns = list(self._scalars.values()) + list(self._offsets.values()) + list(self._values.values())
+        return sum(len(column) * column.itemsize for column in columns)
+
+
+class IngredientRow:
+    """Read-only view of one store row with the ``IngredientEntry`` attributes."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: IngredientStore, row: int):
+        self._store = store
+        self._row = row
+
+    def to_entry(self) -> IngredientEntry:
+        return IngredientEntry(**{name: getattr(self, name) for name in STRING_FIELDS + LIST_FIELDS})
+
+    def __repr__(self) -> str:
+        return f"IngredientRow({self._row}, {self.canonical_name!r})"
+
+
+def _scalar_property(name: str) -> property:
+    return property(lambda self: self._store.value(name, self._row))
+
+
+def _list_property(name: str) -> property:
+    return property(lambda self: self._store.values(name, self._row))
+
+
+for _name in STRING_FIELDS:
+    setattr(IngredientRow, _name, _scalar_property(_name))
+for _name in LIST_FIELDS:
+    setattr(IngredientRow, _name, _list_property(_name))
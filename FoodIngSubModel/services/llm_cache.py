@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache for Recipe Suggestion System
+
+Content-addressed cache for chat completions with an in-memory LRU tier and an
+on-disk SQLite tier, per-method TTLs, size-bounded eviction and hit/miss counters.
+The async service uses ``aget``/``aset``, which run SQLite work in a worker thread.
+"""
+
+import os
+import asyncio
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from config import Config
+from utils import logger
+
+
+class LLMCache:
+    """Two-tier (memory LRU + SQLite) cache for LLM responses."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._lock = threading.Lock()  # memory tier and counters
+        self._db_lock = threading.Lock()  # SQLite connection
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._db: Optional[sqlite3.Connection] = None
+        # Running row count: over the bound, a batch of rows is evicted at once
+        self._disk_entries = 0
+        self._initialize_disk()
+
+    def _initialize_disk(self):
+        """Open (or create) the SQLite tier."""
+        path = self.config.llm_cache_path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, method TEXT, value TEXT, "
+                "expires_at REAL, last_access REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_access ON llm_cache (last_access)")
+            (self._disk_entries,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            logger.info(f"LLM cache disk tier at {path}")
+        except Exception as e:
+            logger.error(f"Failed to open LLM cache at {path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_message: str,
+                 user_message: str, max_tokens: int) -> str:
+        """Content hash of everything that determines the completion."""
+        payload = json.dumps([model, temperature, system_message, user_message, max_tokens],
+                             ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, method: str) -> int:
+        """TTL in seconds for a method (0 disables caching)."""
+        return int(self.config.llm_cache_ttls.get(method, self.config.llm_cache_default_ttl))
+
+    def get(self, key: str, method: str = "default") -> Optional[str]:
+        """Look a response up in memory, then on disk."""
+        value = self._memory_get(key, method)
+        return value if value is not None else self._disk_get(key, method)
+
+    async def aget(self, key: str, method: str = "default") -> Optional[str]:
+        """``get`` for the event loop: a memory miss is looked up on disk in a worker thread."""
+        value = self._memory_get(key, method)
+        if value is not None or self._db is None:
+            return value if value is not None else self._disk_get(key, method)
+        return await asyncio.to_thread(self._disk_get, key, method)
+
+    def _memory_get(self, key: str, method: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is None:
+                return None
+            expires_at, value = hit
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._stats[method]["memory_hits"] += 1
+                return value
+            del self._memory[key]
+            return None
+
+    def _disk_get(self, key: str, method: str) -> Optional[str]:
+        """Disk lookup after a memory miss; counts the hit or the miss."""
+        now = time.time()
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        self._db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                    elif row:
+                        self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        self._disk_entries -= 1
+                        row = None
+                except sqlite3.Error as e:
+                    logger.debug(f"LLM cache read failed: {e}")
+                    row = None
+        with self._lock:
+            if row:
+                self._remember(key, row[1], row[0])
+                self._stats[method]["disk_hits"] += 1
+                return row[0]
+            self._stats[method]["misses"] += 1
+            return None
+
+    async def apeek(self, key: str) -> Optional[str]:
+        """Look a response up without touching hit/miss counters or recency.
+
+        A memory miss is looked up on disk in a worker thread.
+        """
+        value = self._memory_peek(key)
+        if value is not None or self._db is None:
+            return value
+        return await asyncio.to_thread(self._disk_peek, key)
+
+    def _memory_peek(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None and hit[0] > time.time():
+                return hit[1]
+        return None
+
+    def _disk_peek(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug(f"LLM cache read failed: {e}")
+                return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, method: str = "default"):
+        """Store a response in both tiers using the method's TTL."""
+        expires_at = self._memory_set(key, value, method)
+        if expires_at is not None:
+            self._disk_set(key, value, method, expires_at)
+
+    async def aset(self, key: str, value: str, method: str = "default"):
+        """``set`` for the event loop: the disk write runs in a worker thread."""
+        expires_at = self._memory_set(key, value, method)
+        if expires_at is not None and self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, method, expires_at)
+
+    def _memory_set(self, key: str, value: str, method: str) -> Optional[float]:
+        """Store in memory; returns the expiry, or None when the method is not cached."""
+        ttl = self.ttl_for(method)
+        if ttl <= 0 or not value:
+            return None
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats[method]["stores"] += 1
+        return expires_at
+
+    def _disk_set(self, key: str, value: str, method: str, expires_at: float):
+        if self._db is None:
+            return
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, method, value, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)", (key, method, value, expires_at, time.time())
+                )
+                # Replacements are counted too; eviction recounts before deleting anything
+                self._disk_entries += 1
+                if self._disk_entries > self.config.llm_cache_disk_entries:
+                    self._evict_disk()
+            except sqlite3.Error as e:
+                logger.debug(f"LLM cache write failed: {e}")
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.llm_cache_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["_all"]["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        """Drop expired rows, then least recently used rows down to 95% of the bound.
+
+        Evicting a batch below the bound keeps the COUNT and DELETE scans to one
+        per ~5% of the bound writes instead of one per write.
+        """
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        bound = self.config.llm_cache_disk_entries
+        excess = count - (bound - bound // 20) if count > bound else 0
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)", (excess,)
+            )
+            with self._lock:
+                self._stats["_all"]["disk_evictions"] += excess
+        self._disk_entries = count - max(excess, 0)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._disk_entries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per method plus tier sizes."""
+        with self._lock:
+            per_method = {m: dict(c) for m, c in self._stats.items() if m != "_all"}
+            hits = sum(c.get("memory_hits", 0) + c.get("disk_hits", 0) for c in per_method.values())
+            misses = sum(c.get("misses", 0) for c in per_method.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries,
+                "evictions": dict(self._stats["_all"]),
+                "methods": per_method,
+            }
+
+
+_shared_caches: Dict[str, LLMCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_llm_cache(config: Config) -> LLMCache:
+    """Process-wide cache per disk path, shared by every OpenAIService instance."""
+    with _shared_lock:
+        cache = _shared_caches.get(config.llm_cache_path)
+        if cache is None:
+            cache = _shared_caches[config.llm_cache_path] = LLMCache(config)
+        return cache
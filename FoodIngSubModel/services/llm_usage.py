@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+LLM Usage Accounting for Recipe Suggestion System
+
+Per-method token, latency and finish_reason accounting for chat completions, per
+prompt template prefix-cache hit ratios, and adaptive max_tokens budgets derived
+from the observed completion lengths.
+"""
+
+import math
+import threading
+from collections import Counter, defaultdict, deque
+from typing import Any, Deque, Dict, Optional
+
+from config import Config
+from services import metrics
+from services.prompts import PROMPTS
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of a sample collection (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return float(ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))])
+
+
+class _MethodUsage:
+    __slots__ = ("calls", "errors", "retries", "prompt_tokens", "completion_tokens", "cached_tokens",
+                 "finish_reasons", "latencies", "completions", "truncations", "budget")
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.finish_reasons: Counter = Counter()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.completions: Deque[int] = deque(maxlen=window)
+        self.truncations: Deque[bool] = deque(maxlen=window)
+        self.budget: Optional[int] = None
+
+
+class LLMUsageTracker:
+    """Thread-safe per-method usage counters with rolling percentile windows.
+
+    In adaptive mode, ``budget`` lowers a method's max_tokens to the observed p99
+    completion length plus headroom, never above the call site's own value, and
+    backs off toward it when truncations show up in the window.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _MethodUsage] = defaultdict(lambda: _MethodUsage(config.llm_usage_window))
+
+    def record(self, method: str, latency: float, usage: Any, finish_reason: Optional[str],
+               max_tokens: int, retry: bool = False):
+        """Account one completed request; ``usage`` is the response's usage object."""
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        truncated = finish_reason == "length"
+        metrics.LLM_LATENCY.observe(latency, method, "truncated" if truncated else "ok")
+        metrics.LLM_TOKENS.inc(method, "prompt", amount=prompt)
+        metrics.LLM_TOKENS.inc(method, "completion", amount=completion)
+        metrics.LLM_TOKENS.inc(method, "cached", amount=cached)
+        with self._lock:
+            stats = self._methods[method]
+            stats.calls += 1
+            stats.retries += retry
+            stats.prompt_tokens += prompt
+            stats.completion_tokens += completion
+            stats.cached_tokens += cached
+            stats.finish_reasons[finish_reason or "unknown"] += 1
+            stats.latencies.append(latency)
+            # Truncated completions only say "at least max_tokens", so they push the
+            # length percentile up instead of being taken at face value
+            stats.completions.append(max(completion, max_tokens if truncated else 0))
+            stats.truncations.append(truncated)
+            self._adapt(stats)
+
+    def record_error(self, method: str, latency: float):
+        metrics.LLM_LATENCY.observe(latency, method, "error")
+        metrics.ERRORS.inc("openai")
+        with self._lock:
+            stats = self._methods[method]
+            stats.errors += 1
+            stats.latencies.append(latency)
+
+    def _adapt(self, stats: _MethodUsage):
+        if len(stats.completions) < self.config.adaptive_max_tokens_min_samples:
+            return
+        recent = list(stats.truncations)[-self.config.adaptive_max_tokens_min_samples:]
+        if stats.budget is not None and any(recent):
+            # Truncations at the reduced budget: back off and let the window re-settle
+            stats.budget = None
+            stats.truncations.clear()
+            stats.completions.clear()
+            return
+        target = percentile(stats.completions, 99) * self.config.adaptive_max_tokens_headroom
+        stats.budget = max(self.config.adaptive_max_tokens_floor, int(math.ceil(target / 16.0)) * 16)
+
+    def budget(self, method: str, max_tokens: int) -> int:
+        """max_tokens to send for ``method`` (the call site's value unless adaptive mode lowers it)."""
+        if not self.config.adaptive_max_tokens:
+            return max_tokens
+        with self._lock:
+            stats = self._methods.get(method)
+            budget = stats.budget if stats is not None else None
+        return min(budget, max_tokens) if budget else max_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            methods, templates = {}, {}
+            for method, s in self._methods.items():
+                answered = len(s.truncations)
+                methods[method] = {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "retries": s.retries,
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                    "cached_tokens": s.cached_tokens,
+                    "cached_token_ratio": round(s.cached_tokens / s.prompt_tokens, 4) if s.prompt_tokens else 0.0,
+                    "finish_reasons": dict(s.finish_reasons),
+                    "truncation_rate": round(sum(s.truncations) / answered, 4) if answered else 0.0,
+                    "latency_ms": {f"p{q}": round(percentile(s.latencies, q) * 1000, 1) for q in (50, 95, 99)},
+                    "completion_tokens_pct": {f"p{q}": percentile(s.completions, q) for q in (50, 95, 99)},
+                    "max_tokens_budget": s.budget,
+                }
+                template = PROMPTS.get(method)
+                if template is not None:
+                    # Providers only cache prompts past a minimum length (1024 tokens for
+                    # OpenAI), so short templates report 0 however stable their prefix is
+                    templates[template.id] = {
+                        **template.info(),
+                        "calls": s.calls,
+                        "prompt_tokens_per_call": round(s.prompt_tokens / s.calls, 1) if s.calls else 0.0,
+                        "cached_token_ratio": methods[method]["cached_token_ratio"],
+                    }
+            return {"adaptive_max_tokens": self.config.adaptive_max_tokens, "methods": methods,
+                    "templates": templates}
+
+
+_shared_tracker: Optional[LLMUsageTracker] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_usage(config: Config) -> LLMUsageTracker:
+    """Process-wide tracker shared by every OpenAIService instance."""
+    global _shared_tracker
+    with _shared_lock:
+        if _shared_tracker is None:
+            _shared_tracker = LLMUsageTracker(config)
+        return _shared_tracker
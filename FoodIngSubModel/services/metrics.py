@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Metrics for Recipe Suggestion System
+
+Minimal Prometheus-compatible counters, gauges and histograms (text exposition
+format 0.0.4) plus the ASGI middleware that times every route. Updates are a lock,
+a dict lookup and, for histograms, a bisect, so collection stays on in production.
+"""
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.register(self)
+
+    def clear(self):
+        """Drop every label set (e.g. a version label that is no longer current)."""
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    @contextmanager
+    def track(self, *labels: str):
+        """Count the enclosed block as in flight."""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    _samples = Counter._samples
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set (buckets are upper bounds in seconds)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        """Observe the wall time of the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status.",
+                        ("route", "method", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds",
+                         "HTTP request latency by route, until the last body chunk is sent.",
+                         ("route", "method"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served by route.", ("route",))
+
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "OpenAI chat completion latency by method.",
+                        ("method", "outcome"))
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "OpenAI chat completions in flight by method.", ("method",))
+LLM_TOKENS = Counter("llm_tokens_total", "OpenAI tokens by method and kind (prompt, completion, cached).",
+                     ("method", "kind"))
+PROMPT_TRIMMED = Counter("llm_prompt_trimmed_total",
+                         "Prompts whose user message was trimmed to the template's input-token budget.",
+                         ("method",))
+
+SUPABASE_LATENCY = Histogram("supabase_query_duration_seconds", "Supabase query latency by table.",
+                             ("table", "outcome"))
+DATASET_LATENCY = Histogram("dataset_scoring_duration_seconds",
+                            "In-process dataset and recipe index scoring time by operation.",
+                            ("operation",), buckets=FAST_BUCKETS)
+DATASET_LOADED = Gauge("dataset_loaded_timestamp_seconds",
+                       "Unix time the serving ingredient dataset version was loaded.", ("version",))
+
+CONTEXT_PARSES = Counter("context_parse_total",
+                         "Natural-language context descriptions answered locally or escalated to the LLM.",
+                         ("outcome",))
+RESULT_SOURCES = Counter("suggestion_results_total",
+                         "Results served by operation and source (gpt, dataset, dataset+gpt, gpt_context, ...).",
+                         ("operation", "source"))
+ERRORS = Counter("errors_total", "Errors by component.", ("component",))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Routes are labelled by their declared path; anything else is "other" so scanners
+    cannot blow up label cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {getattr(route, "path", None) for route in getattr(scope.get("app"), "routes", [])}
+        path = scope.get("path", "")
+        return path if path in self._routes else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        method = scope.get("method", "")
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            ERRORS.inc("http")
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec(route)
+            HTTP_LATENCY.observe(time.perf_counter() - started, route, method)
+            HTTP_REQUESTS.inc(route, method, status)
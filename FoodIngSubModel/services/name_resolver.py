@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Name Resolver for Recipe Suggestion System
+
+Resolves user-typed names (Thai or English, possibly misspelled) to canonical dataset
+values using an exact hash map, a prefix trie for autocomplete and a character
+n-gram index for fuzzy matching.
+"""
+
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models import NameMatch
+
+
+NGRAM_SIZE = 3
+
+# Fuzzy candidates re-ranked with SequenceMatcher after n-gram retrieval
+_FUZZY_CANDIDATES = 20
+_PARTIAL_DISCOUNT = 0.95
+
+
+def normalize_name(text: str) -> str:
+    """Casefold and collapse whitespace and punctuation for name comparison."""
+    # Thai vowel and tone marks are not \w, so the Thai block is kept explicitly
+    text = re.sub(r"[^\w\s\u0E00-\u0E7F]", " ", (text or "").casefold())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _ngrams(key: str) -> List[str]:
+    padded = f" {key} "
+    if len(padded) <= NGRAM_SIZE:
+        return [padded]
+    return [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+
+
+class _TrieNode:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.best: List[int] = []
+
+
+class NameResolver:
+    """Exact, prefix and fuzzy lookup over (name, target) pairs.
+
+    Earlier pairs win when two targets share a name, so callers should pass
+    canonical names before aliases.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, Any]], suggest_limit: int = 10,
+                 min_score: float = 0.75):
+        self._keys: List[str] = []
+        self._labels: List[str] = []
+        self._targets: List[Any] = []
+        self._exact: Dict[str, int] = {}
+        self._suggest_limit = suggest_limit
+        self._min_score = min_score
+
+        for name, target in pairs:
+            key = normalize_name(name)
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = len(self._keys)
+            self._keys.append(key)
+            self._labels.append(str(name).strip())
+            self._targets.append(target)
+
+        # Trie over every word start, so "egg" completes "Hen Egg"; each node keeps
+        # its best few key ids (shortest first) so autocomplete never walks subtrees
+        self._root = _TrieNode()
+        for key_id in sorted(range(len(self._keys)), key=lambda i: (len(self._keys[i]), self._keys[i])):
+            key = self._keys[key_id]
+            starts = [0] + [m.end() for m in re.finditer(r" ", key)]
+            for start in starts:
+                node = self._root
+                for ch in key[start:]:
+                    node = node.children.setdefault(ch, _TrieNode())
+                    if len(node.best) < suggest_limit and key_id not in node.best:
+                        node.best.append(key_id)
+
+        self._grams: Dict[str, List[int]] = {}
+        for key_id, key in enumerate(self._keys):
+            for gram in set(_ngrams(key)):
+                self._grams.setdefault(gram, []).append(key_id)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def suggest_limit(self) -> int:
+        """Most prefix completions a query can return (kept per trie node)."""
+        return self._suggest_limit
+
+    def _match(self, key_id: int, score: float, match_type: str) -> NameMatch:
+        return NameMatch(self._targets[key_id], self._labels[key_id], round(score, 4), match_type)
+
+    def lookup(self, name: str) -> Optional[NameMatch]:
+        """Exact (normalized) lookup."""
+        key_id = self._exact.get(normalize_name(name))
+        return self._match(key_id, 1.0, "exact") if key_id is not None else None
+
+    def resolve(self, name: str, min_score: Optional[float] = None,
+                allow_partial: bool = True) -> Optional[NameMatch]:
+        """Exact lookup, falling back to the best fuzzy match above ``min_score``.
+        
+        With ``allow_partial=False``, matches on only the leading words of a longer
+        name ("milk" -> "Milk Wood") are skipped.
+        """
+        match = self.lookup(name)
+        if match:
+            return match
+        for match in self.fuzzy(name, 5 if not allow_partial else 1, min_score):
+            if allow_partial or match.match_type != "partial":
+                return match
+        return None
+
+    def prefix(self, text: str, limit: Optional[int] = None) -> List[NameMatch]:
+        """Autocomplete names that contain a word starting with ``text``."""
+        key = normalize_name(text)
+        if not key:
+            return []
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        limit = min(limit or self._suggest_limit, self._suggest_limit)
+        return [self._match(i, len(key) / len(self._keys[i]), "prefix") for i in node.best[:limit]]
+
+    def fuzzy(self, text: str, limit: int = 5, min_score: Optional[float] = None) -> List[NameMatch]:
+        """Fuzzy matches: n-gram candidate retrieval re-ranked by edit similarity."""
+        key = normalize_name(text)
+        if not key:
+            return []
+        min_score = self._min_score if min_score is None else min_score
+
+        counts: Counter = Counter()
+        for gram in set(_ngrams(key)):
+            counts.update(self._grams.get(gram, ()))
+
+        # The query is seq2 so SequenceMatcher builds its lookup tables only once
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(key)
+        words = key.count(" ") + 1
+        scored = []
+        for key_id, _ in counts.most_common(_FUZZY_CANDIDATES):
+            candidate = self._keys[key_id]
+            # "chiken" should still find "Chicken Meat": compare against the leading
+            # words too, slightly discounted so whole-name matches rank first
+            head = " ".join(candidate.split(" ")[:words])
+            score, match_type = 0.0, "fuzzy"
+            for variant, weight in ((candidate, 1.0), (head, _PARTIAL_DISCOUNT)):
+                if weight < 1.0 and variant == candidate:
+                    continue
+                matcher.set_seq1(variant)
+                if weight * matcher.quick_ratio() >= max(min_score, score):
+                    variant_score = weight * matcher.ratio()
+                    if variant_score > score:
+                        score, match_type = variant_score, "fuzzy" if weight == 1.0 else "partial"
+            if score >= min_score:
+                scored.append((-score, len(self._keys[key_id]), key_id, match_type))
+        scored.sort()
+        return [self._match(key_id, -score, match_type) for score, _, key_id, match_type in scored[:limit]]
+
+    def suggest(self, text: str, limit: Optional[int] = None) -> List[NameMatch]:
+        """Search-box suggestions: exact, then prefix, then fuzzy matches, deduplicated."""
+        limit = limit or self._suggest_limit
+        results: List[NameMatch] = []
+        seen = set()
+        candidates = [self.lookup(text)] + self.prefix(text, limit)
+        if len(candidates) <= limit:
+            candidates += self.fuzzy(text, limit)
+        for match in candidates:
+            if match is None or id(match.value) in seen:
+                continue
+            seen.add(id(match.value))
+            results.append(match)
+            if len(results) >= limit:
+                break
+        return results
@@ -2,172 +2,195 @@
 """
 OpenAI Service for Recipe Suggestion System
 
-Handles all OpenAI API interactions for ingredient substitution and recipe suggestions.
+Prompts and response parsers for every LLM method, plus the state they share (response
+cache, usage tracker, materialized recipe details). AsyncOpenAIService adds the
+transport and is the service the API uses.
 """
 
-import os
 import re
 import json
-from typing import Dict, List, Optional
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from config import Config
 from models import SuggestionResult, RecipeSuggestion
+from services import metrics
+from services.llm_cache import LLMCache, get_llm_cache
+from services.llm_usage import get_llm_usage
+from services.prompts import PROMPTS, PromptBudgetError, get_prompt
+from services.recipe_details_store import get_recipe_details_store
 from utils import parse_numbered_list, logger
 
 
+EMPTY_CONTEXT = {"taste": None, "texture": None, "color": None, "cooking_method": None}
+
+
+@dataclass
+class LLMCall:
+    """A prepared completion request and the parser for its response text.
+    
+    Built by OpenAIService, sent and parsed by AsyncOpenAIService.
+    """
+    method: str
+    system: str
+    user: Optional[str]  # None when the prompt did not fit its budget; the call is not sent
+    max_tokens: int
+    parse: Callable[[Optional[str]], Any]
+    cache: bool = True
+    
+    @classmethod
+    def from_prompt(cls, name: str, max_tokens: int, parse: Callable[[Optional[str]], Any],
+                    cache: bool = True, **values) -> "LLMCall":
+        """A call for a registry template, with ``values`` rendered into the user message."""
+        template = get_prompt(name)
+        try:
+            user = template.render(**values)
+        except PromptBudgetError as e:
+            logger.error(str(e))
+            metrics.ERRORS.inc("prompt_budget")
+            user = None
+        return cls(template.name, template.system, user, max_tokens, parse, cache)
+
+
 class OpenAIService:
-    """Handles all OpenAI API interactions."""
+    """Builds LLM calls and parses their responses; subclasses send them."""
     
     def __init__(self, config: Config):
         self.config = config
         self._client = None
+        self._cache = get_llm_cache(config) if config.llm_cache_enabled else None
+        self._usage = get_llm_usage(config)
+        self._details = get_recipe_details_store(config) if config.recipe_details_path else None
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize the OpenAI client."""
-        api_key = self._resolve_api_key()
-        if not api_key:
-            logger.warning("OpenAI API key not found")
-            return
-        
-        try:
-            from openai import OpenAI
-            self._client = OpenAI(api_key=api_key)
-            logger.info("OpenAI client initialized successfully")
-        except ImportError:
-            logger.error("OpenAI package not installed")
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {e}")
-    
-    def _resolve_api_key(self) -> Optional[str]:
-        """Resolve API key from environment or .env files."""
-        # Check environment variables
-        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OpanAI_apikey")
-        if api_key and api_key.strip():
-            return api_key.strip()
-        
-        # Check .env files
-        env_files = [f"{self.config.base_dir}/.env", ".env"]
-        for env_path in env_files:
-            try:
-                if os.path.exists(env_path):
-                    with open(env_path, "r", encoding="utf-8") as f:
-                        for line in f:
-                            line = line.strip()
-                            if not line or line.startswith("#"):
-                                continue
-                            if "OpanAI_apikey" in line or "OPENAI_API_KEY" in line:
-                                _, _, value = line.partition("=")
-                                if value:
-                                    val = value.strip().strip("\"'")
-                                    if val:
-                                        return val
-            except Exception as e:
-                logger.debug(f"Error reading {env_path}: {e}")
-        
-        return None
+        """Set ``self._client`` to the transport's client (None when unavailable)."""
+        raise NotImplementedError
     
     @property
     def is_available(self) -> bool:
         """Check if OpenAI client is available."""
         return self._client is not None
     
-    def _make_request(self, system_message: str, user_message: str, 
-                     max_tokens: int = 200) -> Optional[str]:
-        """Make a standardized OpenAI API request."""
-        if not self.is_available:
-            return None
-        
-        try:
-            response = self._client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=max_tokens,
-                temperature=self.config.temperature
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            logger.error(f"OpenAI API request failed: {e}")
-            return None
+    def _record_usage(self, method: str, started: float, response, max_tokens: int, retry: bool):
+        self._usage.record(method, time.perf_counter() - started, getattr(response, "usage", None),
+                           response.choices[0].finish_reason, max_tokens, retry)
     
-    def get_substitute_ingredients(self, ingredient: str, recipe: str, 
-                                 max_results: int, include_reasoning: bool = False) -> SuggestionResult:
-        """Get ingredient substitutes from OpenAI."""
-        if include_reasoning:
-            system = (
-                f"You are a culinary expert. Provide up to {max_results} substitutes "
-                f"for the ingredient with brief reasons. Format each line as: "
-                f"'Ingredient - reason'. No extra text."
-            )
-        else:
-            system = (
-                f"You are a culinary expert. Provide up to {max_results} substitute "
-                f"ingredients for the target ingredient in the given recipe. "
-                f"Respond as a numbered list with only ingredient names."
-            )
-        
-        user = f"Ingredient: {ingredient}\nRecipe: {recipe}"
-        response_text = self._make_request(system, user, max_tokens=200)
-        
-        if not response_text:
-            return SuggestionResult([], "none")
-        
-        if include_reasoning:
-            items, reasons = [], []
-            lines = parse_numbered_list(response_text)
-            for line in lines:
-                parts = [p.strip() for p in re.split(r"\s+-\s+", line, maxsplit=1)]
-                if parts:
-                    items.append(parts[0])
-                    reasons.append(parts[1] if len(parts) > 1 else "")
-            return SuggestionResult(items[:max_results], "gpt", reasons[:max_results])
-        else:
-            items = parse_numbered_list(response_text)
-            return SuggestionResult(items[:max_results], "gpt")
+    @staticmethod
+    def _cacheable(finish_reason: Optional[str]) -> bool:
+        """Truncated completions often fail to parse; they are not kept for the cache TTL."""
+        return finish_reason != "length"
     
-    def get_recipe_suggestions(self, ingredients: List[str], 
-                             max_results: int) -> List[RecipeSuggestion]:
-        """Get recipe suggestions based on ingredients."""
-        system = (
-            f"You are a concise culinary assistant. Suggest up to {max_results} "
-            f"recipes as a numbered list. Each item must be in the form: "
-            f"Recipe: <name> | Ingredients: <comma-separated list>. No extra commentary."
-        )
-        user = f"Available ingredients: {', '.join(ingredients)}"
-        
-        response_text = self._make_request(system, user, max_tokens=400)
+    @staticmethod
+    def _should_retry(response, budget: int, max_tokens: int) -> bool:
+        """A completion cut off by a lowered adaptive budget is retried at the call site's budget."""
+        return budget < max_tokens and response.choices[0].finish_reason == "length"
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """Per-method token, latency and finish_reason accounting."""
+        return self._usage.stats()
+    
+    def _request_key(self, system_message: str, user_message: str, max_tokens: int) -> str:
+        return LLMCache.make_key(self.config.openai_model, self.config.temperature,
+                                 system_message, user_message, max_tokens)
+    
+    def _completion_args(self, system_message: str, user_message: str, max_tokens: int,
+                         method: str = "default") -> Dict[str, Any]:
+        args = {
+            "model": self.config.openai_model,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": user_message}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": self.config.temperature,
+        }
+        if self.config.openai_prompt_cache_key and method in PROMPTS:
+            # Routes calls sharing a template's static prefix to the same prefix cache
+            args["prompt_cache_key"] = PROMPTS[method].id
+        return args
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the LLM response cache and the details store."""
+        stats = self._cache.stats() if self._cache is not None else {}
+        if self._details is not None:
+            stats["recipe_details"] = self._details.stats()
+        return stats
+    
+    def _substitute_ingredients_call(self, ingredient: str, recipe: str,
+                                     max_results: int, include_reasoning: bool) -> LLMCall:
+        def parse(response_text: Optional[str]) -> SuggestionResult:
+            if not response_text:
+                return SuggestionResult([], "none")
+            
+            if include_reasoning:
+                items, reasons = [], []
+                lines = parse_numbered_list(response_text)
+                for line in lines:
+                    parts = [p.strip() for p in re.split(r"\s+-\s+", line, maxsplit=1)]
+                    if parts:
+                        items.append(parts[0])
+                        reasons.append(parts[1] if len(parts) > 1 else "")
+                return SuggestionResult(items[:max_results], "gpt", reasons[:max_results])
+            else:
+                items = parse_numbered_list(response_text)
+                return SuggestionResult(items[:max_results], "gpt")
+        
+        name = "get_substitute_ingredients_with_reasons" if include_reasoning else "get_substitute_ingredients"
+        return LLMCall.from_prompt(name, 200, parse, ingredient=ingredient, recipe=recipe, max_results=max_results)
+    
+    def _substitute_batch_call(self, pairs: List[Tuple[str, str]], max_results: int) -> LLMCall:
+        items = "\n".join(f"{i}. Ingredient: {ingredient} | Recipe: {recipe}"
+                          for i, (ingredient, recipe) in enumerate(pairs, 1))
+        max_tokens = min(4000, 50 + len(pairs) * (20 + 10 * max_results))
+        
+        def parse(response_text: Optional[str]) -> List[Optional[SuggestionResult]]:
+            if response_text is None:
+                # The request itself failed; splitting the batch would not help
+                return [SuggestionResult([], "none") for _ in pairs]
+            results: List[Optional[SuggestionResult]] = [None] * len(pairs)
+            for entry in self._parse_batch_entries(response_text):
+                item_id = entry.get("id")
+                substitutes = entry.get("substitutes")
+                if not isinstance(item_id, int) or not 1 <= item_id <= len(pairs) or not isinstance(substitutes, list):
+                    continue
+                items = [str(s).strip() for s in substitutes if str(s).strip()]
+                results[item_id - 1] = SuggestionResult(items[:max_results], "gpt" if items else "none")
+            return results
+        
+        return LLMCall.from_prompt("get_substitute_ingredients_batch", max_tokens, parse,
+                                   items=items, max_results=max_results)
+    
+    def _parse_batch_entries(self, response_text: Optional[str]) -> List[Dict[str, Any]]:
+        """Entries of a {"results": [...]} response, salvaging complete ones from truncated JSON."""
         if not response_text:
             return []
-        
-        results = []
-        for line in response_text.splitlines():
-            line = line.strip()
-            if not line:
+        text = response_text.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1]
+        if text.endswith("```"):
+            text = text[:-3]
+        try:
+            parsed = json.loads(text)
+            entries = parsed.get("results") if isinstance(parsed, dict) else parsed
+            return [e for e in entries if isinstance(e, dict)] if isinstance(entries, list) else []
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.debug(f"Batch response is not valid JSON, salvaging entries: {e}")
+        
+        entries = []
+        for match in re.finditer(r"\{[^{}]*\}", text):
+            try:
+                entry = json.loads(match.group(0))
+            except json.JSONDecodeError:
                 continue
-            line = re.sub(r"^\s*\d+\.|^[-•]", "", line).strip()
-            match = re.match(r"Recipe:\s*(.+?)\s*\|\s*Ingredients:\s*(.+)$", 
-                           line, flags=re.IGNORECASE)
-            if match:
-                results.append(RecipeSuggestion(
-                    name=match.group(1).strip(),
-                    ingredients=match.group(2).strip()
-                ))
-        
-        return results[:max_results]
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries
     
-    def get_similar_recipes(self, original_recipe: str, max_results: int = 4) -> List[RecipeSuggestion]:
-        """Get recipes similar to the original recipe."""
-        system = (
-            f"You are a concise culinary assistant. Suggest up to {max_results} "
-            f"recipes that are similar to the given recipe. Each item must be in the form: "
-            f"Recipe: <name> | Ingredients: <comma-separated list>. No extra commentary."
-        )
-        user = f"Original recipe: {original_recipe}"
-        
-        response_text = self._make_request(system, user, max_tokens=400)
+    def _parse_recipe_lines(self, response_text: Optional[str], max_results: int,
+                            required_ingredients: Optional[List[str]] = None) -> List[RecipeSuggestion]:
+        """Parse 'Recipe: <name> | Ingredients: <list>' lines, optionally requiring ingredients."""
         if not response_text:
             return []
         
@@ -179,103 +202,87 @@ class OpenAIService:
             line = re.sub(r"^\s*\d+\.|^[-•]", "", line).strip()
             match = re.match(r"Recipe:\s*(.+?)\s*\|\s*Ingredients:\s*(.+)$", 
                            line, flags=re.IGNORECASE)
-            if match:
-                results.append(RecipeSuggestion(
-                    name=match.group(1).strip(),
-                    ingredients=match.group(2).strip()
-                ))
+            if not match:
+                continue
+            
+            recipe_name = match.group(1).strip()
+            ingredients_text = match.group(2).strip()
+            
+            # Verify that all required ingredients are mentioned in the recipe
+            if required_ingredients:
+                ingredients_lower = ingredients_text.lower()
+                if not all(req.lower() in ingredients_lower for req in required_ingredients):
+                    continue
+            
+            results.append(RecipeSuggestion(
+                name=recipe_name,
+                ingredients=ingredients_text
+            ))
         
         return results[:max_results]
     
-    def get_recipes_with_specific_ingredients(self, required_ingredients: List[str], 
-                                            recipe_context: str = "", max_results: int = 5) -> List[RecipeSuggestion]:
-        """Get recipe suggestions that MUST include the specified ingredients."""
-        required_text = ", ".join(required_ingredients)
-        context_text = f" similar to {recipe_context}" if recipe_context else ""
-        
-        system = (
-            f"You are a concise culinary assistant. Suggest up to {max_results} "
-            f"recipes that MUST include ALL of these ingredients: {required_text}. "
-            f"Each recipe suggestion must be in the form: "
-            f"Recipe: <name> | Ingredients: <comma-separated list>. "
-            f"Ensure every suggested recipe includes all the required ingredients. No extra commentary."
-        )
-        user = f"Required ingredients that MUST be in every recipe: {required_text}{context_text}"
-        
-        response_text = self._make_request(system, user, max_tokens=500)
-        if not response_text:
-            return []
+    def _recipe_suggestions_call(self, ingredients: List[str], max_results: int) -> LLMCall:
+        return LLMCall.from_prompt("get_recipe_suggestions", 400,
+                                   lambda text: self._parse_recipe_lines(text, max_results),
+                                   ingredients=", ".join(ingredients), max_results=max_results)
+    
+    def _similar_recipes_call(self, original_recipe: str, max_results: int) -> LLMCall:
+        return LLMCall.from_prompt("get_similar_recipes", 400,
+                                   lambda text: self._parse_recipe_lines(text, max_results),
+                                   recipe=original_recipe, max_results=max_results)
+    
+    def _specific_ingredients_call(self, required_ingredients: List[str], recipe_context: str,
+                                   max_results: int, validate: bool = True,
+                                   exclude: Sequence[str] = ()) -> LLMCall:
+        context_text = f"Similar to: {recipe_context}\n" if recipe_context else ""
+        exclude_text = f"Already suggested, do not repeat: {'; '.join(exclude)}\n" if exclude else ""
+        required = required_ingredients if validate else None
+        return LLMCall.from_prompt("get_recipes_with_specific_ingredients", max(500, 60 + 80 * max_results),
+                                   lambda text: self._parse_recipe_lines(text, max_results, required),
+                                   required=", ".join(required_ingredients), context=context_text,
+                                   exclude=exclude_text, max_results=max_results)
+
+    def _recipe_with_ingredients_call(self, recipe_name: str, substitute_ingredients: List[str]) -> LLMCall:
+        substitutes_text = ", ".join(substitute_ingredients) if substitute_ingredients else "none"
         
-        results = []
-        for line in response_text.splitlines():
-            line = line.strip()
-            if not line:
-                continue
+        def parse(response_text: Optional[str]) -> Optional[RecipeSuggestion]:
+            if not response_text:
+                return None
+            
+            # Parse the response
+            line = response_text.strip()
             line = re.sub(r"^\s*\d+\.|^[-•]", "", line).strip()
             match = re.match(r"Recipe:\s*(.+?)\s*\|\s*Ingredients:\s*(.+)$", 
                            line, flags=re.IGNORECASE)
             if match:
-                recipe_name = match.group(1).strip()
-                ingredients_text = match.group(2).strip()
-                
-                # Verify that all required ingredients are mentioned in the recipe
-                ingredients_lower = ingredients_text.lower()
-                all_included = True
-                for req_ingredient in required_ingredients:
-                    if req_ingredient.lower() not in ingredients_lower:
-                        all_included = False
-                        break
-                
-                if all_included:
-                    results.append(RecipeSuggestion(
-                        name=recipe_name,
-                        ingredients=ingredients_text
-                    ))
-        
-        return results[:max_results]
-
-    def get_recipe_with_ingredients(self, recipe_name: str, substitute_ingredients: List[str]) -> Optional[RecipeSuggestion]:
-        """Get the original recipe with detailed ingredients, incorporating substitutes."""
-        substitutes_text = ", ".join(substitute_ingredients) if substitute_ingredients else "none"
-        
-        system = (
-            f"You are a culinary expert. Provide the detailed recipe with complete ingredient list. "
-            f"If substitute ingredients are provided, incorporate them into the recipe. "
-            f"Format as: Recipe: <name> | Ingredients: <comma-separated list>. No extra commentary."
-        )
-        user = f"Recipe: {recipe_name}\nSubstitute ingredients to include: {substitutes_text}"
-        
-        response_text = self._make_request(system, user, max_tokens=300)
-        if not response_text:
-            return None
-        
-        # Parse the response
-        line = response_text.strip()
-        line = re.sub(r"^\s*\d+\.|^[-•]", "", line).strip()
-        match = re.match(r"Recipe:\s*(.+?)\s*\|\s*Ingredients:\s*(.+)$", 
-                       line, flags=re.IGNORECASE)
-        if match:
+                return RecipeSuggestion(
+                    name=match.group(1).strip(),
+                    ingredients=match.group(2).strip()
+                )
+            
+            # Fallback if parsing fails
             return RecipeSuggestion(
-                name=match.group(1).strip(),
-                ingredients=match.group(2).strip()
+                name=recipe_name,
+                ingredients=f"Recipe details for {recipe_name} with substitutes: {substitutes_text}"
             )
         
-        # Fallback if parsing fails
-        return RecipeSuggestion(
-            name=recipe_name,
-            ingredients=f"Recipe details for {recipe_name} with substitutes: {substitutes_text}"
-        )
+        return LLMCall.from_prompt("get_recipe_with_ingredients", 300, parse,
+                                   recipe=recipe_name, substitutes=substitutes_text)
     
-    def get_recipe_details(self, recipe_name: str) -> Optional[Dict[str, str]]:
-        """Get detailed recipe information including ingredients and cooking method."""
-        system = (
-            "You are a culinary expert. Provide a detailed recipe with specific ingredients list (including quantities) and cooking method. "
-            "Format your response as: 'Ingredients: <ingredient list with quantities> | Cooking Method: <detailed steps>'. "
-            "Be comprehensive but concise. Use standard measurements and be specific about quantities."
-        )
-        user = f"Recipe name: {recipe_name}"
-        
-        response_text = self._make_request(system, user, max_tokens=500)
+    def _recipe_details_call(self, recipe_name: str) -> LLMCall:
+        return LLMCall.from_prompt("get_recipe_details", 500,
+                                   lambda text: self._parse_recipe_details(text, recipe_name),
+                                   recipe=recipe_name)
+    
+    def _catalog_recipe_details_call(self, recipe_name: str, ingredients: Any) -> LLMCall:
+        ingredients_text = ", ".join(map(str, ingredients)) if isinstance(ingredients, list) else str(ingredients or "")
+        # Stored by the details store, so not worth a slot in the response cache
+        return LLMCall.from_prompt("get_catalog_recipe_details", 500,
+                                   lambda text: self._parse_recipe_details(text, recipe_name), cache=False,
+                                   recipe=recipe_name, ingredients=ingredients_text)
+    
+    def _parse_recipe_details(self, response_text: Optional[str], recipe_name: str) -> Optional[Dict[str, str]]:
+        """Parse an 'Ingredients: ... | Cooking Method: ...' response."""
         if not response_text:
             return None
         
@@ -294,24 +301,26 @@ class OpenAIService:
             "cooking_method": response_text.strip()
         }
     
-    def get_updated_recipe_with_substitution(self, recipe_name: str, original_ingredients: str, 
-                                           original_ingredient: str, substitute_ingredient: str) -> Optional[Dict[str, str]]:
-        """Get updated recipe with substituted ingredient and modified cooking method."""
-        system = (
-            "You are a culinary expert. Update the given recipe by making MINIMAL changes - ONLY substitute the specified ingredient. "
-            "Keep ALL other ingredients exactly the same with same quantities and descriptions. "
-            "IMPORTANT: Provide the COMPLETE updated ingredients list and COMPLETE cooking method, but only change the specific ingredient being substituted. "
-            "Only modify cooking instructions if the substitute ingredient requires different handling (different cooking time, temperature, or preparation). "
-            "Format your response as: 'Updated Ingredients: <COMPLETE updated ingredient list with all original ingredients except the substituted one> | Updated Cooking Method: <COMPLETE detailed cooking steps>'. "
-            "Show the full recipe details, not just a brief summary."
-        )
-        user = (
-            f"Recipe: {recipe_name}\n"
-            f"Original ingredients: {original_ingredients}\n"
-            f"Replace ONLY '{original_ingredient}' with '{substitute_ingredient}' - keep everything else identical but show the complete updated recipe"
-        )
-        
-        response_text = self._make_request(system, user, max_tokens=800)
+    def _updated_recipe_call(self, recipe_name: str, original_ingredients: str,
+                             original_ingredient: str, substitute_ingredient: str) -> LLMCall:
+        return LLMCall.from_prompt("get_updated_recipe_with_substitution", 800,
+                                   lambda text: self._parse_updated_recipe(text, recipe_name, original_ingredient,
+                                                                           substitute_ingredient),
+                                   recipe=recipe_name, original_ingredients=original_ingredients,
+                                   original_ingredient=original_ingredient,
+                                   substitute_ingredient=substitute_ingredient)
+    
+    def _rewritten_recipe_call(self, recipe_name: str, original_ingredient: str,
+                               substitute_ingredient: str) -> LLMCall:
+        return LLMCall.from_prompt("get_rewritten_recipe", 800,
+                                   lambda text: self._parse_updated_recipe(text, recipe_name, original_ingredient,
+                                                                           substitute_ingredient),
+                                   recipe=recipe_name, original_ingredient=original_ingredient,
+                                   substitute_ingredient=substitute_ingredient)
+    
+    def _parse_updated_recipe(self, response_text: Optional[str], recipe_name: str,
+                              original_ingredient: str, substitute_ingredient: str) -> Optional[Dict[str, str]]:
+        """Parse an 'Updated Ingredients: ... | Updated Cooking Method: ...' response."""
         if not response_text:
             return None
         
@@ -330,13 +339,9 @@ class OpenAIService:
             "cooking_method": f"Please refer to the updated ingredients section above for the complete recipe details with {substitute_ingredient} substituted for {original_ingredient}."
         }
     
-    def get_context_based_ingredients(self, taste: Optional[str] = None,
-                                    texture: Optional[str] = None,
-                                    color: Optional[str] = None,
-                                    cooking_method: Optional[str] = None,
-                                    recipe_title: Optional[str] = None,
-                                    max_results: int = 10) -> SuggestionResult:
-        """Get ingredients based on context attributes."""
+    def _context_ingredients_call(self, taste: Optional[str], texture: Optional[str],
+                                  color: Optional[str], cooking_method: Optional[str],
+                                  recipe_title: Optional[str], max_results: int) -> LLMCall:
         constraints = []
         if taste: constraints.append(f"Taste: {taste}")
         if texture: constraints.append(f"Texture: {texture}")
@@ -346,36 +351,24 @@ class OpenAIService:
         
         constraint_text = " | ".join(constraints) if constraints else "No constraints"
         
-        system = (
-            f"You are a concise culinary assistant. Suggest up to {max_results} "
-            f"ingredient names that match the given context and optionally the recipe. "
-            f"Return a numbered list of ingredient names only."
-        )
-        user = f"Context: {constraint_text}"
-        
-        response_text = self._make_request(system, user, max_tokens=300)
-        if not response_text:
-            return SuggestionResult([], "none")
+        def parse(response_text: Optional[str]) -> SuggestionResult:
+            if not response_text:
+                return SuggestionResult([], "none")
+            
+            items = parse_numbered_list(response_text)
+            return SuggestionResult(items[:max_results], "gpt")
         
-        items = parse_numbered_list(response_text)
-        return SuggestionResult(items[:max_results], "gpt")
+        return LLMCall.from_prompt("get_context_based_ingredients", 300, parse,
+                                   constraints=constraint_text, max_results=max_results)
     
-    def parse_natural_language_context(self, description: str) -> Dict[str, Optional[str]]:
-        """Parse natural language description into context categories."""
-        if not description or not description.strip():
-            return {"taste": None, "texture": None, "color": None, "cooking_method": None}
-        
-        system = (
-            "You are a culinary expert that analyzes food descriptions. "
-            "Parse the given description and extract taste/flavor, texture, color, and cooking method. "
-            "Return ONLY a JSON object with keys: taste, texture, color, cooking_method. "
-            "Use null for missing information. Be concise with single words or short phrases."
-        )
-        user = f"Description: {description}"
-        
-        response_text = self._make_request(system, user, max_tokens=150)
+    def _natural_context_call(self, description: str) -> LLMCall:
+        return LLMCall.from_prompt("parse_natural_language_context", 150, self._parse_context_json,
+                                   description=description)
+    
+    def _parse_context_json(self, response_text: Optional[str]) -> Dict[str, Optional[str]]:
+        """Parse the JSON context object, falling back to keyword extraction."""
         if not response_text:
-            return {"taste": None, "texture": None, "color": None, "cooking_method": None}
+            return dict(EMPTY_CONTEXT)
         
         try:
             # Try to parse JSON response
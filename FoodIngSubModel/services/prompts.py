@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Prompt Registry for Recipe Suggestion System
+
+Versioned prompt templates, one per LLM method. A template's system message is
+static text, byte-identical on every call, so the provider's prompt-prefix cache
+can reuse it; everything request-specific (counts, ingredients, recipe names) is
+rendered into the user message. Each template carries the token count of its
+static prefix and an input-token budget: over it, only the template's trimmable
+fields are shortened, and a call whose fixed text alone does not fit is refused.
+
+Bump a template's version whenever its text changes, so usage stats and cache
+hit ratios before and after the change are not mixed up.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from services import metrics
+from utils import logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is optional
+    tiktoken = None
+
+
+# Chat framing tokens per request (role markers and separators of two messages)
+MESSAGE_OVERHEAD = 8
+
+_encoding = None
+
+
+class PromptBudgetError(ValueError):
+    """A prompt that does not fit its template's input budget even with its trimmable fields cut."""
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in ``text``: exact with tiktoken installed, else about four characters per token."""
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _shorten(value: str, tokens: int) -> str:
+    """``value`` cut to at most ``tokens``: whole lines for multi-line values, else at a word break.
+    
+    A trailing newline (optional lines such as "Similar to: ...\n") is kept when
+    anything is left.
+    """
+    ending = "\n" if value.endswith("\n") else ""
+    text = value[:-1] if ending else value
+    if tokens <= 0 or not text:
+        return ""
+    if count_tokens(value) <= tokens:
+        return value
+    if "\n" in text:
+        kept, used = [], 0
+        for line in text.split("\n"):
+            used += count_tokens(line + "\n")
+            if used > tokens:
+                break
+            kept.append(line)
+        return "\n".join(kept) + ending if kept else ""
+    cut = text[:len(text) * tokens // max(1, count_tokens(text))]
+    while cut and count_tokens(cut + ending) > tokens:
+        cut = cut[:-max(1, len(cut) // 20)]
+    if " " in cut.rstrip():
+        cut = cut[:cut.rstrip().rindex(" ")]
+    cut = cut.rstrip(" ,;")
+    return cut + ending if cut else ""
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A static system prefix plus a ``str.format`` template for the user message."""
+    name: str  # LLM method the template serves (usage, cache TTL and metrics label)
+    version: int
+    system: str
+    user: str
+    input_budget: int = 1024  # max prompt tokens per call, system and user together
+    trim: Tuple[str, ...] = ()  # fields that may be shortened to fit the budget, cut first to last
+    system_tokens: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "system_tokens", count_tokens(self.system))
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def fingerprint(self) -> str:
+        """Short hash of the template text, to tell edits that forgot a version bump."""
+        return hashlib.sha256(f"{self.system}\0{self.user}".encode("utf-8")).hexdigest()[:12]
+
+    def render(self, **values) -> str:
+        """The user message for ``values``, with trimmable fields cut to fit the input budget.
+        
+        Instruction and count lines are never cut; raises PromptBudgetError when they
+        alone do not fit.
+        """
+        user = self.user.format(**values)
+        room = self.input_budget - self.system_tokens - MESSAGE_OVERHEAD
+        tokens = count_tokens(user)
+        if tokens <= room:
+            return user
+        fixed = count_tokens(self.user.format(**{**values, **{name: "" for name in self.trim}}))
+        if fixed > room:
+            raise PromptBudgetError(f"Prompt {self.id} needs {self.system_tokens + fixed} tokens "
+                                    f"without its variable fields, over its {self.input_budget}-token budget")
+        values = dict(values)
+        for name in self.trim:
+            others = sum(count_tokens(str(values[other])) for other in self.trim if other != name)
+            values[name] = _shorten(str(values[name]), room - fixed - others)
+            if count_tokens(self.user.format(**values)) <= room:
+                break
+        logger.warning(f"Prompt {self.id} over its {self.input_budget}-token budget "
+                       f"({self.system_tokens + tokens}), trimmed {', '.join(self.trim)}")
+        metrics.PROMPT_TRIMMED.inc(self.name)
+        return self.user.format(**values)
+    
+    def info(self) -> Dict[str, object]:
+        return {
+            "method": self.name,
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "prefix_tokens": self.system_tokens,
+            "input_budget": self.input_budget,
+        }
+
+
+_RECIPE_LINE = "Recipe: <name> | Ingredients: <comma-separated list>"
+_DETAILS_FORMAT = (
+    "Format your response as: 'Ingredients: <ingredient list with quantities> | Cooking Method: <detailed steps>'. "
+    "Be comprehensive but concise. Use standard measurements and be specific about quantities."
+)
+_MINIMAL_CHANGE = (
+    "Keep ALL other ingredients exactly the same with same quantities and descriptions. "
+)
+_HANDLING = (
+    "Only modify cooking instructions if the substitute ingredient requires different handling "
+    "(different cooking time, temperature, or preparation). "
+)
+_REPLACE_ONLY = (
+    "Replace ONLY '{original_ingredient}' with '{substitute_ingredient}' - "
+    "keep everything else identical but show the complete updated recipe"
+)
+
+_TEMPLATES = [
+    PromptTemplate(
+        "get_substitute_ingredients", 1,
+        "You are a culinary expert. Provide substitute ingredients for the target ingredient in the given recipe, "
+        "no more than the number asked for. Respond as a numbered list with only ingredient names.",
+        "Ingredient: {ingredient}\nRecipe: {recipe}\nSubstitutes: up to {max_results}",
+        trim=("recipe",),
+    ),
+    PromptTemplate(
+        "get_substitute_ingredients_with_reasons", 1,
+        "You are a culinary expert. Provide substitutes for the ingredient with brief reasons, "
+        "no more than the number asked for. Format each line as: 'Ingredient - reason'. No extra text.",
+        "Ingredient: {ingredient}\nRecipe: {recipe}\nSubstitutes: up to {max_results}",
+        trim=("recipe",),
+    ),
+    PromptTemplate(
+        "get_substitute_ingredients_batch", 1,
+        "You are a culinary expert. For each numbered item, provide substitute ingredients for the target "
+        "ingredient in the given recipe, no more than the number asked for. "
+        'Return ONLY a JSON object: {"results": [{"id": <item number>, "substitutes": ["name", ...]}]} '
+        "with one entry per item, ingredient names only.",
+        "Substitutes per item: up to {max_results}\n{items}",
+        trim=("items",), input_budget=4096,
+    ),
+    PromptTemplate(
+        "get_recipe_suggestions", 1,
+        "You are a concise culinary assistant. Suggest recipes that use the available ingredients as a numbered "
+        f"list, no more than the number asked for. Each item must be in the form: {_RECIPE_LINE}. "
+        "No extra commentary.",
+        "Available ingredients: {ingredients}\nRecipes: up to {max_results}",
+        trim=("ingredients",),
+    ),
+    PromptTemplate(
+        "get_similar_recipes", 1,
+        "You are a concise culinary assistant. Suggest recipes that are similar to the given recipe, "
+        f"no more than the number asked for. Each item must be in the form: {_RECIPE_LINE}. No extra commentary.",
+        "Original recipe: {recipe}\nRecipes: up to {max_results}",
+        trim=("recipe",),
+    ),
+    PromptTemplate(
+        "get_recipes_with_specific_ingredients", 2,
+        "You are a concise culinary assistant. Suggest recipes that MUST include ALL of the required ingredients, "
+        f"no more than the number asked for. Each recipe suggestion must be in the form: {_RECIPE_LINE}. "
+        "Ensure every suggested recipe includes all the required ingredients. No extra commentary.",
+        "Every recipe MUST include ALL of these ingredients: {required}.\n{context}{exclude}"
+        "Recipes: up to {max_results}",
+        trim=("exclude", "context"),
+    ),
+    PromptTemplate(
+        "get_recipe_with_ingredients", 1,
+        "You are a culinary expert. Provide the detailed recipe with complete ingredient list. "
+        "If substitute ingredients are provided, incorporate them into the recipe. "
+        f"Format as: {_RECIPE_LINE}. No extra commentary.",
+        "Recipe: {recipe}\nSubstitute ingredients to include: {substitutes}",
+        trim=("substitutes",),
+    ),
+    PromptTemplate(
+        "get_recipe_details", 1,
+        "You are a culinary expert. Provide a detailed recipe with specific ingredients list (including quantities) "
+        f"and cooking method. {_DETAILS_FORMAT}",
+        "Recipe name: {recipe}",
+        trim=("recipe",),
+    ),
+    PromptTemplate(
+        "get_catalog_recipe_details", 1,
+        "You are a culinary expert. Provide the recipe for the given dish using the given ingredients, "
+        f"with quantities, and its cooking method. {_DETAILS_FORMAT}",
+        "Recipe name: {recipe}\nIngredients: {ingredients}",
+        trim=("ingredients",), input_budget=2048,
+    ),
+    PromptTemplate(
+        "get_updated_recipe_with_substitution", 1,
+        "You are a culinary expert. Update the given recipe by making MINIMAL changes - ONLY substitute the "
+        f"specified ingredient. {_MINIMAL_CHANGE}"
+        "IMPORTANT: Provide the COMPLETE updated ingredients list and COMPLETE cooking method, but only change "
+        f"the specific ingredient being substituted. {_HANDLING}"
+        "Format your response as: 'Updated Ingredients: <COMPLETE updated ingredient list with all original "
+        "ingredients except the substituted one> | Updated Cooking Method: <COMPLETE detailed cooking steps>'. "
+        "Show the full recipe details, not just a brief summary.",
+        "Recipe: {recipe}\nOriginal ingredients: {original_ingredients}\n" + _REPLACE_ONLY,
+        trim=("original_ingredients",), input_budget=2048,
+    ),
+    PromptTemplate(
+        "get_rewritten_recipe", 1,
+        "You are a culinary expert. Recall the standard recipe for the given dish, with specific ingredients "
+        "(including quantities) and cooking method, then update it by making MINIMAL changes - ONLY substitute "
+        f"the specified ingredient. {_MINIMAL_CHANGE}{_HANDLING}"
+        "Format your response as: 'Updated Ingredients: <COMPLETE updated ingredient list with quantities> | "
+        "Updated Cooking Method: <COMPLETE detailed cooking steps>'. "
+        "Show the full recipe details, not just a brief summary.",
+        "Recipe: {recipe}\n" + _REPLACE_ONLY,
+        trim=("recipe",),
+    ),
+    PromptTemplate(
+        "get_context_based_ingredients", 1,
+        "You are a concise culinary assistant. Suggest ingredient names that match the given context and "
+        "optionally the recipe, no more than the number asked for. Return a numbered list of ingredient names only.",
+        "Context: {constraints}\nIngredients: up to {max_results}",
+        trim=("constraints",),
+    ),
+    PromptTemplate(
+        "parse_natural_language_context", 1,
+        "You are a culinary expert that analyzes food descriptions. "
+        "Parse the given description and extract taste/flavor, texture, color, and cooking method. "
+        "Return ONLY a JSON object with keys: taste, texture, color, cooking_method. "
+        "Use null for missing information. Be concise with single words or short phrases.",
+        "Description: {description}",
+        trim=("description",),
+    ),
+]
+
+PROMPTS: Dict[str, PromptTemplate] = {template.name: template for template in _TEMPLATES}
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    return PROMPTS[name]
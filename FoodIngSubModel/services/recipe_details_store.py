@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Recipe Details Store for Recipe Suggestion System
+
+Materialized /lookup answers for the recipes in the catalog: an offline job walks
+the recipes table, asks the LLM once per recipe for quantities and a cooking method
+for the catalog's own ingredient list, and keeps the result in SQLite keyed by
+recipe id and normalized name. Each row records a hash of the catalog row it came
+from, so a rerun only processes new or changed recipes.
+
+    python -m services.recipe_details_store                 # refresh new or changed recipes
+    python -m services.recipe_details_store --limit 100     # at most 100 recipes this run
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from services.name_resolver import normalize_name
+from utils import logger
+
+
+def row_hash(record: Dict[str, Any]) -> str:
+    """Hash of the catalog columns a recipe's details are generated from."""
+    payload = json.dumps([record.get("recipe_name") or record.get("title") or "", record.get("ingredients")],
+                         ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecipeDetailsStore:
+    """SQLite table of recipe details keyed by recipe id, looked up by normalized name."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = defaultdict(int)
+        self._db: Optional[sqlite3.Connection] = None
+        self._initialize_disk()
+
+    def _initialize_disk(self):
+        path = self.config.recipe_details_path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recipe_details ("
+                "recipe_id PRIMARY KEY, name_key TEXT, recipe_name TEXT, ingredients TEXT, "
+                "cooking_method TEXT, row_hash TEXT, updated_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS recipe_details_name ON recipe_details (name_key)")
+        except Exception as e:
+            logger.error(f"Failed to open recipe details store at {path}: {e}")
+            self._db = None
+
+    @property
+    def is_available(self) -> bool:
+        return self._db is not None
+
+    def get(self, recipe_name: str) -> Optional[Dict[str, str]]:
+        """Details for a catalog recipe by name (case, spacing and punctuation insensitive)."""
+        key = normalize_name(recipe_name)
+        if self._db is None or not key:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT ingredients, cooking_method FROM recipe_details WHERE name_key = ? "
+                    "ORDER BY recipe_id LIMIT 1", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug(f"Recipe details read failed: {e}")
+                row = None
+            self._stats["hits" if row else "misses"] += 1
+        return {"ingredients": row[0], "cooking_method": row[1]} if row else None
+
+    def hashes(self) -> Dict[Any, str]:
+        """Catalog row hash per stored recipe id."""
+        if self._db is None:
+            return {}
+        with self._lock:
+            return dict(self._db.execute("SELECT recipe_id, row_hash FROM recipe_details").fetchall())
+
+    def put(self, record: Dict[str, Any], details: Dict[str, str]):
+        """Store the details generated for a catalog row."""
+        if self._db is None:
+            return
+        name = record.get("recipe_name") or record.get("title") or ""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO recipe_details "
+                "(recipe_id, name_key, recipe_name, ingredients, cooking_method, row_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.get("id"), normalize_name(name), name, details["ingredients"],
+                 details["cooking_method"], row_hash(record), time.time())
+            )
+
+    def delete(self, recipe_ids: List[Any]):
+        """Drop recipes that are no longer in the catalog."""
+        if self._db is None or not recipe_ids:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM recipe_details WHERE recipe_id = ?", [(i,) for i in recipe_ids])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+            entries = 0
+            if self._db is not None:
+                (entries,) = self._db.execute("SELECT COUNT(*) FROM recipe_details").fetchone()
+            return {
+                "entries": entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+
+
+_shared_stores: Dict[str, RecipeDetailsStore] = {}
+_shared_lock = threading.Lock()
+
+
+def get_recipe_details_store(config: Config) -> RecipeDetailsStore:
+    """Process-wide store per path, shared by every OpenAIService instance."""
+    with _shared_lock:
+        store = _shared_stores.get(config.recipe_details_path)
+        if store is None:
+            store = _shared_stores[config.recipe_details_path] = RecipeDetailsStore(config)
+        return store
+
+
+async def materialize(config: Config, source, openai_service, store: RecipeDetailsStore,
+                      limit: Optional[int] = None, prune: bool = True) -> Dict[str, int]:
+    """Generate details for catalog rows that are new or changed since the last run.
+
+    Rows are paged by id; at most ``config.recipe_details_concurrency`` completions
+    are in flight. Failed rows are left out and retried by the next run. With
+    ``prune``, stored recipes no longer in the catalog are deleted.
+    """
+    known = store.hashes()
+    seen = set()
+    counts = {"scanned": 0, "unchanged": 0, "generated": 0, "failed": 0, "deleted": 0}
+    semaphore = asyncio.Semaphore(max(1, config.recipe_details_concurrency))
+
+    async def process(record: Dict[str, Any]):
+        async with semaphore:
+            name = record.get("recipe_name") or record.get("title") or ""
+            details = await openai_service.get_catalog_recipe_details(name, record.get("ingredients"))
+        if details:
+            store.put(record, details)
+            counts["generated"] += 1
+        else:
+            counts["failed"] += 1
+
+    after = None
+    budget = limit
+    while budget is None or budget > 0:
+        rows = await source.fetch("id", after, config.recipe_index_batch_size)
+        pending = []
+        for record in rows:
+            counts["scanned"] += 1
+            seen.add(record.get("id"))
+            if known.get(record.get("id")) == row_hash(record):
+                counts["unchanged"] += 1
+            elif budget is None or len(pending) < budget:
+                pending.append(record)
+        await asyncio.gather(*(process(record) for record in pending))
+        if budget is not None:
+            budget -= len(pending)
+        if len(rows) < config.recipe_index_batch_size:
+            break
+        after = rows[-1].get("id")
+    else:
+        prune = False  # stopped early; rows after this page were not seen
+
+    if prune:
+        gone = [recipe_id for recipe_id in known if recipe_id not in seen]
+        if gone:
+            store.delete(gone)
+        counts["deleted"] = len(gone)
+    return counts
+
+
+def main():
+    from services.async_openai_service import AsyncOpenAIService
+    from services.clients import get_client_registry
+    from services.recipe_index import LocalRecipeSource, SupabaseRecipeSource
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="Materialize /lookup details for the recipe catalog")
+    parser.add_argument("--limit", type=int, default=None, help="Generate at most this many recipes")
+    parser.add_argument("--concurrency", type=int, default=config.recipe_details_concurrency,
+                        help="Completions in flight")
+    args = parser.parse_args()
+    if not config.recipe_details_path:
+        parser.error("RECIPE_DETAILS_PATH is empty")
+    config.recipe_details_concurrency = args.concurrency
+    store = get_recipe_details_store(config)
+    if not store.is_available:
+        parser.error(f"cannot open the recipe details store at {config.recipe_details_path}")
+
+    clients = get_client_registry(config)
+    if config.recipe_snapshot_path:
+        source = LocalRecipeSource(config.recipe_snapshot_path)
+    elif clients.has_supabase:
+        source = SupabaseRecipeSource(clients)
+    else:
+        parser.error("no recipe catalog (set VITE_SUPABASE_URL/VITE_SUPABASE_ANON_KEY or RECIPE_SNAPSHOT_PATH)")
+
+    async def run():
+        try:
+            return await materialize(config, source, AsyncOpenAIService(config), store, args.limit)
+        finally:
+            await clients.aclose()
+
+    started = time.perf_counter()
+    counts = asyncio.run(run())
+    print(f"{counts} in {time.perf_counter() - started:.1f}s -> {config.recipe_details_path}")
+
+
+if __name__ == "__main__":
+    main()
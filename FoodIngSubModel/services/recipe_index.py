@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Recipe Index for Recipe Suggestion System
+
+In-process inverted index (ingredient token -> recipe ids) over a snapshot of the
+recipes table, ranked by ingredient overlap and coverage and refreshed incrementally
+in the background.
+"""
+
+import json
+import time
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from config import Config
+from models import RecipeSuggestion
+from services import metrics
+from services.name_resolver import normalize_name
+from utils import logger
+
+
+RECIPE_COLUMNS = ("id", "recipe_name", "ingredients", "img_src")
+
+# Quantities, units and preparation words that say nothing about what a recipe contains
+_INGREDIENT_STOPWORDS = frozenset("""
+    a an and or of the for to into in on with without about plus
+    cup cups tablespoon tablespoons tbsp tsp teaspoon teaspoons ounce ounces oz pound pounds
+    lb lbs gram grams g kg ml l liter liters litre pinch dash can cans package packages
+    jar jars bunch bunches stick sticks slice slices piece pieces inch inches quart pint
+    large small medium whole half chopped diced minced sliced fresh freshly ground crushed
+    grated shredded peeled cut finely thinly roughly coarsely divided optional taste needed
+    room temperature packed softened melted beaten cooked uncooked drained rinsed trimmed
+    cubed halved quartered more less additional extra
+""".split())
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def ingredient_tokens(text: str) -> Set[str]:
+    """Content tokens of one ingredient line or query ingredient."""
+    return {
+        _singular(word) for word in normalize_name(text).split()
+        if not word.isdigit() and word not in _INGREDIENT_STOPWORDS and len(word) > 1
+    }
+
+
+def ingredient_key(text: str) -> str:
+    """Canonical form of a query ingredient: "Eggs" and "egg" share one key."""
+    return " ".join(sorted(ingredient_tokens(text)))
+
+
+def _split_ingredients(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [part for part in str(value or "").split(",") if part.strip()]
+
+
+class _RecipeDoc:
+    __slots__ = ("id", "name", "image", "tokens", "lines")
+
+    def __init__(self, record: Dict[str, Any]):
+        self.id = record.get("id")
+        self.name = record.get("recipe_name") or record.get("title") or "Unknown Recipe"
+        self.image = record.get("img_src")
+        self.tokens: Set[str] = set()
+        lines = 0
+        for line in _split_ingredients(record.get("ingredients")):
+            tokens = ingredient_tokens(line)
+            if tokens:  # "minced" after a comma is not an ingredient of its own
+                self.tokens |= tokens
+                lines += 1
+        self.lines = max(lines, 1)
+
+    def same_as(self, other: "_RecipeDoc") -> bool:
+        return (self.tokens == other.tokens and self.name == other.name
+                and self.image == other.image and self.lines == other.lines)
+
+
+def _quoted(value: Any) -> str:
+    """A PostgREST logic-tree operand; timestamps hold reserved characters (":", ".")."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class SupabaseRecipeSource:
+    """Pages the recipes table in keyset order of (``column``, id)."""
+
+    def __init__(self, clients, table: str = "recipes"):
+        self._clients = clients
+        self._table = table
+
+    async def fetch(self, column: str, after: Any, limit: int, after_id: Any = None) -> List[Dict[str, Any]]:
+        """Up to ``limit`` rows after (``after``, ``after_id``); without ``after_id``, rows with ``column`` > ``after``."""
+        supabase = await self._clients.supabase()
+        if supabase is None:
+            raise RuntimeError("Supabase is not configured")
+        columns = RECIPE_COLUMNS if column in RECIPE_COLUMNS else RECIPE_COLUMNS + (column,)
+        query = supabase.table(self._table).select(",".join(columns)).order(column)
+        if column != "id":
+            query = query.order("id")
+        query = query.limit(limit)
+        if after is not None:
+            if column == "id" or after_id is None:
+                query = query.gt(column, after)
+            else:
+                query = query.or_(f"{column}.gt.{_quoted(after)},"
+                                  f"and({column}.eq.{_quoted(after)},id.gt.{_quoted(after_id)})")
+        started = time.perf_counter()
+        try:
+            response = await query.execute()
+        except Exception:
+            metrics.SUPABASE_LATENCY.observe(time.perf_counter() - started, self._table, "error")
+            metrics.ERRORS.inc("supabase")
+            raise
+        metrics.SUPABASE_LATENCY.observe(time.perf_counter() - started, self._table, "ok")
+        return response.data or []
+
+
+class LocalRecipeSource:
+    """Stand-in source over a JSON list of recipe rows (tests, offline development)."""
+
+    def __init__(self, path: Optional[str] = None, records: Optional[List[Dict[str, Any]]] = None):
+        self._path = path
+        self._records = records
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if self._records is not None:
+            return self._records
+        with open(self._path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def fetch(self, column: str, after: Any, limit: int, after_id: Any = None) -> List[Dict[str, Any]]:
+        rows = [r for r in self._load() if r.get(column) is not None]
+        if after is not None:
+            if column == "id" or after_id is None:
+                rows = [r for r in rows if r[column] > after]
+            else:
+                rows = [r for r in rows if (r[column], r["id"]) > (after, after_id)]
+        rows.sort(key=lambda r: (r[column], r.get("id")))
+        return rows[:limit]
+
+
+class RecipeIndex:
+    """Ingredient-token inverted index over recipe rows.
+
+    Rows are upserted by id, so refreshing by ``updated_at`` picks up edits as well as
+    inserts; deletions are picked up by the periodic full reload.
+    """
+
+    def __init__(self, config: Config, source):
+        self.config = config
+        self.source = source
+        self.column = config.recipe_index_refresh_column
+        self._docs: Dict[Any, _RecipeDoc] = {}
+        self._postings: Dict[str, Set[Any]] = {}
+        self._watermark: Optional[Tuple[Any, Any]] = None  # (column value, id) of the last row pulled
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Optional[Set[str]]], None]] = []
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded_at > 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add_listener(self, callback: Callable[[Optional[Set[str]]], None]):
+        """Call ``callback(tokens)`` after recipes containing ``tokens`` change (None: all of them)."""
+        self._listeners.append(callback)
+
+    def _notify(self, tokens: Optional[Set[str]]):
+        for callback in self._listeners:
+            try:
+                callback(tokens)
+            except Exception as e:
+                logger.error(f"Recipe index listener failed: {e}")
+
+    def _add(self, docs: Dict[Any, _RecipeDoc], postings: Dict[str, Set[Any]], record: Dict[str, Any],
+             changed: Optional[Set[str]] = None) -> bool:
+        """Upsert one row; False when an identical row was already indexed."""
+        doc = _RecipeDoc(record)
+        old = docs.get(doc.id)
+        if old is not None:
+            if old.same_as(doc):
+                return False
+            for token in old.tokens:
+                postings[token].discard(doc.id)
+            if changed is not None:
+                changed |= old.tokens
+        if changed is not None:
+            changed |= doc.tokens
+        docs[doc.id] = doc
+        for token in doc.tokens:
+            postings.setdefault(token, set()).add(doc.id)
+        return True
+
+    async def _pull(self, docs, postings, watermark, changed: Optional[Set[str]] = None):
+        """Page rows after ``watermark``, a (column value, id) pair, into ``docs``/``postings``.
+
+        Rows are paged in keyset order of (column, id), so a run of equal updated_at
+        values longer than a page is not cut short. Returns the new watermark and how
+        many rows were new or changed.
+        """
+        batch = self.config.recipe_index_batch_size
+        applied = 0
+        after, after_id = watermark if watermark is not None else (None, None)
+        while True:
+            rows = await self.source.fetch(self.column, after, batch, after_id)
+            for row in rows:
+                applied += self._add(docs, postings, row, changed)
+            if rows:
+                after, after_id = rows[-1].get(self.column), rows[-1].get("id")
+            if len(rows) < batch:
+                return (after, after_id) if after is not None else None, applied
+
+    @property
+    def backing_off(self) -> bool:
+        """True while a failed load is not yet due for another attempt."""
+        return not self.ready and time.time() < self._retry_at
+
+    async def ensure_loaded(self) -> bool:
+        """Load the snapshot unless it already is (concurrent callers share one load).
+
+        Returns False without loading while a failed load is backing off.
+        """
+        if not self.ready and not self.backing_off:
+            await self.load(only_if_missing=True)
+        return self.ready
+
+    async def load(self, only_if_missing: bool = False):
+        """Build a fresh snapshot and swap it in."""
+        async with self._lock:
+            if only_if_missing and (self.ready or self.backing_off):
+                return
+            started = time.perf_counter()
+            docs: Dict[Any, _RecipeDoc] = {}
+            postings: Dict[str, Set[Any]] = {}
+            try:
+                watermark, _ = await self._pull(docs, postings, None)
+            except Exception:
+                self._failures += 1
+                delay = min(self.config.recipe_index_retry_max_interval,
+                            self.config.recipe_index_retry_interval * 2 ** (self._failures - 1))
+                self._retry_at = time.time() + delay
+                logger.warning(f"Recipe index load failed {self._failures} time(s), next attempt in {delay:.0f}s")
+                raise
+            self._failures, self._retry_at = 0, 0.0
+            self._docs, self._postings, self._watermark = docs, postings, watermark
+            self._loaded_at = self._refreshed_at = time.time()
+            logger.info(f"Recipe index loaded {len(docs)} recipes in {time.perf_counter() - started:.2f}s")
+        self._notify(None)
+
+    async def refresh(self) -> int:
+        """Apply rows added or updated since the last load; returns how many changed."""
+        if not self.ready:
+            if self.backing_off:
+                return 0
+            await self.load()
+            return len(self._docs)
+        changed: Set[str] = set()
+        async with self._lock:
+            self._watermark, applied = await self._pull(self._docs, self._postings, self._watermark, changed)
+            self._refreshed_at = time.time()
+        if changed:
+            self._notify(changed)
+        return applied
+
+    def search(self, ingredients: List[str], limit: int) -> List[RecipeSuggestion]:
+        """Recipes containing the most query ingredients, then the best covered."""
+        return self.search_ranked(ingredients, limit)[0]
+
+    def search_ranked(self, ingredients: List[str], limit: int) -> Tuple[List[RecipeSuggestion], List[Tuple[FrozenSet[str], int]], bool]:
+        """Like search, plus (matched ingredient keys, ingredient lines) per result and
+        whether the results are every recipe that matched at all."""
+        with metrics.DATASET_LATENCY.time("recipe_search"):
+            return self._search_ranked(ingredients, limit)
+
+    def _search_ranked(self, ingredients: List[str], limit: int):
+        keys = {ingredient_key(ingredient) for ingredient in ingredients} - {""}
+        overlap: Counter = Counter()
+        for key in keys:
+            postings = sorted((self._postings.get(t, ()) for t in key.split()), key=len)
+            overlap.update(set(postings[0]).intersection(*postings[1:]) if len(postings) > 1 else postings[0])
+
+        # Bucket by overlap so only the best buckets are sorted by coverage
+        buckets: Dict[int, List[Any]] = {}
+        for doc_id, count in overlap.items():
+            buckets.setdefault(count, []).append(doc_id)
+
+        docs = self._docs
+        ranked: List[Any] = []
+        for count in sorted(buckets, reverse=True):
+            bucket = buckets[count]
+            bucket.sort(key=lambda doc_id: (docs[doc_id].lines, str(doc_id)))
+            ranked.extend(bucket[:limit - len(ranked)])
+            if len(ranked) >= limit:
+                break
+
+        results = [
+            RecipeSuggestion(name=docs[doc_id].name, ingredients="", id=doc_id, image=docs[doc_id].image)
+            for doc_id in ranked
+        ]
+        details = [
+            (frozenset(k for k in keys if docs[doc_id].tokens.issuperset(k.split())), docs[doc_id].lines)
+            for doc_id in ranked
+        ]
+        return results, details, len(overlap) <= limit
+
+    async def _refresh_loop(self):
+        interval = self.config.recipe_index_refresh_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if time.time() - self._loaded_at >= self.config.recipe_index_full_reload_interval:
+                    await self.load()
+                else:
+                    applied = await self.refresh()
+                    if applied:
+                        logger.info(f"Recipe index refreshed: {applied} new or updated recipes")
+            except Exception as e:
+                logger.error(f"Recipe index refresh failed: {e}")
+
+    async def start(self):
+        """Load the snapshot and keep it fresh in the background."""
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Recipe index load failed: {e}")
+        if self.config.recipe_index_refresh_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recipes": len(self._docs),
+            "tokens": len(self._postings),
+            "refresh_column": self.column,
+            "watermark": self._watermark,
+            "loaded_at": self._loaded_at,
+            "refreshed_at": self._refreshed_at,
+            "load_failures": self._failures,
+        }
@@ -5,110 +5,341 @@ Recipe Service for Recipe Suggestion System
 Service for recipe-related operations, delegating to OpenAI service for recipe suggestions.
 """
 
-import os
-from typing import List, Optional
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from config import Config
 from models import RecipeSuggestion
-from services.openai_service import OpenAIService
+from services import metrics
+from services.async_openai_service import AsyncOpenAIService
+from services.clients import get_client_registry
+from services.dataset_service import DatasetService
+from services.name_resolver import normalize_name
+from services.recipe_index import LocalRecipeSource, RecipeIndex, SupabaseRecipeSource
+from services.recipe_validation import RequiredIngredients, YieldTracker, request_shape
+from services.session_store import SessionState, SessionStore
+from services.suggestion_cache import SuggestionCache
 from utils import logger
 
 
 class RecipeService:
     """Service for recipe-related operations."""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, openai_service: Optional[AsyncOpenAIService] = None,
+                 dataset_service: Optional[DatasetService] = None):
         self.config = config
-        self.openai_service = OpenAIService(config)
-        self._supabase = None
-        self._initialize_supabase()
-    
-    def _initialize_supabase(self):
-        """Initialize the Supabase client."""
-        url = os.getenv("VITE_SUPABASE_URL")
-        key = os.getenv("VITE_SUPABASE_ANON_KEY")
-        
-        if not url or not key:
-            return
-            
-        try:
-            from supabase import create_client
-            self._supabase = create_client(url, key)
-            logger.info("Supabase client initialized successfully")
-        except ImportError:
-            logger.warning("Supabase package not installed. Run `pip install supabase`.")
-        except Exception as e:
-            logger.error(f"Failed to initialize Supabase client: {e}")
-
-    def _get_supabase_suggestions(self, ingredients: List[str], limit: int) -> List[RecipeSuggestion]:
-        """Get suggestions from Supabase."""
-        if not self._supabase or not ingredients:
+        self.openai_service = openai_service or AsyncOpenAIService(config)
+        # Ingredient names and aliases for checking /suggest_specific results
+        self.dataset_service = dataset_service
+        self._clients = get_client_registry(config)
+        self.recipe_index = self._build_recipe_index()
+        self.suggestion_cache = SuggestionCache(config) if config.suggest_cache_enabled else None
+        if self.suggestion_cache is not None and self.recipe_index is not None:
+            # Changed recipes invalidate the cached database results they could affect
+            self.recipe_index.add_listener(self.suggestion_cache.invalidate_tokens)
+        self.sessions = SessionStore(config) if config.session_max_entries > 0 else None
+        self.specific_yields = YieldTracker(config)
+    
+    @property
+    def has_supabase(self) -> bool:
+        """Check if Supabase credentials are configured."""
+        return self._clients.has_supabase
+    
+    def _build_recipe_index(self) -> Optional[RecipeIndex]:
+        """Recipe index over the local stand-in when configured, else over Supabase."""
+        if not self.config.recipe_index_enabled:
+            return None
+        if self.config.recipe_snapshot_path:
+            return RecipeIndex(self.config, LocalRecipeSource(self.config.recipe_snapshot_path))
+        if self.has_supabase:
+            return RecipeIndex(self.config, SupabaseRecipeSource(self._clients))
+        return None
+    
+    @property
+    def ready(self) -> bool:
+        """True once the recipe index (if any) has loaded."""
+        return self.recipe_index is None or self.recipe_index.ready
+    
+    async def start(self):
+        """Load the recipe index snapshot and start its background refresh."""
+        if self.recipe_index is not None:
+            await self.recipe_index.start()
+    
+    async def stop(self):
+        if self.recipe_index is not None:
+            await self.recipe_index.stop()
+    
+    async def _get_supabase_suggestions(self, ingredients: List[str], limit: int) -> List[RecipeSuggestion]:
+        """Query the recipes table directly (index disabled, or not loaded yet)."""
+        supabase = await self._clients.supabase()
+        if not supabase or not ingredients:
+            return []
+        
+        # Recipes containing any of the ingredients, unranked
+        or_filter = ",".join(f"ingredients.ilike.%{ing.strip()}%" for ing in ingredients if ing.strip())
+        if not or_filter:
             return []
-            
+        
+        started = time.perf_counter()
         try:
-            # Construct OR filter to find recipes containing any of the ingredients
-            # Assumes 'recipes' table with 'ingredients' column
-            or_filter = ",".join(f"ingredients.ilike.%{ing.strip()}%" for ing in ingredients if ing.strip())
-            
-            if not or_filter:
-                return []
-                
-            response = self._supabase.table("recipes") \
+            response = await supabase.table("recipes") \
                 .select("*") \
                 .or_(or_filter) \
                 .limit(limit) \
                 .execute()
-                
-            results = []
-            for record in response.data:
-                name = record.get("recipe_name") or record.get("title", "Unknown Recipe")
-                # ing_data = record.get("ingredients", "")
-                # ing_text = ", ".join(str(x) for x in ing_data) if isinstance(ing_data, list) else str(ing_data)
-                
-                results.append(RecipeSuggestion(name=name, ingredients="", id=record.get("id"), image=record.get("img_src")))
-                
-            print(f"Supabase returned {len(results)} recipes.")
-            return results
         except Exception as e:
+            metrics.SUPABASE_LATENCY.observe(time.perf_counter() - started, "recipes", "error")
+            metrics.ERRORS.inc("supabase")
             logger.error(f"Error querying Supabase: {e}")
             return []
+        metrics.SUPABASE_LATENCY.observe(time.perf_counter() - started, "recipes", "ok")
+        
+        return [
+            RecipeSuggestion(name=record.get("recipe_name") or record.get("title") or "Unknown Recipe",
+                             ingredients="", id=record.get("id"), image=record.get("img_src"))
+            for record in response.data or []
+        ]
     
-    def get_suggestions(self, ingredients: List[str],
+    async def _get_indexed_suggestions(self, ingredients: List[str], limit: int) -> Optional[List[RecipeSuggestion]]:
+        """Rank recipes from the in-process index, loading it on first use.
+        
+        None when there is no loaded index to answer from.
+        """
+        if self.recipe_index is None:
+            return None
+        try:
+            if not await self.recipe_index.ensure_loaded():
+                return None
+            results, details, exhaustive = self.recipe_index.search_ranked(ingredients, limit)
+        except Exception as e:
+            metrics.ERRORS.inc("recipe_index")
+            logger.error(f"Error querying recipe index: {e}")
+            return None
+        if self.suggestion_cache is not None:
+            self.suggestion_cache.put(self.suggestion_cache.key(ingredients), results, "database",
+                                      details, exhaustive)
+        return results
+    
+    async def _get_database_suggestions(self, ingredients: List[str], limit: int) -> List[RecipeSuggestion]:
+        """Recipes from the index, or straight from Supabase while the index is unavailable."""
+        if not ingredients:
+            return []
+        results = await self._get_indexed_suggestions(ingredients, limit)
+        if results is None:
+            results = await self._get_supabase_suggestions(ingredients, limit)
+        return results
+    
+    async def get_suggestions(self, ingredients: List[str],
                        max_results: Optional[int] = None) -> List[RecipeSuggestion]:
         """Get recipe suggestions based on available ingredients."""
         max_results = max_results or self.config.max_recipes
         
-        # Try Supabase first
-        if self._supabase:
-            db_results = self._get_supabase_suggestions(ingredients, max_results)
-            if db_results:
-                print(f"Returning {len(db_results)} recipes from Supabase.")
-                print(db_results)
-                return db_results
+        # Same pantry in any order, casing or plural form shares one cache entry
+        if self.suggestion_cache is not None:
+            cached = self.suggestion_cache.get(self.suggestion_cache.key(ingredients), max_results)
+            if cached is not None:
+                metrics.RESULT_SOURCES.inc("suggest", cached[1])
+                return cached[0]
+        
+        # Try the recipe database first
+        db_results = await self._get_database_suggestions(ingredients, max_results)
+        if db_results:
+            metrics.RESULT_SOURCES.inc("suggest", "database")
+            return db_results
         
         if not self.openai_service.is_available:
+            metrics.RESULT_SOURCES.inc("suggest", "none")
             return []
         
-        return self.openai_service.get_recipe_suggestions(ingredients, max_results)
+        results = await self.openai_service.get_recipe_suggestions(ingredients, max_results)
+        if self.suggestion_cache is not None:
+            self.suggestion_cache.put(self.suggestion_cache.key(ingredients), results, "gpt")
+        metrics.RESULT_SOURCES.inc("suggest", "gpt" if results else "none")
+        return results
     
-    def get_similar_recipes(self, original_recipe: str, max_results: int = 4) -> List[RecipeSuggestion]:
-        """Get recipes similar to the original recipe."""
-        if not self.openai_service.is_available:
+    def _session(self, session_id: Optional[str], recipe_name: str = "") -> Optional[SessionState]:
+        return self.sessions.get(session_id, recipe_name) if self.sessions is not None else None
+    
+    def _remember(self, session_id: Optional[str], recipe_name: str, **changes):
+        if self.sessions is not None:
+            self.sessions.update(session_id, recipe_name, **changes)
+    
+    def _reused(self, operation: str):
+        self.sessions.record_reuse()
+        metrics.RESULT_SOURCES.inc(operation, "session")
+    
+    async def get_recipe_details(self, recipe_name: str, session_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Ingredients and cooking method of a dish, from the session if it already looked it up."""
+        state = self._session(session_id, recipe_name)
+        if state is not None and state.details:
+            self._reused("lookup")
+            return state.details
+        
+        details = await self.openai_service.get_recipe_details(recipe_name)
+        if details:
+            self._remember(session_id, recipe_name, details=details)
+        return details
+    
+    async def stream_recipe_details(self, recipe_name: str,
+                                    session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_recipe_details."""
+        state = self._session(session_id, recipe_name)
+        if state is not None and state.details:
+            self._reused("lookup")
+            events = self.openai_service.replay_sections(state.details)
+        else:
+            events = self.openai_service.stream_recipe_details(recipe_name)
+        async with aclosing(events):
+            async for event, data in events:
+                if event == "done" and data:
+                    self._remember(session_id, recipe_name, details=data)
+                yield event, data
+    
+    async def get_similar_recipes(self, original_recipe: str, max_results: int = 4,
+                                  session_id: Optional[str] = None) -> List[RecipeSuggestion]:
+        """Get recipes similar to the original recipe (by default the session's dish)."""
+        state = self._session(session_id, original_recipe)
+        if state is not None:
+            original_recipe = original_recipe or state.recipe
+            if state.similar and state.similar_limit >= max_results:
+                self._reused("similar")
+                return state.similar[:max_results]
+        
+        if not self.openai_service.is_available or not original_recipe:
             return []
         
-        return self.openai_service.get_similar_recipes(original_recipe, max_results)
+        results = await self.openai_service.get_similar_recipes(original_recipe, max_results)
+        if results:
+            self._remember(session_id, original_recipe, similar=results, similar_limit=max_results)
+        return results
     
-    def get_recipe_with_ingredients(self, recipe_name: str, substitute_ingredients: List[str]) -> Optional[RecipeSuggestion]:
-        """Get the original recipe with detailed ingredients, incorporating substitutes."""
+    async def get_recipe_with_ingredients(self, recipe_name: str, substitute_ingredients: List[str],
+                                          session_id: Optional[str] = None) -> Optional[RecipeSuggestion]:
+        """Get the original recipe with detailed ingredients, incorporating substitutes.
+        
+        Without substitutes, the session's substitutions are used; if the session's
+        latest rewrite already made exactly these substitutions, it is returned as is.
+        """
+        state = self._session(session_id, recipe_name)
+        if state is not None and state.substitutions:
+            made = [new for _, new in state.substitutions]
+            substitute_ingredients = substitute_ingredients or made
+            if state.rewritten and {normalize_name(s) for s in substitute_ingredients} == {normalize_name(s) for s in made}:
+                self._reused("recipe_custom")
+                return RecipeSuggestion(name=state.recipe, ingredients=state.rewritten["ingredients"])
+        
         if not self.openai_service.is_available:
             return None
         
-        return self.openai_service.get_recipe_with_ingredients(recipe_name, substitute_ingredients)
+        return await self.openai_service.get_recipe_with_ingredients(recipe_name, substitute_ingredients)
     
-    def get_recipes_with_specific_ingredients(self, required_ingredients: List[str], 
+    async def get_recipes_with_specific_ingredients(self, required_ingredients: List[str], 
                                             recipe_context: str = "", max_results: int = 5) -> List[RecipeSuggestion]:
-        """Get recipe suggestions that MUST include the specified ingredients."""
+        """Get recipe suggestions that MUST include the specified ingredients.
+        
+        In adaptive mode more candidates than ``max_results`` are asked for, as many as
+        the share that passed for this request shape suggests, and each is checked
+        against every dataset name of the required ingredients. If too few pass, one
+        follow-up call asks for the rest, excluding the recipes already seen.
+        """
         if not self.openai_service.is_available:
             return []
+        if not self.config.specific_adaptive or not required_ingredients:
+            return await self.openai_service.get_recipes_with_specific_ingredients(required_ingredients, recipe_context, max_results)
         
-        return self.openai_service.get_recipes_with_specific_ingredients(required_ingredients, recipe_context, max_results)
+        required = self._required_ingredients(required_ingredients)
+        shape = request_shape(required_ingredients, recipe_context)
+        asked = self.specific_yields.candidates(shape, max_results)
+        candidates = await self.openai_service.get_specific_ingredient_candidates(
+            required_ingredients, recipe_context, asked
+        )
+        results = required.select(candidates)
+        self.specific_yields.record(shape, asked, len(results))
+        
+        # No candidates at all means the request failed, which a second ask will not fix
+        topped_up = bool(candidates) and len(results) < max_results
+        if topped_up:
+            asked = self.specific_yields.candidates(shape, max_results - len(results))
+            more = await self.openai_service.get_specific_ingredient_candidates(
+                required_ingredients, recipe_context, asked, exclude=[r.name for r in candidates]
+            )
+            valid = required.select(more, exclude=[r.name for r in results])
+            self.specific_yields.record(shape, asked, len(valid))
+            results += valid
+        self.specific_yields.record_request(shape, topped_up, len(results) < max_results)
+        return results[:max_results]
+    
+    def _required_ingredients(self, names: List[str]) -> RequiredIngredients:
+        """Required ingredients with their dataset names and aliases, when the dataset is available."""
+        if self.dataset_service is None:
+            return RequiredIngredients({name: () for name in names})
+        return RequiredIngredients({name: self.dataset_service.ingredient_names(name) for name in names})
+    
+    async def rewrite_recipe(self, recipe_name: str, old_ingredient: str, new_ingredient: str,
+                             original_ingredients: str = "", session_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Rewrite a recipe with one ingredient substituted, in a single LLM round trip.
+        
+        Uses the client-supplied ingredients, the session's current version of the
+        dish, or those from a recent lookup, when available; otherwise recalls the
+        recipe and rewrites it in one combined prompt. The returned dict reports the
+        path taken under "path".
+        """
+        if not self.openai_service.is_available:
+            return None
+        
+        path, original_ingredients, replaced = await self._rewrite_path(
+            recipe_name, original_ingredients, old_ingredient, session_id
+        )
+        if path == "combined":
+            result = await self.openai_service.get_rewritten_recipe(
+                recipe_name, old_ingredient, new_ingredient
+            )
+        else:
+            result = await self.openai_service.get_updated_recipe_with_substitution(
+                recipe_name, original_ingredients, replaced, new_ingredient
+            )
+        
+        if not result:
+            return None
+        self._remember(session_id, recipe_name, rewritten=result, substitution=(old_ingredient, new_ingredient))
+        return {**result, "path": path}
+    
+    async def _rewrite_path(self, recipe_name: str, original_ingredients: str, old_ingredient: str = "",
+                      session_id: Optional[str] = None) -> Tuple[str, str, str]:
+        """Pick the rewrite path, the ingredients it starts from and the ingredient to replace in them."""
+        if original_ingredients.strip():
+            return "client", original_ingredients, old_ingredient
+        state = self._session(session_id, recipe_name)
+        if state is not None and state.current and state.current.get("ingredients"):
+            # Substitutions build on each other; revisiting an ingredient already replaced
+            # replaces what it became, keeping the session's other substitutions
+            key = normalize_name(old_ingredient)
+            replaced = [new for old, new in state.substitutions if normalize_name(old) == key]
+            self.sessions.record_reuse()
+            return "session", state.current["ingredients"], replaced[-1] if replaced else old_ingredient
+        details = await self.openai_service.get_cached_recipe_details(recipe_name)
+        if details and details.get("ingredients"):
+            return "recent_lookup", details["ingredients"], old_ingredient
+        return "combined", "", old_ingredient
+    
+    async def stream_rewrite_recipe(self, recipe_name: str, old_ingredient: str, new_ingredient: str,
+                                    original_ingredients: str = "",
+                                    session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of rewrite_recipe yielding (event, data) pairs; "done" carries "path"."""
+        path, original_ingredients, replaced = await self._rewrite_path(
+            recipe_name, original_ingredients, old_ingredient, session_id
+        )
+        if path == "combined":
+            events = self.openai_service.stream_rewritten_recipe(recipe_name, old_ingredient, new_ingredient)
+        else:
+            events = self.openai_service.stream_updated_recipe_with_substitution(
+                recipe_name, original_ingredients, replaced, new_ingredient
+            )
+        async with aclosing(events):
+            async for event, data in events:
+                if event == "done" and data:
+                    self._remember(session_id, recipe_name, rewritten=data,
+                                   substitution=(old_ingredient, new_ingredient))
+                    data = {**data, "path": path}
+                yield event, data
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Recipe Validation for Recipe Suggestion System
+
+Checks that suggested recipes contain the ingredients a request requires, where
+any dataset name or alias of a required ingredient counts (the Thai name satisfies
+the English one and the other way round), and tracks per request shape how many of
+the LLM's candidates pass, so /suggest_specific can ask for just enough extra
+candidates to end up with the number it needs.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Pattern
+
+from config import Config
+from models import RecipeSuggestion
+from services.name_resolver import normalize_name
+
+
+def _name_pattern(name: str) -> Pattern:
+    # ASCII word boundaries (Thai is written without spaces) and an optional plural
+    return re.compile(rf"(?<![a-z0-9]){re.escape(name)}(?:e?s)?(?![a-z0-9])")
+
+
+class RequiredIngredients:
+    """Required ingredients, each with every name that refers to it."""
+
+    def __init__(self, names: Dict[str, Iterable[str]]):
+        """``names`` maps each required ingredient to its known names and aliases."""
+        self._patterns: Dict[str, List[Pattern]] = {}
+        for required, aliases in names.items():
+            keys = {normalize_name(required)} | {normalize_name(alias) for alias in aliases}
+            self._patterns[required] = [_name_pattern(key) for key in sorted(keys, key=len, reverse=True) if key]
+
+    def missing(self, ingredients_text: str) -> List[str]:
+        """Required ingredients not mentioned under any of their names."""
+        text = normalize_name(ingredients_text)
+        return [required for required, patterns in self._patterns.items()
+                if not any(pattern.search(text) for pattern in patterns)]
+
+    def select(self, candidates: Iterable[RecipeSuggestion], exclude: Iterable[str] = ()) -> List[RecipeSuggestion]:
+        """Candidates that mention every required ingredient, one per recipe name."""
+        seen = {normalize_name(name) for name in exclude}
+        selected = []
+        for recipe in candidates:
+            key = normalize_name(recipe.name)
+            if key in seen or self.missing(recipe.ingredients):
+                continue
+            seen.add(key)
+            selected.append(recipe)
+        return selected
+
+
+def request_shape(required_ingredients: List[str], recipe_context: str = "") -> str:
+    """Bucket of requests expected to have a similar candidate pass rate."""
+    count = len(required_ingredients)
+    return f"{count if count < 4 else '4+'} required{' +context' if recipe_context else ''}"
+
+
+class YieldTracker:
+    """Smoothed share of valid candidates per request shape, and the over-generation factor it implies."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._yields: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "candidates": 0, "valid": 0, "top_ups": 0, "short": 0})
+
+    def factor(self, shape: str) -> float:
+        observed = self._yields.get(shape)
+        if observed is None:
+            return self.config.specific_initial_factor
+        factor = self.config.specific_factor_headroom / max(observed, 1e-6)
+        return min(self.config.specific_max_factor, max(1.0, factor))
+
+    def candidates(self, shape: str, needed: int) -> int:
+        """Candidates to ask for to end up with ``needed`` valid ones."""
+        wanted = int(needed * self.factor(shape) + 0.999)
+        return max(needed, min(self.config.specific_max_candidates, wanted))
+
+    def record(self, shape: str, asked: int, valid: int):
+        """Account one completion that was asked for ``asked`` candidates."""
+        if asked <= 0:
+            return
+        observed = min(1.0, valid / asked)
+        previous = self._yields.get(shape)
+        alpha = self.config.specific_yield_alpha
+        self._yields[shape] = observed if previous is None else previous + alpha * (observed - previous)
+        stats = self._stats[shape]
+        stats["candidates"] += asked
+        stats["valid"] += valid
+
+    def record_request(self, shape: str, topped_up: bool, short: bool):
+        stats = self._stats[shape]
+        stats["requests"] += 1
+        stats["top_ups"] += topped_up
+        stats["short"] += short
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            shape: {**counts, "yield": round(self._yields.get(shape, 0.0), 4),
+                    "factor": round(self.factor(shape), 3)}
+            for shape, counts in self._stats.items()
+        }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Session Store for Recipe Suggestion System
+
+Conversation-scoped state for the follow-up endpoints (/lookup, /rewrite, /similar,
+/recipe_custom): the dish being discussed, its looked-up details, the latest rewrite
+and recent substitutions, so a follow-up can reuse them instead of asking the LLM
+again. Sessions live in a TTL/LRU-bounded map keyed by the client's session_id.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from models import RecipeSuggestion
+from services.name_resolver import normalize_name
+
+
+@dataclass
+class SessionState:
+    """What a conversation has established about its current dish."""
+    recipe: str
+    details: Optional[Dict[str, str]] = None  # /lookup result
+    rewritten: Optional[Dict[str, str]] = None  # latest /rewrite result
+    substitutions: List[Tuple[str, str]] = field(default_factory=list)  # (old, new), oldest first
+    similar: Optional[List[RecipeSuggestion]] = None
+    similar_limit: int = 0  # max_results the similar recipes were asked for
+    expires_at: float = 0.0
+
+    def is_about(self, recipe: str) -> bool:
+        return bool(recipe) and normalize_name(recipe) == normalize_name(self.recipe)
+
+    @property
+    def current(self) -> Optional[Dict[str, str]]:
+        """Latest known ingredients and method: the rewrite if any, else the lookup."""
+        return self.rewritten or self.details
+
+
+class SessionStore:
+    """Session state by session_id with a sliding TTL and LRU eviction past ``session_max_entries``."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "reused": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, session_id: Optional[str], recipe: str = "") -> Optional[SessionState]:
+        """Live state of a session, if it is about ``recipe`` (any dish when empty)."""
+        if not session_id:
+            return None
+        state = self._sessions.get(session_id)
+        if state is not None and state.expires_at <= time.time():
+            del self._sessions[session_id]
+            self._stats["expirations"] += 1
+            state = None
+        if state is None or (recipe and not state.is_about(recipe)):
+            self._stats["misses"] += 1
+            return None
+        self._touch(session_id, state)
+        self._stats["hits"] += 1
+        return state
+
+    def record_reuse(self):
+        """Count a follow-up answered from session state instead of the LLM."""
+        self._stats["reused"] += 1
+
+    def update(self, session_id: Optional[str], recipe: str, **changes) -> Optional[SessionState]:
+        """Apply ``changes`` to the session's state for ``recipe``.
+
+        A different dish starts the session over. ``substitution=(old, new)`` is folded
+        into the bounded substitution history (see ``_substitute``).
+        """
+        if not session_id or not recipe or self.config.session_max_entries <= 0:
+            return None
+        self._expire()
+        state = self._sessions.get(session_id)
+        if state is None or state.expires_at <= time.time() or not state.is_about(recipe):
+            state = SessionState(recipe)
+        substitution = changes.pop("substitution", None)
+        if substitution is not None:
+            self._substitute(state, *substitution)
+        for name, value in changes.items():
+            setattr(state, name, value)
+        self._touch(session_id, state)
+        while len(self._sessions) > self.config.session_max_entries:
+            self._sessions.popitem(last=False)
+            self._stats["evictions"] += 1
+        return state
+
+    def _substitute(self, state: SessionState, old: str, new: str):
+        """Record ``old`` -> ``new``, keeping one pair per original ingredient.
+
+        Replacing an ingredient replaced before supersedes that pair, and so does
+        replacing the ingredient it was replaced with: milk -> oat milk then oat milk
+        -> soy milk is one pair milk -> soy milk. A pair that ends where it started is
+        dropped.
+        """
+        key = normalize_name(old)
+        for i, (original, replaced) in enumerate(state.substitutions):
+            if key in (normalize_name(original), normalize_name(replaced)):
+                del state.substitutions[i]
+                old = original
+                break
+        if normalize_name(old) != normalize_name(new):
+            state.substitutions.append((old, new))
+        limit = max(0, self.config.session_max_substitutions)
+        if len(state.substitutions) > limit:
+            del state.substitutions[:len(state.substitutions) - limit]
+
+    def _expire(self):
+        """Drop expired sessions; the least recently used ones expire first."""
+        now = time.time()
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if state.expires_at > now:
+                break
+            del self._sessions[session_id]
+            self._stats["expirations"] += 1
+
+    def _touch(self, session_id: str, state: SessionState):
+        state.expires_at = time.time() + self.config.session_ttl
+        self._sessions[session_id] = state
+        self._sessions.move_to_end(session_id)
+
+    def clear(self):
+        self._sessions.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "sessions": len(self._sessions)}
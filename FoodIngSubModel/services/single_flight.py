@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Request Coalescing for Recipe Suggestion System
+
+Lets concurrent coroutines with the same key share one in-flight upstream call.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class AsyncSingleFlight:
+    """Coalesce identical concurrent coroutine calls on one event loop.
+
+    The shared call runs in its own task and every caller, the first one included,
+    awaits it through ``shield``: a cancelled caller only stops waiting, and the
+    others still get the result. The call finishes even if every caller gave up,
+    so its result can still fill caches.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            self._leaders += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when nobody was left waiting
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self._leaders,
+            "coalesced_calls": self._coalesced,
+            "in_flight": len(self._calls),
+        }
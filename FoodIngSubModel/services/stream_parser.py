@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Streaming Response Parser for Recipe Suggestion System
+
+Incrementally splits 'Ingredients: ... | Cooking Method: ...' completions into an
+ingredients section (emitted once, as soon as the separator arrives) and a stream
+of cooking-method text.
+"""
+
+import re
+from typing import List, Tuple
+
+
+_INGREDIENTS_LABEL = re.compile(r"^\s*(?:updated\s+)?ingredients:\s*", re.IGNORECASE)
+_METHOD_LABEL = re.compile(r"^\s*(?:updated\s+)?cooking method:\s*", re.IGNORECASE)
+_SEPARATOR = re.compile(r"\||(?:updated\s+)?cooking method:", re.IGNORECASE)
+
+_METHOD_LABELS = ("cooking method:", "updated cooking method:")
+
+
+def _may_be_label(text: str) -> bool:
+    """True while ``text`` could still grow into a cooking-method label."""
+    text = text.lower()
+    return any(label.startswith(text) for label in _METHOD_LABELS)
+
+
+class SectionStreamParser:
+    """Feed completion deltas in; get ("ingredients", text) and ("cooking_method", delta) events out."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._state = "ingredients"  # -> "label" -> "method"
+        self.ingredients = ""
+        self.cooking_method = ""
+
+    @property
+    def split(self) -> bool:
+        """True once the ingredients section has been emitted."""
+        return self._state != "ingredients"
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        self._buffer += delta or ""
+        events: List[Tuple[str, str]] = []
+
+        if self._state == "ingredients":
+            match = _SEPARATOR.search(self._buffer)
+            if not match:
+                return events
+            self.ingredients = _INGREDIENTS_LABEL.sub("", self._buffer[:match.start()]).strip()
+            events.append(("ingredients", self.ingredients))
+            rest = self._buffer[match.start():]
+            self._buffer = rest[1:] if rest.startswith("|") else rest
+            self._state = "label"
+
+        if self._state == "label":
+            stripped = self._buffer.lstrip()
+            label = _METHOD_LABEL.match(self._buffer)
+            if label:
+                self._buffer = self._buffer[label.end():]
+            elif _may_be_label(stripped):
+                return events  # a label split across chunks; wait for the rest
+            else:
+                self._buffer = stripped
+            self._state = "method"
+
+        if self._state == "method" and self._buffer:
+            if not self.cooking_method:
+                self._buffer = self._buffer.lstrip()
+            if self._buffer:
+                self.cooking_method += self._buffer
+                events.append(("cooking_method", self._buffer))
+                self._buffer = ""
+        return events
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Flush anything still buffered at end of stream."""
+        events: List[Tuple[str, str]] = []
+        if self._state == "ingredients":
+            return events  # never split; the caller falls back to the full parser
+        if self._state == "label":
+            label = _METHOD_LABEL.match(self._buffer)
+            self._buffer = self._buffer[label.end():] if label else self._buffer.lstrip()
+            self._state = "method"
+        if self._buffer.strip():
+            delta = self._buffer.rstrip() if self.cooking_method else self._buffer.strip()
+            self.cooking_method += delta
+            events.append(("cooking_method", delta))
+        self._buffer = ""
+        return events
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Substitute Engine for Recipe Suggestion System
+
+Offline ingredient substitution based on attribute and nutrient similarity between
+dataset entries, backed by a precomputed top-k neighbor table.
+"""
+
+import json
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from models import IngredientEntry
+from utils import to_casefold_set, logger
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+# Feature group -> (IngredientEntry fields, weight)
+SIMILARITY_GROUPS: Dict[str, Tuple[Tuple[str, ...], float]] = {
+    "flavor": (("flavors",), 0.30),
+    "texture": (("textures",), 0.20),
+    "cooking": (("cook_methods",), 0.15),
+    "nutrition": (("nutrients", "minerals", "vitamins"), 0.15),
+    "type": (("types",), 0.10),
+    "color": (("colors",), 0.05),
+}
+CATEGORY_WEIGHT = 0.05
+
+# Groups quoted back to the user as substitution reasons
+_REASON_GROUPS = ("flavor", "texture", "cooking")
+
+_SCORE_DECIMALS = 6
+
+
+def _features(entry: IngredientEntry) -> Dict[str, FrozenSet[str]]:
+    features = {}
+    for group, (fields, _) in SIMILARITY_GROUPS.items():
+        values = set()
+        for field in fields:
+            values.update(to_casefold_set(getattr(entry, field)))
+        features[group] = frozenset(values)
+    return features
+
+
+class SubstituteEngine:
+    """Precomputed nearest-neighbor table over dataset ingredients.
+
+    Similarity is a weighted Jaccard over feature groups; groups missing on either
+    side are left out of the weighting so sparse entries are not penalized.
+    """
+
+    def __init__(self, entries: List[IngredientEntry], neighbors: int = 10,
+                 min_similarity: float = 0.0,
+                 neighbor_table: Optional[List[List[Tuple[int, float]]]] = None):
+        self._entries: List[IngredientEntry] = []
+        self._features: List[Dict[str, FrozenSet[str]]] = []
+        self._lookup: Dict[str, int] = {}
+        self._min_similarity = min_similarity
+
+        seen = set()
+        for entry in sorted(entries, key=lambda e: e.canonical_name.strip()):
+            name = entry.canonical_name.strip()
+            features = _features(entry)
+            if not name or name in seen or not any(features.values()):
+                continue
+            seen.add(name)
+            self._entries.append(entry)
+            self._features.append(features)
+
+        for row, entry in enumerate(self._entries):
+            for key in [entry.canonical_name] + entry.other_names:
+                self._lookup.setdefault(key.strip().casefold(), row)
+
+        k = min(neighbors, max(len(self._entries) - 1, 0))
+        if neighbor_table is not None and len(neighbor_table) == len(self._entries):
+            # Precomputed by the dataset snapshot for the same entries and settings
+            self._neighbors = neighbor_table
+            return
+        if np is not None:
+            self._neighbors = self._build_numpy(k)
+        else:
+            self._neighbors = self._build_python(k)
+        logger.info(f"Built substitute neighbor table for {len(self._entries)} ingredients (k={k})")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def neighbor_table(self) -> List[List[Tuple[int, float]]]:
+        """(row, similarity) neighbors per row, in the engine's own row order."""
+        return self._neighbors
+
+    @staticmethod
+    def signature(neighbors: int, min_similarity: float) -> str:
+        """Identifies the settings a neighbor table was built with."""
+        groups = sorted((g, list(f), w) for g, (f, w) in SIMILARITY_GROUPS.items())
+        return json.dumps([groups, CATEGORY_WEIGHT, _SCORE_DECIMALS, neighbors, min_similarity])
+
+    def find(self, name: str) -> Optional[IngredientEntry]:
+        """Find a dataset entry by canonical name or alias (case-insensitive)."""
+        row = self._lookup.get((name or "").strip().casefold())
+        return self._entries[row] if row is not None else None
+
+    def substitutes(self, ingredient: str, max_results: int) -> List[Tuple[str, float]]:
+        """Return (name, similarity) pairs for the closest dataset ingredients."""
+        row = self._lookup.get((ingredient or "").strip().casefold())
+        if row is None:
+            return []
+        return [(self._entries[other].canonical_name.strip(), score)
+                for other, score in self._neighbors[row][:max_results]]
+
+    def explain(self, ingredient: str, substitute: str) -> str:
+        """Short human-readable reason why two ingredients are similar."""
+        a = self._lookup.get(ingredient.strip().casefold())
+        b = self._lookup.get(substitute.strip().casefold())
+        if a is None or b is None:
+            return ""
+        parts = []
+        for group in _REASON_GROUPS:
+            fields, _ = SIMILARITY_GROUPS[group]
+            values = [v for field in fields for v in getattr(self._entries[a], field)]
+            shared = [v for v in values if v.casefold() in self._features[b][group]]
+            if shared:
+                parts.append(f"{group}: {', '.join(shared)}")
+        return "Similar " + "; ".join(parts) if parts else "Similar nutrient profile"
+
+    def _build_python(self, k: int) -> List[List[Tuple[int, float]]]:
+        """Pure-Python neighbor table (used when numpy is unavailable)."""
+        n = len(self._entries)
+        sims = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                sims[i][j] = sims[j][i] = self._similarity(i, j)
+        return [self._top_k(i, sims[i], k) for i in range(n)]
+
+    def _similarity(self, i: int, j: int) -> float:
+        fa, fb = self._features[i], self._features[j]
+        num = CATEGORY_WEIGHT if self._entries[i].category == self._entries[j].category else 0.0
+        den = CATEGORY_WEIGHT
+        for group, (_, weight) in SIMILARITY_GROUPS.items():
+            if fa[group] and fb[group]:
+                num += weight * len(fa[group] & fb[group]) / len(fa[group] | fb[group])
+                den += weight
+        return round(num / den, _SCORE_DECIMALS)
+
+    def _top_k(self, row: int, scores, k: int) -> List[Tuple[int, float]]:
+        ranked = sorted((-float(s), j) for j, s in enumerate(scores) if j != row)
+        return [(j, -s) for s, j in ranked[:k] if -s > self._min_similarity]
+
+    def _build_numpy(self, k: int) -> List[List[Tuple[int, float]]]:
+        """Vectorized neighbor table: one Gram matrix per feature group."""
+        n = len(self._entries)
+        num = np.zeros((n, n), dtype=np.float64)
+        den = np.zeros((n, n), dtype=np.float64)
+
+        for group, (_, weight) in SIMILARITY_GROUPS.items():
+            vocab = sorted({v for f in self._features for v in f[group]})
+            columns = {v: c for c, v in enumerate(vocab)}
+            x = np.zeros((n, len(vocab)), dtype=np.float64)
+            for row, features in enumerate(self._features):
+                x[row, [columns[v] for v in features[group]]] = 1.0
+            inter = x @ x.T
+            size = x.sum(axis=1)
+            union = size[:, None] + size[None, :] - inter
+            present = np.outer(size > 0, size > 0)
+            jaccard = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+            num += weight * jaccard * present
+            den += weight * present
+
+        categories = np.array([e.category for e in self._entries])
+        num += CATEGORY_WEIGHT * (categories[:, None] == categories[None, :])
+        den += CATEGORY_WEIGHT
+
+        sims = np.round(num / den, _SCORE_DECIMALS)
+        np.fill_diagonal(sims, -1.0)
+        order = np.argsort(-sims, axis=1, kind="stable")[:, :k]
+        return [
+            [(int(j), float(sims[i, j])) for j in order[i] if sims[i, j] > self._min_similarity]
+            for i in range(n)
+        ]
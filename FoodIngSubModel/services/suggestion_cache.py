@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Suggestion Cache for Recipe Suggestion System
+
+TTL/LRU cache of /suggest results keyed on the canonical ingredient set, so
+"egg, rice" and "Rice, eggs" share an entry. Queries can also be answered from a
+cached superset or subset where the result semantics allow it.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from models import RecipeSuggestion
+from services.recipe_index import ingredient_key
+
+
+@dataclass
+class _Entry:
+    results: List[RecipeSuggestion]
+    source: str  # "database" or "gpt"
+    expires_at: float
+    # Database results only: (matched ingredient keys, ingredient lines) per result, and
+    # whether the results are every recipe that matched any query ingredient
+    details: Optional[List[Tuple[FrozenSet[str], int]]] = None
+    exhaustive: bool = False
+
+
+class SuggestionCache:
+    """Recipe suggestion results by canonical ingredient set.
+
+    Besides exact hits, two derived hits are sound:
+
+    * database results ranked by ingredient overlap: an *exhaustive* cached superset
+      holds every recipe that can match a subset query, so re-ranking it gives the
+      exact answer;
+    * GPT "recipes you can make with these" results: recipes suggested for a cached
+      subset are still makeable with more ingredients; served only when the subset
+      covers at least ``subset_min_ratio`` of the query.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._entries: "OrderedDict[FrozenSet[str], _Entry]" = OrderedDict()
+        self._by_ingredient: Dict[str, Set[FrozenSet[str]]] = {}
+        self._stats = {"exact_hits": 0, "superset_hits": 0, "subset_hits": 0, "misses": 0,
+                       "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(ingredients: Iterable[str]) -> FrozenSet[str]:
+        """Canonical, order-insensitive key of an ingredient list."""
+        return frozenset(ingredient_key(i) for i in ingredients) - {""}
+
+    def get(self, key: FrozenSet[str], limit: int) -> Optional[Tuple[List[RecipeSuggestion], str]]:
+        """Cached (results, source) for ``key``, exact or derived."""
+        if not key:
+            return None
+        now = time.time()
+        entry = self._live(key, now)
+        if entry is not None and (entry.exhaustive or len(entry.results) >= limit):
+            self._entries.move_to_end(key)
+            self._stats["exact_hits"] += 1
+            return list(entry.results[:limit]), entry.source
+
+        result = self._from_superset(key, limit, now) or self._from_subset(key, limit, now)
+        if result is None:
+            self._stats["misses"] += 1
+        return result
+
+    def _live(self, key: FrozenSet[str], now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _from_superset(self, key, limit, now):
+        candidates = set.intersection(*(self._by_ingredient.get(i, set()) for i in key))
+        for other in sorted(candidates, key=len):
+            entry = self._live(other, now)
+            if entry is None or entry.source != "database" or not entry.exhaustive:
+                continue
+            ranked = []
+            for result, (matched, lines) in zip(entry.results, entry.details):
+                overlap = len(matched & key)
+                if overlap:
+                    ranked.append(((-overlap, lines, str(result.id)), result))
+            ranked.sort(key=lambda item: item[0])
+            self._entries.move_to_end(other)
+            self._stats["superset_hits"] += 1
+            return [result for _, result in ranked[:limit]], entry.source
+        return None
+
+    def _from_subset(self, key, limit, now):
+        candidates = set().union(*(self._by_ingredient.get(i, set()) for i in key))
+        min_size = self.config.suggest_cache_subset_min_ratio * len(key)
+        for other in sorted(candidates, key=len, reverse=True):
+            if len(other) < min_size or not other < key:
+                continue
+            entry = self._live(other, now)
+            if entry is None or entry.source != "gpt" or len(entry.results) < limit:
+                continue
+            self._entries.move_to_end(other)
+            self._stats["subset_hits"] += 1
+            return list(entry.results[:limit]), entry.source
+        return None
+
+    def put(self, key: FrozenSet[str], results: List[RecipeSuggestion], source: str,
+            details: Optional[List[Tuple[FrozenSet[str], int]]] = None, exhaustive: bool = False):
+        """Store results for ``key`` with the configured TTL, evicting least recently used entries."""
+        if not key or not results:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(list(results), source, time.time() + self.config.suggest_cache_ttl,
+                                    details, exhaustive)
+        for ingredient in key:
+            self._by_ingredient.setdefault(ingredient, set()).add(key)
+        self._stats["stores"] += 1
+        while len(self._entries) > self.config.suggest_cache_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: FrozenSet[str]):
+        self._entries.pop(key, None)
+        for ingredient in key:
+            keys = self._by_ingredient.get(ingredient)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_ingredient[ingredient]
+
+    def invalidate(self, ingredients: Iterable[str]):
+        """Drop the entry for exactly this ingredient set."""
+        key = self.key(ingredients)
+        if key in self._entries:
+            self._remove(key)
+            self._stats["invalidations"] += 1
+
+    def invalidate_tokens(self, tokens: Optional[Set[str]]):
+        """Drop entries with an ingredient mentioning any of ``tokens`` (None: every entry).
+
+        Registered as a RecipeIndex listener so changed recipes invalidate what they
+        affect, including GPT entries cached because the database had no match yet.
+        """
+        stale = [
+            key for key in self._entries
+            if tokens is None or any(tokens.intersection(k.split()) for k in key)
+        ]
+        for key in stale:
+            self._remove(key)
+        self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_ingredient.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "entries": len(self._entries)}
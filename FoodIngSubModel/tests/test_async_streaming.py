@@ -0,0 +1,74 @@
+import asyncio
+import types
+
+from config import Config
+from services.async_openai_service import AsyncOpenAIService
+
+
+class FakeStream:
+    """Stands in for openai.AsyncStream: async iteration plus close()."""
+
+    def __init__(self, chunks, error=None):
+        self._chunks = chunks
+        self._error = error
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for text in self._chunks:
+            await asyncio.sleep(0)
+            delta = types.SimpleNamespace(content=text)
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+        if self._error is not None:
+            raise self._error
+
+    async def close(self):
+        self.closed = True
+
+
+def make_service(stream):
+    config = Config()
+    config.openai_api_key = "test"
+    config.llm_cache_enabled = False
+    service = AsyncOpenAIService(config)
+    service._cache = None
+
+    async def create(**kwargs):
+        return stream
+
+    service._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    return service
+
+
+def errors(service, method):
+    return service.usage_stats()["methods"].get(method, {}).get("errors", 0)
+
+
+def test_error_mid_stream_is_recorded_and_stream_closed():
+    stream = FakeStream(["Ingredients: 2 eggs | Cooking ", "Method: 1. Whisk"], error=RuntimeError("reset"))
+    service = make_service(stream)
+    before = errors(service, "get_recipe_details")
+
+    async def main():
+        return [event async for event in service.stream_recipe_details("Omelette")]
+
+    events = asyncio.run(main())
+    assert events[-1] == ("error", "reset")
+    assert ("ingredients", "2 eggs") in events
+    assert stream.closed
+    assert errors(service, "get_recipe_details") == before + 1
+
+
+def test_client_disconnect_closes_upstream_stream():
+    stream = FakeStream(["Ingredients: 2 eggs | Cooking Method: ", "1. Whisk", " 2. Fry"] * 50)
+    service = make_service(stream)
+
+    async def main():
+        events = service.stream_recipe_details("Omelette")
+        assert await events.__anext__() == ("ingredients", "2 eggs")
+        await events.aclose()  # what the server does when the client goes away
+        assert stream.closed  # right away, not when the loop shuts down
+
+    asyncio.run(main())
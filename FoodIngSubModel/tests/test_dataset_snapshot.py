@@ -0,0 +1,55 @@
+import json
+import shutil
+
+from config import Config
+from services.dataset_service import DatasetService
+from services.dataset_snapshot import file_digest, read_snapshot
+
+
+def make_service(tmp_path):
+    config = Config()
+    dataset_path = tmp_path / "ingredients.json"
+    if not dataset_path.exists():
+        shutil.copy(config.dataset_path, dataset_path)
+    config.dataset_path = str(dataset_path)
+    config.dataset_snapshot_path = str(tmp_path / "ingredients.snapshot")
+    config.dataset_reload_interval = 0
+    service = DatasetService(config)
+    service.warm_up()
+    return service
+
+
+def entries(service):
+    state = service._state
+    return [row.to_entry() for row in state.store], state.substitute_engine().neighbor_table
+
+
+def test_snapshot_round_trip(tmp_path):
+    built = make_service(tmp_path)
+    assert built.status()["source"] == "json"
+
+    loaded = make_service(tmp_path)  # warm_up of the first wrote the snapshot
+    assert loaded.status()["source"] == "snapshot"
+    assert loaded.status()["version"] == built.status()["version"]
+    assert entries(loaded) == entries(built)
+    ingredient = built._state.store[0].to_entry().canonical_name
+    assert loaded.get_substitute_ingredients(ingredient) == built.get_substitute_ingredients(ingredient)
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    built = make_service(tmp_path)
+    snapshot_path = built.config.dataset_snapshot_path
+    digest = file_digest(built.config.dataset_path)
+    signature = built._engine_signature()
+    assert read_snapshot(snapshot_path, digest, signature) is not None
+    assert read_snapshot(snapshot_path, digest, signature + "x") is None
+
+    # Any edit to the JSON makes the snapshot stale; the service loads the JSON instead
+    with open(built.config.dataset_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with open(built.config.dataset_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    assert read_snapshot(snapshot_path, file_digest(built.config.dataset_path), signature) is None
+    reloaded = make_service(tmp_path)
+    assert reloaded.status()["source"] == "json"
+    assert entries(reloaded)[0] == entries(built)[0]
@@ -0,0 +1,62 @@
+import asyncio
+import types
+
+from config import Config
+from services.async_openai_service import AsyncOpenAIService
+from services.llm_cache import LLMCache
+
+
+def make_cache(tmp_path, disk_entries=100):
+    config = Config()
+    config.llm_cache_path = str(tmp_path / "llm_cache.sqlite3")
+    config.llm_cache_disk_entries = disk_entries
+    config.llm_cache_memory_entries = 5
+    return LLMCache(config)
+
+
+def test_disk_tier_stays_bounded(tmp_path):
+    cache = make_cache(tmp_path)
+    for i in range(1000):
+        cache.set(f"k{i}", f"v{i}", "get_recipe_details")
+    (rows,) = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+    assert rows <= 100
+    assert cache.stats()["disk_entries"] == rows
+    assert cache.get("k999", "get_recipe_details") == "v999"  # most recent survives
+    assert cache.get("k0", "get_recipe_details") is None
+
+
+def test_async_access_reads_through_to_disk(tmp_path):
+    cache = make_cache(tmp_path)
+
+    async def main():
+        await cache.aset("key", "value", "get_recipe_details")
+        cache._memory.clear()
+        return await cache.aget("key", "get_recipe_details"), await cache.aget("other", "get_recipe_details")
+
+    assert asyncio.run(main()) == ("value", None)
+    assert cache.stats()["methods"]["get_recipe_details"]["disk_hits"] == 1
+
+
+def test_truncated_completion_is_not_cached(tmp_path):
+    config = Config()
+    config.llm_cache_path = str(tmp_path / "llm_cache.sqlite3")
+    config.openai_api_key = "test"
+    service = AsyncOpenAIService(config)
+    service._cache = LLMCache(config)
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        message = types.SimpleNamespace(content="Ingredients: 2 eggs | Cooking Method: 1. Whisk")
+        usage = types.SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason="length")],
+                                     usage=usage)
+
+    service._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+
+    async def main():
+        for _ in range(2):
+            await service._make_request("system", "user", 50, "get_recipe_details")
+
+    asyncio.run(main())
+    assert len(calls) == 2
@@ -0,0 +1,67 @@
+import pytest
+
+from config import Config
+from services.dataset_service import DatasetService
+from services.name_resolver import NameResolver, normalize_name
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    pairs = [("Garlic", "garlic"), ("Coriander", "coriander"), ("Milk Wood", "milk wood"),
+             ("Goat Milk", "goat milk"), ("กระเทียม", "garlic"), ("Cilantro", "coriander")]
+    return NameResolver(pairs, min_score=0.8)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return DatasetService(Config())
+
+
+def test_normalize_name():
+    assert normalize_name("  Fried--Rice!! ") == "fried rice"
+    assert normalize_name("กระเทียม") == "กระเทียม"
+
+
+def test_exact_and_alias(resolver):
+    match = resolver.resolve("garlic")
+    assert (match.value, match.match_type, match.score) == ("garlic", "exact", 1.0)
+    assert resolver.resolve("กระเทียม").value == "garlic"
+    assert resolver.resolve("CILANTRO").value == "coriander"
+
+
+def test_fuzzy_typo(resolver):
+    match = resolver.resolve("corriander")
+    assert (match.value, match.match_type) == ("coriander", "fuzzy")
+    assert 0.8 <= match.score < 1.0
+
+
+def test_partial_only_when_allowed(resolver):
+    assert resolver.resolve("milk", allow_partial=False) is None
+    match = resolver.resolve("milk", allow_partial=True)
+    assert (match.value, match.match_type) == ("milk wood", "partial")
+
+
+def test_unrelated_name_does_not_resolve(resolver):
+    assert resolver.resolve("xylophone") is None
+
+
+@pytest.mark.parametrize("name", ["oat milk", "coconut cream"])
+def test_near_miss_is_not_answered_as_another_ingredient(dataset, name):
+    # Fuzzy look-alikes ("oat milk" ~ Goat Milk) must not stand in for the typed ingredient
+    assert dataset.resolve_ingredient(name).match_type == "fuzzy"
+    assert dataset.canonical_ingredient(name) is None
+    look_alike = dataset.resolve_ingredient(name).value.canonical_name
+    assert dataset.get_substitute_ingredients(name).items != dataset.get_substitute_ingredients(look_alike).items
+
+
+def test_alias_still_maps_to_canonical(dataset):
+    assert dataset.canonical_ingredient("ไข่ไก่").value.canonical_name == "Hen Egg"
+
+
+def test_prefix_completions_capped_by_suggest_limit():
+    resolver = NameResolver([(f"Egg {i:02d}", i) for i in range(30)], suggest_limit=25)
+    assert resolver.suggest_limit == 25
+    assert len(resolver.prefix("egg", 25)) == 25
+    assert len(resolver.prefix("egg", 50)) == 25
+    assert len(resolver.prefix("egg")) == 25
+    assert [m.value for m in resolver.prefix("egg", 3)] == [0, 1, 2]
@@ -0,0 +1,59 @@
+import re
+
+import pytest
+
+from services.openai_service import LLMCall
+from services.prompts import PROMPTS, PromptBudgetError, PromptTemplate, count_tokens
+
+
+def test_render_within_budget_is_the_formatted_template():
+    template = PROMPTS["get_similar_recipes"]
+    assert template.render(recipe="Pad Thai", max_results=4) == "Original recipe: Pad Thai\nRecipes: up to 4"
+
+
+def test_system_prefix_is_static():
+    for template in PROMPTS.values():
+        assert not re.search(r"\{[a-z_]+\}", template.system)
+        assert template.system_tokens == count_tokens(template.system)
+
+
+def test_trimming_keeps_instruction_lines():
+    template = PROMPTS["get_updated_recipe_with_substitution"]
+    ingredients = ", ".join(f"{i} g ingredient number {i}" for i in range(2000))
+    user = template.render(recipe="Pad Thai", original_ingredients=ingredients,
+                           original_ingredient="shrimp", substitute_ingredient="tofu")
+    lines = user.split("\n")
+    assert lines[0] == "Recipe: Pad Thai"
+    assert lines[1].startswith("Original ingredients: 0 g ingredient number 0, ")
+    assert lines[1].endswith("ingredient number " + lines[1].rsplit(" ", 1)[-1])  # cut at a word break
+    assert lines[2].startswith("Replace ONLY 'shrimp' with 'tofu'")
+    assert template.system_tokens + count_tokens(user) <= template.input_budget
+
+
+def test_trimming_keeps_the_count_line():
+    template = PROMPTS["get_recipes_with_specific_ingredients"]
+    user = template.render(required="tofu, basil", context="Similar to: " + "pad thai " * 3000 + "\n",
+                           exclude="", max_results=5)
+    assert user.startswith("Every recipe MUST include ALL of these ingredients: tofu, basil.\nSimilar to: pad thai")
+    assert user.endswith("\nRecipes: up to 5")
+
+
+def test_batch_items_lose_whole_lines():
+    template = PROMPTS["get_substitute_ingredients_batch"]
+    items = "\n".join(f"{i}. Ingredient: item{i} | Recipe: curry" for i in range(1, 3000))
+    lines = template.render(max_results=3, items=items).split("\n")
+    assert lines[0] == "Substitutes per item: up to 3"
+    assert 1 < len(lines) < 3000
+    assert lines[-1] == f"{len(lines) - 1}. Ingredient: item{len(lines) - 1} | Recipe: curry"
+
+
+def test_fixed_text_over_budget_is_refused():
+    template = PromptTemplate("test", 1, "System.", "Keep {fixed}\n{note}", input_budget=64, trim=("note",))
+    with pytest.raises(PromptBudgetError):
+        template.render(fixed="x" * 1000, note="")
+
+
+def test_refused_call_is_not_sent():
+    call = LLMCall.from_prompt("get_rewritten_recipe", 800, lambda text: text,
+                               recipe="Pad Thai", original_ingredient="x" * 10000, substitute_ingredient="tofu")
+    assert call.user is None
@@ -0,0 +1,111 @@
+import asyncio
+
+from config import Config
+from services.recipe_index import LocalRecipeSource, RecipeIndex
+from services.recipe_service import RecipeService
+from services.suggestion_cache import SuggestionCache
+
+
+RECIPES = [
+    {"id": 1, "recipe_name": "Fried Rice", "ingredients": "2 cups cooked rice, 2 eggs, 1 tbsp soy sauce", "img_src": None},
+    {"id": 2, "recipe_name": "Omelette", "ingredients": "3 eggs, salt, butter", "img_src": None},
+    {"id": 3, "recipe_name": "Rice Pudding", "ingredients": "rice, milk, sugar, cinnamon, vanilla, eggs", "img_src": None},
+    {"id": 4, "recipe_name": "Garlic Bread", "ingredients": "bread, garlic, butter", "img_src": None},
+]
+
+
+def make_config(**overrides):
+    config = Config()
+    config.recipe_index_batch_size = 2  # exercise keyset paging
+    config.recipe_index_refresh_interval = 0
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def names(results):
+    return [r.name for r in results]
+
+
+def test_ranks_by_overlap_then_coverage():
+    index = RecipeIndex(make_config(), LocalRecipeSource(records=list(RECIPES)))
+    asyncio.run(index.load())
+
+    assert len(index) == 4
+    # Both recipes with rice and eggs first, the one with fewer ingredient lines ahead
+    assert names(index.search(["Eggs", "rice"], 10)) == ["Fried Rice", "Rice Pudding", "Omelette"]
+    results, details, exhaustive = index.search_ranked(["egg", "rice"], 1)
+    assert names(results) == ["Fried Rice"]
+    assert details[0] == (frozenset({"egg", "rice"}), 3)
+    assert not exhaustive
+
+
+def test_refresh_pulls_only_rows_after_watermark():
+    records = list(RECIPES[:2])
+    source = LocalRecipeSource(records=records)
+    index = RecipeIndex(make_config(), source)
+    asyncio.run(index.load())
+    assert index.search(["garlic"], 5) == []
+
+    records.extend(RECIPES[2:])
+    assert asyncio.run(index.refresh()) == 2
+    assert names(index.search(["garlic"], 5)) == ["Garlic Bread"]
+    assert asyncio.run(index.refresh()) == 0
+    assert index.stats()["watermark"] == (4, 4)
+
+
+def test_refresh_by_timestamp_pages_past_equal_values_and_skips_unchanged_rows():
+    records = [{**recipe, "updated_at": "2025-01-01T00:00:00"} for recipe in RECIPES]
+    config = make_config(recipe_index_refresh_column="updated_at")
+    index = RecipeIndex(config, LocalRecipeSource(records=records))
+    notified = []
+    index.add_listener(notified.append)
+    asyncio.run(index.load())
+    # Four rows with one timestamp, paged two at a time
+    assert len(index) == 4
+
+    assert asyncio.run(index.refresh()) == 0
+    assert notified == [None]  # only the load
+
+    records[3] = {**records[3], "ingredients": "bread, garlic, olive oil", "updated_at": "2025-01-02T00:00:00"}
+    assert asyncio.run(index.refresh()) == 1
+    assert notified[-1] == {"bread", "garlic", "butter", "olive", "oil"}
+    assert names(index.search(["olive oil"], 5)) == ["Garlic Bread"]
+
+
+def test_changed_recipes_invalidate_cached_suggestions():
+    records = list(RECIPES[:2])
+    config = make_config()
+    index = RecipeIndex(config, LocalRecipeSource(records=records))
+    cache = SuggestionCache(config)
+    index.add_listener(cache.invalidate_tokens)
+    asyncio.run(index.load())
+
+    for query in (["egg"], ["garlic", "bread"]):
+        results, details, exhaustive = index.search_ranked(query, 5)
+        cache.put(cache.key(query), results, "database", details, exhaustive)
+    records.append(RECIPES[3])
+    asyncio.run(index.refresh())
+
+    assert cache.get(cache.key(["egg"]), 5) is not None
+    assert cache.get(cache.key(["bread", "garlic"]), 5) is None
+
+
+def test_failed_load_backs_off_and_falls_back():
+    calls = []
+
+    class FailingSource:
+        async def fetch(self, column, after, limit, after_id=None):
+            calls.append(after)
+            raise RuntimeError("recipes table unavailable")
+
+    service = RecipeService(make_config(recipe_snapshot_path="unused.json"))
+    service.recipe_index = RecipeIndex(service.config, FailingSource())
+
+    async def main():
+        return [await service._get_database_suggestions(["egg"], 5) for _ in range(3)]
+
+    assert asyncio.run(main()) == [[], [], []]
+    assert len(calls) == 1  # later requests skip the index instead of reloading it
+    assert service.recipe_index.backing_off
+    assert service.recipe_index.stats()["load_failures"] == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from config import Config
+from models import RecipeSuggestion
+from services.dataset_service import DatasetService
+from services.recipe_validation import RequiredIngredients, YieldTracker
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return DatasetService(Config())
+
+
+def required(dataset, *names):
+    return RequiredIngredients({name: dataset.ingredient_names(name) for name in names})
+
+
+def test_aliases_satisfy_required_ingredient(dataset):
+    check = required(dataset, "coriander", "garlic")
+    assert check.missing("ผักชี, 2 cloves crushed Garlic, rice") == []
+    assert check.missing("coriander leaves, onion") == ["garlic"]
+
+
+def test_fuzzy_look_alike_does_not_satisfy(dataset):
+    assert dataset.ingredient_names("oat milk") == ["oat milk"]
+    assert required(dataset, "oat milk").missing("goat milk, oats") == ["oat milk"]
+
+
+def test_select_drops_invalid_and_duplicate_recipes(dataset):
+    check = required(dataset, "garlic")
+    candidates = [RecipeSuggestion("Stir Fry", "garlic, tofu"), RecipeSuggestion("stir  fry", "garlic"),
+                  RecipeSuggestion("Salad", "lettuce"), RecipeSuggestion("Soup", "Garlics, broth")]
+    assert [r.name for r in check.select(candidates, exclude=["Soup"])] == ["Stir Fry"]
+
+
+def test_factor_follows_observed_yield():
+    tracker = YieldTracker(Config())
+    assert tracker.factor("1 required") == Config().specific_initial_factor
+    tracker.record("1 required", 10, 5)
+    assert tracker.factor("1 required") == pytest.approx(Config().specific_factor_headroom / 0.5)
+    assert tracker.candidates("1 required", 5) == 12
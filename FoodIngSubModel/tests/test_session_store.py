@@ -0,0 +1,77 @@
+import asyncio
+
+from config import Config
+from services.recipe_service import RecipeService
+from services.session_store import SessionStore
+
+
+def make_config():
+    config = Config()
+    config.session_max_entries = 10
+    config.session_max_substitutions = 5
+    return config
+
+
+def substitute(store, *pairs):
+    for old, new in pairs:
+        state = store.update("s1", "Pancakes", substitution=(old, new))
+    return state.substitutions
+
+
+def test_substitutions_keep_one_pair_per_original_ingredient():
+    store = SessionStore(make_config())
+    assert substitute(store, ("milk", "oat milk"), ("egg", "flax egg")) == [("milk", "oat milk"), ("egg", "flax egg")]
+    # Replacing the original again or the ingredient it became both supersede the pair
+    assert substitute(store, ("Milk", "almond milk")) == [("egg", "flax egg"), ("milk", "almond milk")]
+    assert substitute(store, ("almond milk", "soy milk")) == [("egg", "flax egg"), ("milk", "soy milk")]
+    # Back to the original: nothing is substituted any more
+    assert substitute(store, ("soy milk", "milk")) == [("egg", "flax egg")]
+
+
+def test_substitution_history_is_bounded():
+    config = make_config()
+    config.session_max_substitutions = 2
+    store = SessionStore(config)
+    assert substitute(store, ("milk", "oat milk"), ("egg", "flax egg"), ("butter", "ghee")) == [
+        ("egg", "flax egg"), ("butter", "ghee")]
+
+    config.session_max_substitutions = 0
+    assert substitute(store, ("sugar", "honey"), ("salt", "soy sauce")) == []
+
+
+class FakeOpenAIService:
+    is_available = True
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_cached_recipe_details(self, recipe_name):
+        return None
+
+    async def get_rewritten_recipe(self, recipe_name, old, new):
+        self.calls.append(("combined", "", old, new))
+        return {"ingredients": f"flour, {new}, egg", "cooking_method": "Mix and fry."}
+
+    async def get_updated_recipe_with_substitution(self, recipe_name, ingredients, old, new):
+        self.calls.append(("update", ingredients, old, new))
+        return {"ingredients": ingredients.replace(old, new), "cooking_method": "Mix and fry."}
+
+
+def test_revisited_substitution_keeps_the_others():
+    openai_service = FakeOpenAIService()
+    service = RecipeService(make_config(), openai_service=openai_service)
+
+    async def rewrite(old, new):
+        return await service.rewrite_recipe("Pancakes", old, new, session_id="s1")
+
+    async def main():
+        await rewrite("milk", "oat milk")
+        await rewrite("egg", "flax egg")
+        return await rewrite("milk", "soy milk")
+
+    result = asyncio.run(main())
+    # The last rewrite starts from the current version and replaces what milk became
+    assert openai_service.calls[-1] == ("update", "flour, oat milk, flax egg", "oat milk", "soy milk")
+    assert result["ingredients"] == "flour, soy milk, flax egg"
+    assert result["path"] == "session"
+    assert service.sessions.get("s1").substitutions == [("egg", "flax egg"), ("milk", "soy milk")]
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import AsyncSingleFlight
+
+
+def test_async_callers_share_one_call():
+    async def main():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(main())
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert stats == {"upstream_calls": 1, "coalesced_calls": 4, "in_flight": 0}
+
+
+def test_async_error_reaches_every_caller_and_is_not_remembered():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def recovered():
+            return "recovered"
+
+        errors = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        return errors, await flight.do("k", recovered)
+
+    errors, result = asyncio.run(main())
+    assert [str(e) for e in errors] == ["upstream down"] * 3
+    assert result == "recovered"
+
+
+@pytest.mark.parametrize("cancelled", ["leader", "waiter"])
+def test_cancelled_caller_does_not_cancel_the_others(cancelled):
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        (leader if cancelled == "leader" else waiter).cancel()
+        survivor = waiter if cancelled == "leader" else leader
+        return await survivor, flight.stats()
+
+    result, stats = asyncio.run(main())
+    assert result == "answer"
+    assert stats["upstream_calls"] == 1 and stats["in_flight"] == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from services.stream_parser import SectionStreamParser
+
+
+def parse(chunks):
+    parser = SectionStreamParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)] + parser.finish()
+    ingredients = [data for event, data in events if event == "ingredients"]
+    return ingredients, "".join(data for event, data in events if event == "cooking_method")
+
+
+COMPLETIONS = [
+    "Ingredients: 2 eggs, 1 cup flour | Cooking Method: 1. Whisk the eggs. 2. Fold in the flour.",
+    "Updated Ingredients: 2 eggs, 1 cup flour | Updated Cooking Method: 1. Whisk the eggs. 2. Fold in the flour.",
+    "Ingredients: 2 eggs, 1 cup flour\nCooking Method: 1. Whisk the eggs. 2. Fold in the flour.",
+    "Ingredients: 2 eggs, 1 cup flour | 1. Whisk the eggs. 2. Fold in the flour.",
+]
+
+
+@pytest.mark.parametrize("text", COMPLETIONS)
+def test_separator_split_across_chunks(text):
+    expected = (["2 eggs, 1 cup flour"], "1. Whisk the eggs. 2. Fold in the flour.")
+    assert parse([text]) == expected
+    # Every two-chunk split, including through "|" and the method label
+    for cut in range(1, len(text)):
+        assert parse([text[:cut], text[cut:]]) == expected, cut
+    assert parse(list(text)) == expected
+
+
+def test_ingredients_emitted_once_separator_arrives():
+    parser = SectionStreamParser()
+    assert parser.feed("Ingredients: rice, ") == []
+    assert parser.feed("egg | Cook") == [("ingredients", "rice, egg")]
+    assert parser.feed("ing Method: Fry.") == [("cooking_method", "Fry.")]
+    assert parser.finish() == []
+
+
+def test_unsplit_completion_is_left_to_the_full_parser():
+    parser = SectionStreamParser()
+    assert parser.feed("Sorry, I do not know that dish.") == []
+    assert parser.finish() == []
+    assert not parser.split
@@ -0,0 +1,70 @@
+from config import Config
+from models import RecipeSuggestion
+from services.suggestion_cache import SuggestionCache
+
+
+def make_cache():
+    config = Config()
+    config.suggest_cache_subset_min_ratio = 0.75
+    return SuggestionCache(config)
+
+
+def recipe(name, recipe_id=None):
+    return RecipeSuggestion(name=name, ingredients="", id=recipe_id)
+
+
+def names(hit):
+    return [r.name for r in hit[0]], hit[1]
+
+
+def test_exact_hit_in_any_order_and_form():
+    cache = make_cache()
+    cache.put(cache.key(["Eggs", "rice"]), [recipe("Fried Rice")], "gpt")
+    assert names(cache.get(cache.key(["rice", "egg"]), 1)) == (["Fried Rice"], "gpt")
+    # Fewer results than asked for and not exhaustive: not an answer
+    assert cache.get(cache.key(["rice", "egg"]), 2) is None
+
+
+def test_exhaustive_database_superset_is_reranked_for_subset_query():
+    cache = make_cache()
+    results = [recipe("Fried Rice", 1), recipe("Omelette", 2), recipe("Rice Pudding", 3)]
+    details = [(frozenset({"egg", "rice"}), 3), (frozenset({"egg"}), 2), (frozenset({"rice"}), 5)]
+    cache.put(cache.key(["egg", "rice"]), results, "database", details, exhaustive=True)
+
+    assert names(cache.get(cache.key(["egg"]), 5)) == (["Omelette", "Fried Rice"], "database")
+    assert names(cache.get(cache.key(["rice"]), 1)) == (["Fried Rice"], "database")
+    assert cache.stats()["superset_hits"] == 2
+
+
+def test_non_exhaustive_superset_is_not_used():
+    cache = make_cache()
+    cache.put(cache.key(["egg", "rice"]), [recipe("Fried Rice", 1)], "database",
+              [(frozenset({"egg", "rice"}), 3)], exhaustive=False)
+    assert cache.get(cache.key(["egg"]), 1) is None
+
+
+def test_gpt_subset_serves_query_with_more_ingredients():
+    cache = make_cache()
+    cache.put(cache.key(["egg", "rice", "onion"]), [recipe("Fried Rice"), recipe("Omelette")], "gpt")
+
+    # Three of four query ingredients is at the 0.75 minimum
+    hit = cache.get(cache.key(["egg", "rice", "onion", "garlic"]), 2)
+    assert names(hit) == (["Fried Rice", "Omelette"], "gpt")
+    assert cache.stats()["subset_hits"] == 1
+    # Three of five is below it
+    assert cache.get(cache.key(["egg", "rice", "onion", "garlic", "ginger"]), 2) is None
+    # Database results for a subset say nothing about recipes using the extra ingredient
+    cache.put(cache.key(["egg", "rice", "carrot"]), [recipe("Fried Rice", 1)], "database",
+              [(frozenset({"egg", "rice"}), 3)], exhaustive=True)
+    assert cache.get(cache.key(["egg", "rice", "carrot", "pea"]), 1) is None
+
+
+def test_invalidate_tokens_drops_affected_entries():
+    cache = make_cache()
+    cache.put(cache.key(["egg"]), [recipe("Omelette")], "gpt")
+    cache.put(cache.key(["garlic bread"]), [recipe("Bruschetta")], "gpt")
+    cache.invalidate_tokens({"bread"})
+    assert cache.get(cache.key(["egg"]), 1) is not None
+    assert cache.get(cache.key(["garlic bread"]), 1) is None
+    cache.invalidate_tokens(None)
+    assert cache.get(cache.key(["egg"]), 1) is None